@@ -0,0 +1,136 @@
+"""
+Tìm kiếm nền: AI suy nghĩ trong một tiến trình riêng để vòng lặp giao diện không bị chặn.
+
+Giao tiếp qua hai hàng đợi:
+    - yêu cầu: ('search', mã yêu cầu, FEN, độ sâu, ngân sách thời gian, ngân sách số nút, ponder)
+      hoặc ('quit',),
+    - kết quả: ('info', mã yêu cầu, IterationStats.as_dict()) sau mỗi vòng iterative deepening và
+      ('move', mã yêu cầu, mã nước đi hoặc None, điểm, SearchStats.as_dict() hoặc None).
+Hủy bằng một multiprocessing.Event dùng chung (SearchLimits kiểm tra định kỳ); kết quả của yêu
+cầu đã bị thay thế được bỏ qua theo mã yêu cầu.
+
+Suy nghĩ trước (ponder): sau khi trả nước đi, tiến trình nền đi thử nước đó cùng nước đáp
+dự đoán (nước tốt nhất trong bảng chuyển vị) rồi tìm kiếm vị trí này cho đến khi có yêu cầu
+mới. Nếu người chơi đi đúng nước dự đoán (cùng FEN) và lần suy nghĩ trước đã đủ sâu, kết quả
+được trả về ngay; nếu chưa đủ sâu, tìm kiếm lại với bảng chuyển vị đã "nóng".
+"""
+import multiprocessing
+import queue
+
+from core.board import Board
+from core.game_rule import GameRule
+from core.move import Move
+
+
+def _worker(strategy_factory, requests, results, stop_event):
+    """Vòng lặp của tiến trình nền: xử lý lần lượt các yêu cầu tìm kiếm."""
+    strategy = strategy_factory()
+    pondered = None  # (FEN, độ sâu hoàn thành, mã nước đi, điểm) của lần suy nghĩ trước gần nhất
+    while True:
+        command = requests.get()
+        if command[0] == 'quit':
+            break
+        stop_event.clear()
+        _, request_id, fen, depth, time_limit, node_limit, ponder = command
+        game_logic = GameRule(Board.from_fen(fen))
+        board = game_logic.board
+
+        if pondered is not None and pondered[0] == fen and pondered[1] >= depth and pondered[2] is not None:
+            # Đoán trúng nước của đối thủ và đã suy nghĩ đủ sâu
+            code, score, stats = pondered[2], pondered[3], None
+        else:
+            strategy.on_iteration = lambda iteration: results.put(('info', request_id, iteration.as_dict()))
+            move = strategy.select_move(game_logic, depth, time_limit, node_limit, stop_event=stop_event)
+            code = move.to_code(board) if move is not None else None
+            score = strategy.best_score
+            stats = strategy.stats.as_dict() if strategy.stats is not None else None
+        pondered = None
+        results.put(('move', request_id, code, score, stats))
+
+        tt = getattr(strategy, 'tt', None)
+        if not ponder or code is None or tt is None or stop_event.is_set():
+            continue
+        Move.make(board, code)
+        entry = tt.probe(board.zobrist_key)
+        predicted = entry[3] if entry is not None else 0
+        if not predicted or not game_logic.is_legal_move(predicted, board.turn):
+            continue
+        Move.make(board, predicted)
+        ponder_fen = board.to_fen()
+        strategy.on_iteration = None
+        strategy.select_move(game_logic, depth, stop_event=stop_event)
+        pondered = (ponder_fen, strategy.completed_depth, strategy.best_code, strategy.best_score)
+
+
+class BackgroundSearch:
+    """
+    Tìm kiếm trong một tiến trình nền; giao diện gọi start() rồi poll() ở mỗi khung hình.
+    """
+    def __init__(self, strategy_factory, ponder=True, on_info=None):
+        """
+        :param strategy_factory: Hàm (cấp module, pickle được) tạo chiến lược AI trong tiến trình nền.
+        :param ponder: Suy nghĩ trước trên nước đáp dự đoán trong lúc đối thủ suy nghĩ.
+        :param on_info: Hàm gọi với từ điển IterationStats của lần tìm kiếm hiện tại (trong poll).
+        """
+        # 'spawn': tiến trình nền không kế thừa trạng thái pygame của tiến trình giao diện
+        context = multiprocessing.get_context('spawn')
+        self.ponder = ponder
+        self.on_info = on_info
+        self.requests = context.Queue()
+        self.results = context.Queue()
+        self.stop_event = context.Event()
+        self.process = context.Process(target=_worker, args=(strategy_factory, self.requests, self.results,
+                                                             self.stop_event), daemon=True)
+        self.process.start()
+        self.request_id = 0
+        self.pending = None  # Mã yêu cầu đang chờ kết quả
+        self.last_result = None  # (mã nước đi, điểm, thống kê) của lần tìm kiếm gần nhất
+
+    @property
+    def thinking(self):
+        return self.pending is not None
+
+    def start(self, board, depth, time_limit=None, node_limit=None):
+        """
+        Bắt đầu tìm nước đi cho vị trí hiện tại của bàn cờ (dừng lần suy nghĩ trước nếu đang chạy).
+        :return: Mã yêu cầu.
+        """
+        self.stop_event.set()  # Tiến trình nền xóa cờ dừng khi nhận yêu cầu mới
+        self.request_id += 1
+        self.pending = self.request_id
+        self.requests.put(('search', self.request_id, board.to_fen(), depth, time_limit, node_limit, self.ponder))
+        return self.request_id
+
+    def poll(self):
+        """
+        Đọc các kết quả đã có mà không chặn.
+        :return: (mã nước đi hoặc None, điểm, thống kê) khi lần tìm kiếm hiện tại xong, None nếu chưa.
+        """
+        while True:
+            try:
+                kind, request_id, *payload = self.results.get_nowait()
+            except queue.Empty:
+                return None
+            if request_id != self.pending:
+                continue  # Kết quả của yêu cầu đã bị hủy hoặc thay thế
+            if kind == 'info':
+                if self.on_info is not None:
+                    self.on_info(payload[0])
+            else:
+                self.pending = None
+                self.last_result = tuple(payload)
+                return self.last_result
+
+    def cancel(self):
+        """Hủy lần tìm kiếm hoặc suy nghĩ trước đang chạy."""
+        self.pending = None
+        self.stop_event.set()
+
+    def close(self):
+        """Dừng tiến trình nền."""
+        self.cancel()
+        if self.process.is_alive():
+            self.requests.put(('quit',))
+            self.process.join(timeout=2)
+            if self.process.is_alive():
+                self.process.terminate()
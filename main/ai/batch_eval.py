@@ -0,0 +1,211 @@
+"""
+Đánh giá theo lô bằng NumPy: tìm kiếm gom các vị trí lá vào một bộ đệm gồm các mảng 64 byte
+(mã quân theo ô) rồi đánh giá tất cả trong một lần gọi vector hóa.
+
+Mã quân trong mảng: 0 là ô trống, 1 + (loại quân * 2 + màu) cho quân (cùng thứ tự với
+core.psqt: 1 Tốt trắng, 2 Tốt đen, 3 Mã trắng, ..., 12 Vua đen). Board giữ sẵn mảng này
+(board.codes) và cập nhật tăng dần nên thêm một vị trí vào lô chỉ là sao chép 64 byte.
+
+Các thành phần đánh giá (centipawn, dương có lợi cho Trắng):
+    - giá trị quân và điểm vị trí trung cuộc/tàn cuộc (core.psqt), nội suy theo giai đoạn,
+    - độ cơ động xấp xỉ: số ô trống Tượng/Xe/Hậu đi tới được theo tia và số ô Mã đi tới
+      được (không tính ô có quân cùng màu),
+    - cấu trúc Tốt: Tốt chồng, Tốt cô lập, Tốt thông (thưởng theo hàng).
+
+Không có các thành phần an toàn Vua của chessBot.Evaluator nên điểm theo lô chỉ dùng để sắp xếp
+nước đi ở nút biên, không thay cho giá trị lá.
+
+NumPy là phụ thuộc tùy chọn: module vẫn import được khi thiếu NumPy, nhưng tạo
+BatchEvaluator sẽ ném ImportError.
+"""
+try:
+    import numpy as np
+except ImportError:  # NumPy là tùy chọn, chỉ cần cho chế độ đánh giá theo lô
+    np = None
+
+from core.attack_tables import KNIGHT_OFFSETS, DIRECTIONS, STRAIGHT, DIAGONAL
+from core.bitboard import PAWN, KNIGHT, BISHOP, ROOK, QUEEN, WHITE, BLACK
+from core.psqt import PSQT, PHASE, MAX_PHASE, mg_value, eg_value
+from .pawn_hash import DOUBLED_PAWN_PENALTY, ISOLATED_PAWN_PENALTY, PASSED_PAWN_BONUS
+
+BATCH_SIZE = 1024  # Số vị trí tối đa trong một lần gọi
+
+EMPTY = 0
+
+MOBILITY_WEIGHT = 3  # Centipawn cho mỗi ô quân đi tới được
+
+
+def piece_code(kind, color):
+    """Mã của (loại quân, màu) trong mảng bàn cờ gọn."""
+    return kind * 2 + color + 1
+
+
+def _column_mask(col_offset):
+    """Các ô đích hợp lệ khi dịch cột `col_offset` (loại các ô bị tràn sang mép bên kia)."""
+    return sum(1 << sq for sq in range(64) if 0 <= (sq & 7) - col_offset <= 7)
+
+
+def _build_tables():
+    sign = np.array([0] + [1 if (code - 1) % 2 == WHITE else -1 for code in range(1, 13)], dtype=np.int32)
+    mg = np.zeros((13, 64), dtype=np.int32)
+    eg = np.zeros((13, 64), dtype=np.int32)
+    phase = np.zeros(13, dtype=np.int32)
+    for code in range(1, 13):
+        base = (code - 1) * 64
+        mg[code] = [sign[code] * mg_value(PSQT[base + sq]) for sq in range(64)]
+        eg[code] = [sign[code] * eg_value(PSQT[base + sq]) for sq in range(64)]
+        phase[code] = PHASE[code - 1]
+
+    # (độ dịch bit, mặt nạ ô đích) cho mỗi hướng trượt và mỗi bước nhảy của Mã
+    def step(row_dir, col_dir):
+        return row_dir * 8 + col_dir, np.uint64(_column_mask(col_dir))
+
+    return {
+        'sign': sign, 'mg': mg, 'eg': eg, 'phase': phase,
+        'straight': [step(*DIRECTIONS[d]) for d in STRAIGHT],
+        'diagonal': [step(*DIRECTIONS[d]) for d in DIAGONAL],
+        'knight': [step(*offset) for offset in KNIGHT_OFFSETS],
+        'not_a': np.uint64(_column_mask(1)),
+        'not_h': np.uint64(_column_mask(-1)),
+        'ranks': [np.uint64(0xFF << (8 * row)) for row in range(8)],
+    }
+
+
+def _shift(bb, shift):
+    """Dịch bitboard về phía chỉ số ô lớn hơn (shift > 0) hoặc nhỏ hơn (shift < 0)."""
+    return bb << np.uint64(shift) if shift > 0 else bb >> np.uint64(-shift)
+
+
+def _slide(gen, empty, shift, mask):
+    """Các ô bị tấn công theo một hướng trượt (Kogge-Stone occluded fill) cho mọi bitboard trong lô."""
+    empty = empty & mask
+    gen = gen | (empty & _shift(gen, shift))
+    empty = empty & _shift(empty, shift)
+    gen = gen | (empty & _shift(gen, 2 * shift))
+    empty = empty & _shift(empty, 2 * shift)
+    gen = gen | (empty & _shift(gen, 4 * shift))
+    return _shift(gen, shift) & mask
+
+
+def _fill(bb, shift):
+    """Lan bitboard theo cột về một phía (shift = ±8), không gồm chính các ô ban đầu."""
+    bb = _shift(bb, shift)
+    bb = bb | _shift(bb, shift)
+    bb = bb | _shift(bb, 2 * shift)
+    return bb | _shift(bb, 4 * shift)
+
+
+def _popcount(bb):
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(bb).astype(np.int32)
+    return np.unpackbits(bb.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1, dtype=np.int32)
+
+
+class BatchEvaluator:
+    """
+    Bộ đệm các vị trí lá và hàm đánh giá vector hóa cho cả bộ đệm.
+
+    Cách dùng: add(board) cho từng vị trí (trả về chỉ số trong lô), rồi flush() để nhận
+    mảng điểm (đơn vị Tốt, dương có lợi cho Trắng) theo đúng thứ tự đã thêm.
+    """
+    def __init__(self, capacity=BATCH_SIZE):
+        """
+        :param capacity: Số vị trí tối đa trong bộ đệm.
+        """
+        if np is None:
+            raise ImportError("BatchEvaluator requires NumPy (pip install numpy).")
+        self.capacity = capacity
+        self.buffer = bytearray(capacity * 64)
+        self.count = 0
+        self.evaluated = 0  # Tổng số vị trí đã đánh giá
+        self.calls = 0  # Số lần gọi đánh giá vector hóa
+        self._tables = _build_tables()
+        self._cols = np.arange(64)
+
+    def add(self, board):
+        """
+        Ghi vị trí hiện tại của `board` vào bộ đệm.
+        :return: Chỉ số của vị trí trong lô.
+        """
+        if self.count == self.capacity:
+            raise OverflowError(f"Batch buffer is full ({self.capacity} positions).")
+        offset = self.count * 64
+        self.buffer[offset:offset + 64] = board.codes  # Board cập nhật mảng mã quân tăng dần
+        self.count += 1
+        return self.count - 1
+
+    def flush(self):
+        """
+        Đánh giá mọi vị trí trong bộ đệm rồi làm rỗng bộ đệm.
+        :return: Mảng NumPy float64 các điểm (đơn vị Tốt).
+        """
+        count, self.count = self.count, 0
+        boards = np.frombuffer(self.buffer, dtype=np.uint8, count=count * 64).reshape(count, 64)
+        return self.evaluate_array(boards)
+
+    def evaluate_array(self, boards):
+        """
+        Đánh giá một mảng (N, 64) các bàn cờ đã mã hóa.
+        :return: Mảng float64 độ dài N (đơn vị Tốt).
+        """
+        self.calls += 1
+        self.evaluated += len(boards)
+        t = self._tables
+        count = len(boards)
+        if count == 0:
+            return np.zeros(0)
+
+        # Giá trị quân + điểm vị trí, nội suy theo giai đoạn
+        mg = t['mg'][boards, self._cols].sum(axis=1)
+        eg = t['eg'][boards, self._cols].sum(axis=1)
+        phase = np.minimum(t['phase'][boards].sum(axis=1), MAX_PHASE)
+        score = (mg * phase + eg * (MAX_PHASE - phase)) / MAX_PHASE
+
+        # Bitboard (uint64) của từng mã quân cho cả lô
+        bits = [np.packbits(boards == code, axis=1, bitorder='little').view('<u8').ravel() for code in range(13)]
+        empty = bits[EMPTY]
+        sides = []
+        for color in (WHITE, BLACK):
+            pieces = [bits[piece_code(kind, color)] for kind in range(6)]
+            sides.append((np.bitwise_or.reduce(pieces), pieces))
+
+        # Độ cơ động xấp xỉ: số ô (trống hoặc có quân đối phương) bị Mã/Tượng/Xe/Hậu của mỗi bên tấn công
+        mobility = []
+        for own, pieces in sides:
+            diagonal = pieces[BISHOP] | pieces[QUEEN]
+            straight = pieces[ROOK] | pieces[QUEEN]
+            attacks = np.zeros(count, dtype=np.uint64)
+            for shift, mask in t['diagonal']:
+                attacks |= _slide(diagonal, empty, shift, mask)
+            for shift, mask in t['straight']:
+                attacks |= _slide(straight, empty, shift, mask)
+            for shift, mask in t['knight']:
+                attacks |= _shift(pieces[KNIGHT], shift) & mask
+            mobility.append(_popcount(attacks & ~own))
+        score += MOBILITY_WEIGHT * (mobility[WHITE] - mobility[BLACK])
+
+        # Cấu trúc Tốt: Tốt chồng, Tốt cô lập, Tốt thông
+        white_pawns, black_pawns = sides[WHITE][1][PAWN], sides[BLACK][1][PAWN]
+        score += self._pawn_penalties(white_pawns) - self._pawn_penalties(black_pawns)
+        # Tốt trắng bị chặn nếu đứng ở hàng lớn hơn một Tốt đen trên cùng cột hoặc cột bên cạnh
+        black_span = _fill(black_pawns, 8)
+        white_span = _fill(white_pawns, -8)
+        white_passed = white_pawns & ~(black_span | ((black_span << np.uint64(1)) & t['not_a'])
+                                       | ((black_span >> np.uint64(1)) & t['not_h']))
+        black_passed = black_pawns & ~(white_span | ((white_span << np.uint64(1)) & t['not_a'])
+                                       | ((white_span >> np.uint64(1)) & t['not_h']))
+        for row, rank in enumerate(t['ranks']):
+            score += PASSED_PAWN_BONUS[row] * _popcount(white_passed & rank)
+            score -= PASSED_PAWN_BONUS[7 - row] * _popcount(black_passed & rank)
+
+        return score / 100
+
+    def _pawn_penalties(self, pawns):
+        """Điểm phạt Tốt chồng và Tốt cô lập của một bên (số âm, centipawn)."""
+        t = self._tables
+        south = _fill(pawns, 8)
+        files = pawns | south | _fill(pawns, -8)
+        neighbours = ((files << np.uint64(1)) & t['not_a']) | ((files >> np.uint64(1)) & t['not_h'])
+        doubled = _popcount(pawns & south)  # Tốt có Tốt cùng màu ở hàng nhỏ hơn trên cùng cột
+        isolated = _popcount(pawns & ~neighbours)
+        return -DOUBLED_PAWN_PENALTY * doubled - ISOLATED_PAWN_PENALTY * isolated
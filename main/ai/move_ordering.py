@@ -0,0 +1,91 @@
+"""
+Sắp xếp nước đi cho tìm kiếm Alpha-Beta: MVV-LVA cho nước bắt quân, hai nước sát thủ
+(killer moves) cho mỗi ply và bảng lịch sử (history) theo ô đi - ô đến, được "làm già"
+giữa các lần tìm kiếm.
+"""
+from core.move_encoding import NULL_MOVE, CAPTURE, EN_PASSANT, PROMOTION_BIT
+
+MAX_PLY = 128  # Số ply tối đa có bảng nước sát thủ
+HISTORY_LIMIT = 1 << 20  # Khi một ô lịch sử vượt ngưỡng này, cả bảng được chia đôi
+
+PROMOTION_VALUES = (3, 3, 5, 9)  # Giá trị quân phong cấp theo 2 bit thấp của cờ (Mã, Tượng, Xe, Hậu)
+
+
+def victim_value(board, code):
+    """
+    Giá trị quân bị bắt theo Piece.value (tính cả giá trị quân phong cấp).
+    """
+    flag = code >> 12
+    if flag == EN_PASSANT:
+        value = 1
+    else:
+        victim = board.cells[(code >> 6) & 63].piece
+        value = abs(victim.value) if victim is not None else 0
+    if flag & PROMOTION_BIT:
+        value += PROMOTION_VALUES[flag & 3]
+    return value
+
+
+def mvv_lva(board, code):
+    """
+    Điểm MVV-LVA (Most Valuable Victim - Least Valuable Attacker): ưu tiên bắt quân
+    giá trị cao nhất, với cùng nạn nhân thì ưu tiên quân tấn công giá trị thấp nhất.
+    """
+    attacker = board.cells[code & 63].piece
+    return victim_value(board, code) * 100 - min(abs(attacker.value), 99)
+
+
+class MoveOrdering:
+    def __init__(self, max_ply=MAX_PLY):
+        self.killers = [[NULL_MOVE, NULL_MOVE] for _ in range(max_ply)]  # Hai nước sát thủ cho mỗi ply
+        self.history = [0] * 8192  # Chỉ số: (màu << 12) | ô đi | ô đến << 6
+
+    def new_search(self):
+        """
+        Chuẩn bị cho lần tìm kiếm mới: xóa nước sát thủ (phụ thuộc vị trí) và
+        làm già bảng lịch sử để thông tin cũ dần mất trọng số.
+        """
+        for slots in self.killers:
+            slots[0] = slots[1] = NULL_MOVE
+        self.age_history()
+
+    def age_history(self):
+        """Chia đôi toàn bộ bảng lịch sử."""
+        self.history = [score >> 1 for score in self.history]
+
+    def add_killer(self, ply, code):
+        """Ghi nhận nước yên lặng gây cắt tỉa beta ở ply (giữ 2 nước gần nhất, không trùng)."""
+        slots = self.killers[ply]
+        if slots[0] != code:
+            slots[1] = slots[0]
+            slots[0] = code
+
+    def add_history(self, code, depth, color):
+        """Thưởng cho nước yên lặng gây cắt tỉa, tỉ lệ với depth^2 (cắt tỉa gần gốc đáng giá hơn)."""
+        index = (0 if color == 'white' else 4096) | (code & 0xFFF)
+        self.history[index] += depth * depth
+        if self.history[index] > HISTORY_LIMIT:
+            self.age_history()
+
+    def history_score(self, code, color):
+        return self.history[(0 if color == 'white' else 4096) | (code & 0xFFF)]
+
+    def score(self, board, code, color, ply, hash_move=NULL_MOVE):
+        """
+        Điểm sắp xếp của một nước đi (càng lớn càng được thử sớm): nước từ bảng băm,
+        rồi nước bắt quân theo MVV-LVA, rồi nước sát thủ, rồi nước yên lặng theo lịch sử.
+        """
+        if code == hash_move:
+            return 1 << 30
+        if code >> 12 >= CAPTURE:
+            return (1 << 24) + mvv_lva(board, code)
+        if code in self.killers[ply]:
+            return 1 << 22
+        return self.history_score(code, color)
+
+    def order_moves(self, board, codes, color, ply=0, hash_move=NULL_MOVE):
+        """
+        Sắp xếp toàn bộ danh sách nước đi (dùng khi không sinh nước theo giai đoạn).
+        :return: Danh sách mới đã sắp xếp.
+        """
+        return sorted(codes, key=lambda code: self.score(board, code, color, ply, hash_move), reverse=True)
@@ -0,0 +1,54 @@
+"""
+Bộ chọn nước đi theo giai đoạn, sinh nước đi một cách lười biếng cho tìm kiếm Alpha-Beta.
+
+Thứ tự các giai đoạn:
+    1. Nước đi từ bảng băm (nếu còn hợp lệ).
+    2. Nước bắt quân và phong cấp, sắp theo MVV-LVA.
+    3. Nước sát thủ (killer moves) còn hợp lệ và là nước yên lặng.
+    4. Các nước yên lặng còn lại, sắp theo bảng lịch sử.
+
+Mỗi giai đoạn chỉ được sinh khi bên gọi yêu cầu thêm nước đi, nên ở các nút bị cắt tỉa
+sớm phần lớn nước yên lặng không bao giờ được sinh ra.
+"""
+from core.game_rule import CAPTURES, QUIETS
+from core.move_encoding import NULL_MOVE, CAPTURE
+from .move_ordering import mvv_lva
+
+
+def staged_moves(game_logic, color, hash_move=NULL_MOVE, ordering=None, ply=0):
+    """
+    Sinh lần lượt các nước đi hợp lệ (mã số nguyên) của `color` theo từng giai đoạn.
+    :param hash_move: Nước đi tốt nhất lưu trong bảng băm cho vị trí này (NULL_MOVE nếu không có).
+    :param ordering: Đối tượng MoveOrdering cung cấp nước sát thủ và bảng lịch sử (có thể bỏ qua).
+    :param ply: Khoảng cách từ gốc, để tra nước sát thủ.
+    """
+    board = game_logic.board
+
+    # 1. Nước đi từ bảng băm
+    if hash_move != NULL_MOVE and game_logic.is_legal_move(hash_move, color):
+        yield hash_move
+    else:
+        hash_move = NULL_MOVE
+
+    # 2. Bắt quân / phong cấp theo MVV-LVA
+    captures = game_logic.generate_moves(color, CAPTURES)
+    captures.sort(key=lambda code: mvv_lva(board, code), reverse=True)
+    for code in captures:
+        if code != hash_move:
+            yield code
+
+    # 3. Nước sát thủ (chỉ nước yên lặng; nước bắt quân đã được thử ở giai đoạn 2)
+    tried_killers = []
+    for killer in (ordering.killers[ply] if ordering is not None else ()):
+        if (killer != NULL_MOVE and killer != hash_move and killer >> 12 < CAPTURE
+                and killer not in tried_killers and game_logic.is_legal_move(killer, color)):
+            tried_killers.append(killer)
+            yield killer
+
+    # 4. Các nước yên lặng còn lại
+    quiets = game_logic.generate_moves(color, QUIETS)
+    if ordering is not None:
+        quiets.sort(key=lambda code: ordering.history_score(code, color), reverse=True)
+    for code in quiets:
+        if code != hash_move and code not in tried_killers:
+            yield code
@@ -0,0 +1,130 @@
+"""
+Sách khai cuộc nhị phân mở bằng mmap.
+
+Tệp sách là dãy các mục 16 byte sắp xếp tăng dần theo khóa vị trí (big-endian):
+    - khóa Zobrist của vị trí (u64, board.zobrist_key),
+    - mã nước đi 16 bit (core.move_encoding),
+    - trọng số (u16, càng lớn càng hay được chọn),
+    - 4 byte dự trữ (bằng 0).
+Các nước của cùng một vị trí nằm liền nhau, nên tra cứu chỉ là tìm kiếm nhị phân cận dưới
+trên mmap rồi đọc tiếp các mục cùng khóa: mở sách gần như không tốn thời gian và hệ điều
+hành chỉ nạp các trang thực sự được đọc.
+
+Khóa Zobrist sinh từ hạt giống cố định (core.zobrist) nên sách dùng được giữa các lần chạy,
+nhưng phải dựng lại nếu cách tính khóa thay đổi. Dựng sách từ PGN bằng tools.build_book.
+"""
+import mmap
+import os
+import random
+import struct
+
+from const import OPENING_BOOK_PATH
+
+ENTRY = struct.Struct('>QHH4x')  # (khóa, mã nước đi, trọng số)
+MAX_WEIGHT = 0xFFFF
+
+
+def write_book(path, entries):
+    """
+    Ghi sách ra tệp.
+    :param entries: Từ điển {khóa vị trí: {mã nước đi: trọng số}}; trọng số được co lại
+                    về tối đa MAX_WEIGHT theo từng vị trí, nước có trọng số 0 bị bỏ.
+    :return: Số mục đã ghi.
+    """
+    count = 0
+    with open(path, 'wb') as file:
+        for key in sorted(entries):
+            moves = entries[key]
+            top = max(moves.values(), default=0)
+            scale = MAX_WEIGHT / top if top > MAX_WEIGHT else 1
+            for code, weight in sorted(moves.items(), key=lambda item: -item[1]):
+                weight = int(weight * scale)
+                if weight > 0:
+                    file.write(ENTRY.pack(key, code, weight))
+                    count += 1
+    return count
+
+
+def load_book(path=OPENING_BOOK_PATH):
+    """
+    Mở sách khai cuộc nếu tệp tồn tại.
+    :return: OpeningBook, hoặc None nếu không có tệp sách.
+    """
+    return OpeningBook(path) if os.path.exists(path) else None
+
+
+class OpeningBook:
+    """
+    Sách khai cuộc chỉ đọc trên một tệp mmap.
+    """
+    def __init__(self, path, rng=None):
+        """
+        :param path: Đường dẫn tệp sách (xem write_book).
+        :param rng: Bộ sinh số ngẫu nhiên để chọn nước theo trọng số (mặc định random.Random()).
+        """
+        self.path = path
+        self.rng = rng or random.Random()
+        self.probes = 0
+        self.hits = 0
+        with open(path, 'rb') as file:
+            size = file.seek(0, 2)
+            if size % ENTRY.size:
+                raise ValueError(f"Corrupt opening book {path!r}: size {size} is not a multiple of {ENTRY.size}.")
+            # mmap không ánh xạ được tệp rỗng
+            self._data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+        self.size = size // ENTRY.size  # Số mục
+
+    def _key_at(self, index):
+        return ENTRY.unpack_from(self._data, index * ENTRY.size)[0]
+
+    def moves(self, key):
+        """
+        Các nước trong sách của vị trí có khóa `key`.
+        :return: Danh sách (mã nước đi, trọng số), rỗng nếu vị trí không có trong sách.
+        """
+        low, high = 0, self.size
+        while low < high:
+            middle = (low + high) // 2
+            if self._key_at(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        result = []
+        for index in range(low, self.size):
+            entry_key, code, weight = ENTRY.unpack_from(self._data, index * ENTRY.size)
+            if entry_key != key:
+                break
+            result.append((code, weight))
+        return result
+
+    def choose(self, game_logic):
+        """
+        Chọn ngẫu nhiên theo trọng số một nước trong sách cho bên đang tới lượt (board.turn).
+        Các nước không hợp lệ trong vị trí hiện tại (va chạm khóa) bị bỏ qua.
+        :return: Mã nước đi, hoặc None nếu vị trí không có trong sách.
+        """
+        board = game_logic.board
+        self.probes += 1
+        candidates = [(code, weight) for code, weight in self.moves(board.zobrist_key)
+                      if game_logic.is_legal_move(code, board.turn)]
+        if not candidates:
+            return None
+        self.hits += 1
+        codes, weights = zip(*candidates)
+        return self.rng.choices(codes, weights)[0]
+
+    def close(self):
+        """Đóng ánh xạ bộ nhớ."""
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._data = b''
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,149 @@
+"""
+Đánh giá cấu trúc Tốt và bảng băm Tốt.
+
+Cấu trúc Tốt (Tốt chồng, Tốt cô lập, Tốt thông) chỉ phụ thuộc vị trí các quân Tốt, mà vị trí
+này lặp lại rất nhiều trong cây tìm kiếm. Bảng băm Tốt đánh chỉ số bằng board.pawn_key nên
+mỗi cấu trúc chỉ được tính một lần; mục lưu kèm mặt nạ bit các ô có Tốt của mỗi bên để tính
+nhanh lá chắn Tốt của Vua ở nút lá.
+"""
+from collections import OrderedDict
+
+from core.bitboard import WHITE, BLACK, PAWN
+
+DOUBLED_PAWN_PENALTY = 15  # Centipawn cho mỗi Tốt chồng
+ISOLATED_PAWN_PENALTY = 12  # Centipawn cho mỗi Tốt cô lập
+PASSED_PAWN_BONUS = (0, 90, 60, 35, 20, 10, 5, 0)  # Theo hàng (row) của Tốt trắng; Tốt đen dùng hàng 7 - row
+
+PAWN_SHIELD_BONUS = (15, 8)  # Centipawn cho mỗi Tốt che chắn ở hàng ngay trước Vua và hàng kế tiếp
+
+
+def _squares_mask(squares):
+    mask = 0
+    for row, col in squares:
+        if 0 <= row < 8 and 0 <= col < 8:
+            mask |= 1 << (row * 8 + col)
+    return mask
+
+
+def _build_masks():
+    # Ô mà Tốt đối phương đứng sẽ chặn Tốt ở sq (phía trước, cùng cột hoặc cột bên cạnh)
+    passed = {'white': [], 'black': []}
+    # Ô lá chắn trước Vua ở sq: (hàng ngay trước, hàng kế tiếp), ba cột quanh Vua
+    shield = {'white': [], 'black': []}
+    for sq in range(64):
+        row, col = divmod(sq, 8)
+        files = (col - 1, col, col + 1)
+        for color, forward in (('white', -1), ('black', 1)):
+            ahead = range(row + forward, -1 if forward < 0 else 8, forward)
+            passed[color].append(_squares_mask((r, c) for r in ahead for c in files))
+            shield[color].append(tuple(
+                _squares_mask((row + forward * distance, c) for c in files) for distance in (1, 2)
+            ))
+    return passed, shield
+
+
+PASSED_MASKS, SHIELD_MASKS = _build_masks()
+
+
+def pawn_masks(board):
+    """Mặt nạ bit (bit sq) các ô có Tốt của mỗi bên: {'white': ..., 'black': ...}."""
+    bitboards = board.bitboards
+    if bitboards is not None:
+        return {'white': bitboards.pieces[WHITE][PAWN], 'black': bitboards.pieces[BLACK][PAWN]}
+    masks = {'white': 0, 'black': 0}
+    cells = board.cells
+    for color in ('white', 'black'):
+        for sq in board.piece_squares[color]:
+            if cells[sq].piece.name == 'pawn':
+                masks[color] |= 1 << sq
+    return masks
+
+
+def _side_score(pawns, enemy_pawns, color):
+    """Điểm cấu trúc Tốt (centipawn) của một bên."""
+    files = [0] * 8
+    squares = [sq for sq in range(64) if pawns >> sq & 1]
+    for sq in squares:
+        files[sq & 7] += 1
+
+    score = -DOUBLED_PAWN_PENALTY * sum(count - 1 for count in files if count > 1)
+    for col, count in enumerate(files):
+        if count and (col == 0 or not files[col - 1]) and (col == 7 or not files[col + 1]):
+            score -= ISOLATED_PAWN_PENALTY * count
+    for sq in squares:
+        if not enemy_pawns & PASSED_MASKS[color][sq]:
+            score += PASSED_PAWN_BONUS[sq >> 3 if color == 'white' else 7 - (sq >> 3)]
+    return score
+
+
+def evaluate_pawns(board):
+    """
+    Tính cấu trúc Tốt từ đầu.
+    :return: Mục bảng băm (điểm centipawn dương có lợi cho Trắng, mặt nạ Tốt trắng, mặt nạ Tốt đen).
+    """
+    masks = pawn_masks(board)
+    white, black = masks['white'], masks['black']
+    return _side_score(white, black, 'white') - _side_score(black, white, 'black'), white, black
+
+
+def pawn_shield(pawns, color, king_sq):
+    """Điểm lá chắn Tốt (centipawn) của Vua màu `color` đứng ở king_sq, với mặt nạ Tốt `pawns` của bên đó."""
+    near, far = SHIELD_MASKS[color][king_sq]
+    return PAWN_SHIELD_BONUS[0] * bin(pawns & near).count('1') + PAWN_SHIELD_BONUS[1] * bin(pawns & far).count('1')
+
+
+class PawnHashTable:
+    """
+    Bảng băm cấu trúc Tốt có kích thước giới hạn, loại bỏ mục ít dùng gần đây nhất (LRU).
+    """
+    def __init__(self, capacity):
+        """
+        :param capacity: Số mục tối đa.
+        """
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Đặt lại bộ đếm thống kê."""
+        self.probes = 0
+        self.hits = 0
+        self.evictions = 0
+
+    def clear(self):
+        """Xóa toàn bộ bảng."""
+        self.entries.clear()
+        self.reset_stats()
+
+    def probe(self, board):
+        """
+        Lấy mục cấu trúc Tốt của vị trí, tính và lưu nếu chưa có.
+        :return: (điểm centipawn dương có lợi cho Trắng, mặt nạ Tốt trắng, mặt nạ Tốt đen).
+        """
+        self.probes += 1
+        key = board.pawn_key
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return entry
+
+        entry = evaluate_pawns(board)
+        self.entries[key] = entry
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+        return entry
+
+    def stats(self):
+        """
+        Thống kê từ lần đặt lại gần nhất.
+        :return: Từ điển gồm probes, hits, hit_rate, evictions, size.
+        """
+        return {
+            'probes': self.probes,
+            'hits': self.hits,
+            'hit_rate': self.hits / self.probes if self.probes else 0.0,
+            'evictions': self.evictions,
+            'size': len(self.entries),
+        }
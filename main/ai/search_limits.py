@@ -0,0 +1,56 @@
+"""
+Giới hạn thời gian và số nút cho một lần tìm kiếm (dùng với iterative deepening).
+"""
+import time
+
+CHECK_INTERVAL = 256  # Số nút giữa hai lần đọc đồng hồ
+
+
+class SearchAborted(Exception):
+    """Ném ra giữa chừng khi tìm kiếm vượt ngân sách thời gian hoặc số nút."""
+
+
+class SearchLimits:
+    def __init__(self, time_limit=None, node_limit=None, stop_event=None):
+        """
+        :param time_limit: Ngân sách thời gian (giây) cho cả lần tìm kiếm, None nếu không giới hạn.
+        :param node_limit: Ngân sách số nút, None nếu không giới hạn.
+        :param stop_event: Sự kiện (threading/multiprocessing.Event) để dừng tìm kiếm từ bên ngoài.
+        """
+        self.time_limit = time_limit
+        self.node_limit = node_limit
+        self.stop_event = stop_event
+        self.start = time.perf_counter()
+        self.deadline = self.start + time_limit if time_limit is not None else None
+        self.next_check = self._next_check(0)
+
+    def _next_check(self, nodes):
+        next_check = nodes + CHECK_INTERVAL
+        if self.node_limit is not None:
+            next_check = min(next_check, self.node_limit)
+        return next_check
+
+    def elapsed(self):
+        """Thời gian đã trôi qua (giây) kể từ khi bắt đầu tìm kiếm."""
+        return time.perf_counter() - self.start
+
+    def check(self, nodes):
+        """
+        Gọi khi số nút đạt next_check; ném SearchAborted nếu đã hết ngân sách.
+        """
+        if self.node_limit is not None and nodes >= self.node_limit:
+            raise SearchAborted()
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            raise SearchAborted()
+        if self.stop_event is not None and self.stop_event.is_set():
+            raise SearchAborted()
+        self.next_check = self._next_check(nodes)
+
+    def should_stop_deepening(self, nodes):
+        """
+        Quyết định có bắt đầu vòng lặp sâu hơn không: vòng tiếp theo thường tốn nhiều hơn
+        tất cả các vòng trước cộng lại, nên dừng khi đã dùng quá nửa ngân sách.
+        """
+        if self.node_limit is not None and nodes * 2 >= self.node_limit:
+            return True
+        return self.time_limit is not None and self.elapsed() * 2 >= self.time_limit
@@ -0,0 +1,114 @@
+"""
+Thống kê của một lần tìm kiếm: số nút, cắt tỉa beta, tỉ lệ trúng các bảng băm, hệ số
+phân nhánh và thời gian của từng vòng iterative deepening.
+
+Chiến lược đếm số nút ở mỗi nút (cần cho ngân sách tìm kiếm), số nút tĩnh ở mỗi nút tìm kiếm
+tĩnh và số cắt tỉa ở mỗi lần cắt tỉa; ảnh chụp chỉ được lấy một lần sau mỗi vòng và hàm gọi lại
+(on_iteration) chỉ được gọi khi có đặt. Chiến lược tạo với collect_stats=False bỏ qua các bộ
+đếm cắt tỉa/nút tĩnh, không tạo SearchStats và không gọi on_iteration (stats là None).
+"""
+import time
+
+
+class IterationStats:
+    """
+    Kết quả của một vòng iterative deepening đã hoàn thành.
+    """
+    __slots__ = ('depth', 'move', 'score', 'nodes', 'qnodes', 'seconds', 'elapsed', 'branching_factor')
+
+    def __init__(self, depth, move, score, nodes, qnodes, seconds, elapsed, branching_factor):
+        self.depth = depth  # Độ sâu của vòng
+        self.move = move  # Mã nước đi tốt nhất (hoặc None)
+        self.score = score  # Điểm theo góc nhìn bên đi
+        self.nodes = nodes  # Số nút của riêng vòng này
+        self.qnodes = qnodes  # Số nút tìm kiếm tĩnh của riêng vòng này
+        self.seconds = seconds  # Thời gian của riêng vòng này
+        self.elapsed = elapsed  # Thời gian từ đầu lần tìm kiếm đến hết vòng này
+        self.branching_factor = branching_factor  # nodes / nodes của vòng trước (None ở vòng đầu)
+
+    def nodes_per_second(self):
+        return self.nodes / self.seconds if self.seconds else 0.0
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        factor = f"{self.branching_factor:.2f}" if self.branching_factor is not None else "-"
+        return (f"IterationStats(depth={self.depth}, score={self.score:+.2f}, nodes={self.nodes}, "
+                f"time={self.seconds:.3f}s, ebf={factor})")
+
+
+class SearchStats:
+    """
+    Thống kê của lần tìm kiếm gần nhất của một chiến lược (AIStrategy.stats).
+    """
+    def __init__(self, on_iteration=None):
+        """
+        :param on_iteration: Hàm gọi với IterationStats sau mỗi vòng hoàn thành (giao diện, log), có thể bỏ qua.
+        """
+        self.on_iteration = on_iteration
+        self.start = time.perf_counter()
+        self.seconds = 0.0  # Tổng thời gian của lần tìm kiếm
+        self.nodes = 0
+        self.qnodes = 0
+        self.beta_cutoffs = 0
+        self.first_move_cutoffs = 0  # Số cắt tỉa xảy ra ngay ở nước đầu tiên được thử
+        self.table_hit_rates = {}  # Tên bảng ('tt', 'pawn_hash', 'tablebase') -> tỉ lệ trúng
+        self.iterations = []  # IterationStats của các vòng đã hoàn thành
+        self._nodes = self._qnodes = 0  # Số nút tích lũy khi vòng trước kết thúc
+        self._last = self.start
+
+    def record_iteration(self, depth, move, score, nodes, qnodes):
+        """
+        Ghi lại một vòng vừa hoàn thành và gọi on_iteration.
+        :param nodes: Tổng số nút tích lũy từ đầu lần tìm kiếm (tương tự với qnodes).
+        """
+        now = time.perf_counter()
+        previous = self.iterations[-1].nodes if self.iterations else 0
+        count = nodes - self._nodes
+        iteration = IterationStats(depth, move, score, count, qnodes - self._qnodes, now - self._last,
+                                   now - self.start, count / previous if previous else None)
+        self.iterations.append(iteration)
+        self._nodes, self._qnodes, self._last = nodes, qnodes, now
+        if self.on_iteration is not None:
+            self.on_iteration(iteration)
+        return iteration
+
+    def finish(self, strategy):
+        """Lấy các bộ đếm tổng từ chiến lược khi lần tìm kiếm kết thúc."""
+        self.seconds = time.perf_counter() - self.start
+        self.nodes = strategy.nodes
+        self.qnodes = strategy.qnodes
+        self.beta_cutoffs = strategy.beta_cutoffs
+        self.first_move_cutoffs = strategy.first_move_cutoffs
+        self.table_hit_rates = strategy.table_hit_rates()
+
+    def first_move_cutoff_rate(self):
+        """Tỉ lệ cắt tỉa xảy ra ở nước đầu tiên (gần 1 nghĩa là sắp xếp nước đi tốt)."""
+        return self.first_move_cutoffs / self.beta_cutoffs if self.beta_cutoffs else 0.0
+
+    def branching_factor(self):
+        """Hệ số phân nhánh hiệu dụng: tỉ lệ số nút của hai vòng hoàn thành cuối cùng (None nếu chưa đủ)."""
+        return self.iterations[-1].branching_factor if self.iterations else None
+
+    def nodes_per_second(self):
+        return self.nodes / self.seconds if self.seconds else 0.0
+
+    def as_dict(self):
+        return {
+            'nodes': self.nodes,
+            'qnodes': self.qnodes,
+            'seconds': self.seconds,
+            'nodes_per_second': self.nodes_per_second(),
+            'beta_cutoffs': self.beta_cutoffs,
+            'first_move_cutoffs': self.first_move_cutoffs,
+            'first_move_cutoff_rate': self.first_move_cutoff_rate(),
+            'branching_factor': self.branching_factor(),
+            'table_hit_rates': dict(self.table_hit_rates),
+            'iterations': [iteration.as_dict() for iteration in self.iterations],
+        }
+
+    def __repr__(self):
+        return (f"SearchStats(nodes={self.nodes}, qnodes={self.qnodes}, cutoffs={self.beta_cutoffs}, "
+                f"first_move={self.first_move_cutoff_rate():.1%}, depth={len(self.iterations)}, "
+                f"time={self.seconds:.3f}s)")
@@ -0,0 +1,167 @@
+"""
+Bảng tàn cuộc (tablebase) cho các thế cờ ít quân, dựng sẵn bằng ai.tablebase_gen.
+
+Mỗi tổ hợp quân (chữ ký, ví dụ 'KQvK', 'KRvKN') là một tệp f'{chữ ký}.tbl' gồm 2 * 64^n byte,
+một byte cho mỗi (bên đi, ô của từng quân):
+    - 0: hòa,
+    - 255: vị trí không hợp lệ,
+    - n + 1: chiếu hết sau n ply với nước đi tốt nhất của cả hai bên (n lẻ: bên đi thắng,
+      n chẵn: bên đi thua; n = 0 là đã bị chiếu hết).
+Tệp được mở bằng mmap khi cần lần đầu nên tra cứu là O(1) và gần như không tốn bộ nhớ.
+
+Trong chữ ký, bên mạnh hơn đứng trước và đóng vai Trắng; vị trí mà Đen là bên mạnh được lật
+(đổi màu, lật hàng sq ^ 56) trước khi tra. Quân trong mỗi bên xếp theo thứ tự 'KQRBNP'.
+Chỉ số = bên đi (0: bên đứng trước) * 64^n + các ô quân ghép theo cơ số 64.
+
+Bảng không chứa quyền nhập thành và bắt tốt qua đường: probe trả về None cho vị trí còn
+quyền nhập thành, hoặc có ô bắt tốt qua đường khi bên đi còn Tốt.
+"""
+import mmap
+import os
+
+from const import TABLEBASE_DIR
+
+LETTERS = {'king': 'K', 'queen': 'Q', 'rook': 'R', 'bishop': 'B', 'knight': 'N', 'pawn': 'P'}
+NAMES = {letter: name for name, letter in LETTERS.items()}
+ORDER = 'KQRBNP'
+
+DRAW = 0
+ILLEGAL = 255
+MAX_PIECES = 4
+
+
+def side_letters(names):
+    """Chuỗi chữ cái quân của một bên theo thứ tự ORDER, ví dụ ['rook', 'king'] -> 'KR'."""
+    return ''.join(sorted((LETTERS[name] for name in names), key=ORDER.index))
+
+
+def _strength(letters):
+    return len(letters), tuple(-ORDER.index(letter) for letter in letters)
+
+
+def table_size(signature):
+    """Số byte của bảng ứng với chữ ký."""
+    return 2 * 64 ** (len(signature) - 1)
+
+
+def position_index(pieces, turn):
+    """
+    Chữ ký và chỉ số trong bảng của một vị trí.
+    :param pieces: Danh sách (màu, tên quân, ô).
+    :param turn: Bên đi nước tiếp theo ('white' hoặc 'black').
+    :return: (chữ ký, chỉ số).
+    """
+    sides = {'white': [], 'black': []}
+    for color, name, sq in pieces:
+        sides[color].append((ORDER.index(LETTERS[name]), sq))
+    white = side_letters(name for color, name, _ in pieces if color == 'white')
+    black = side_letters(name for color, name, _ in pieces if color == 'black')
+
+    if _strength(black) > _strength(white):
+        first, second, flip = sides['black'], sides['white'], 56
+        white, black = black, white
+        stm = 0 if turn == 'black' else 1
+    else:
+        first, second, flip = sides['white'], sides['black'], 0
+        stm = 0 if turn == 'white' else 1
+
+    index = stm
+    for _, sq in sorted(first) + sorted(second):
+        index = index * 64 + (sq ^ flip)
+    return f'{white}v{black}', index
+
+
+def decode_value(value):
+    """
+    Giải mã một byte của bảng.
+    :return: ('win' | 'loss' | 'draw', số ply đến chiếu hết), hoặc None nếu vị trí không hợp lệ.
+    """
+    if value == ILLEGAL:
+        return None
+    if value == DRAW:
+        return 'draw', 0
+    plies = value - 1
+    return ('win' if plies % 2 else 'loss'), plies
+
+
+class Tablebases:
+    """
+    Tập các bảng tàn cuộc trong một thư mục, mở bằng mmap khi cần lần đầu.
+    """
+    def __init__(self, directory=TABLEBASE_DIR, max_pieces=MAX_PIECES):
+        """
+        :param directory: Thư mục chứa các tệp .tbl.
+        :param max_pieces: Số quân tối đa (kể cả Vua) của vị trí được tra.
+        """
+        self.directory = directory
+        self.max_pieces = max_pieces
+        self._tables = {}  # Chữ ký -> mmap, hoặc None nếu không có tệp
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Đặt lại bộ đếm lượt tra."""
+        self.probes = 0  # Số lần tra vị trí đủ ít quân
+        self.hits = 0
+
+    def hit_rate(self):
+        return self.hits / self.probes if self.probes else 0.0
+
+    def _table(self, signature):
+        if signature not in self._tables:
+            path = os.path.join(self.directory, f'{signature}.tbl')
+            table = None
+            if os.path.exists(path):
+                with open(path, 'rb') as file:
+                    table = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+                if len(table) != table_size(signature):
+                    table.close()
+                    raise ValueError(f"Corrupt tablebase {path!r}: expected {table_size(signature)} bytes.")
+            self._tables[signature] = table
+        return self._tables[signature]
+
+    def available(self):
+        """Chữ ký của các bảng có trong thư mục."""
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(name[:-4] for name in os.listdir(self.directory) if name.endswith('.tbl'))
+
+    def probe(self, board):
+        """
+        Tra vị trí hiện tại của bàn cờ.
+        :return: ('win' | 'loss' | 'draw', số ply đến chiếu hết) theo góc nhìn bên đi (board.turn),
+                 hoặc None nếu vị trí nằm ngoài các bảng.
+        """
+        squares = board.piece_squares
+        if len(squares['white']) + len(squares['black']) > self.max_pieces:
+            return None
+        if board.castling:
+            return None
+        self.probes += 1
+        cells = board.cells
+        pieces = [(color, cells[sq].piece.name, sq) for color in ('white', 'black') for sq in squares[color]]
+        if board.en_passant is not None and any(color == board.turn and name == 'pawn' for color, name, _ in pieces):
+            return None  # Bên đi có thể bắt tốt qua đường
+        signature, index = position_index(pieces, board.turn)
+        if signature == 'KvK':
+            self.hits += 1
+            return 'draw', 0
+        table = self._table(signature)
+        if table is None:
+            return None
+        result = decode_value(table[index])
+        if result is not None:
+            self.hits += 1
+        return result
+
+    def close(self):
+        """Đóng mọi ánh xạ bộ nhớ."""
+        for table in self._tables.values():
+            if table is not None:
+                table.close()
+        self._tables.clear()
+
+    def __getstate__(self):
+        # mmap không pickle được: tiến trình khác tự mở lại khi cần
+        state = self.__dict__.copy()
+        state['_tables'] = {}
+        return state
@@ -0,0 +1,360 @@
+"""
+Dựng bảng tàn cuộc (ai.tablebase) bằng phân tích ngược (retrograde analysis).
+
+    1. Duyệt mọi chỉ số của bảng: bỏ vị trí không hợp lệ, đếm nước đi trong bảng (không bắt
+       quân, không phong cấp) của mỗi vị trí, tra ngay kết quả các nước đổi tổ hợp quân (bắt
+       quân, phong cấp) trong các bảng con đã dựng. Vị trí hết nước là chiếu hết (0 ply) hoặc hòa.
+    2. Xử lý các vị trí đã biết theo khoảng cách tăng dần. Mọi vị trí có nước đi tới một vị trí
+       thua sau d ply là thắng sau d + 1 ply; vị trí mà mọi nước đều tới vị trí đối phương thắng
+       (bộ đếm về 0, không có lối thoát hòa/thắng qua bảng con) là thua sau d + 1 ply. Các vị trí
+       trước đó được sinh bằng "nước đi ngược" nên mỗi vị trí chỉ được xử lý một lần.
+    3. Vị trí chưa có kết quả là hòa.
+
+Luật di chuyển lấy từ core.attack_tables (cùng bảng tấn công với bộ sinh nước đi của GameRule).
+Không mô hình hóa nhập thành và bắt tốt qua đường, nên không dựng bảng có Tốt của cả hai bên.
+"""
+import os
+from array import array
+
+from core.attack_tables import (
+    KNIGHT_TARGETS, KING_TARGETS, PAWN_ATTACKS, RAYS, STRAIGHT, DIAGONAL, ALL_DIRECTIONS,
+    KNIGHT_MASKS, KING_MASKS,
+)
+from .tablebase import NAMES, DRAW, ILLEGAL, position_index, table_size
+
+UNKNOWN = 254  # Chưa có kết quả (chỉ dùng khi dựng)
+MAX_PLIES = UNKNOWN - 2
+DONE = 255  # Đánh dấu trong bộ đếm nước: vị trí đã được xử lý ngược
+_DECISIVE = bytes(0 if value == ILLEGAL else value for value in range(256))
+_FINAL = bytes(DRAW if value == UNKNOWN else value for value in range(256))  # Vị trí chưa có kết quả là hòa
+
+PROMOTIONS = ('queen', 'rook', 'bishop', 'knight')
+SLIDER_DIRECTIONS = {'rook': STRAIGHT, 'bishop': DIAGONAL, 'queen': ALL_DIRECTIONS}
+SIDE_COLORS = ('white', 'black')  # Bên đứng trước trong chữ ký đóng vai Trắng
+
+# Các ô nằm giữa hai ô thẳng hàng (mặt nạ bit), theo loại đường: 'rook' (thẳng) hoặc 'bishop' (chéo)
+BETWEEN = {'rook': {}, 'bishop': {}}
+for _name, _directions in (('rook', STRAIGHT), ('bishop', DIAGONAL)):
+    for _sq in range(64):
+        for _direction in _directions:
+            _mask = 0
+            for _target in RAYS[_direction][_sq]:
+                BETWEEN[_name][_sq, _target] = _mask
+                _mask |= 1 << _target
+
+
+def dependencies(signature):
+    """Chữ ký của các bảng con mà nước bắt quân hoặc phong cấp từ bảng này có thể dẫn tới."""
+    first, second = signature.split('v')
+    pieces = [('white', NAMES[letter], 0) for letter in first] + [('black', NAMES[letter], 0) for letter in second]
+    result = set()
+    for i, (color, name, _) in enumerate(pieces):
+        if name == 'king':
+            continue
+        variants = [pieces[:i] + pieces[i + 1:]]  # Quân i bị bắt
+        if name == 'pawn':
+            for promotion in PROMOTIONS:
+                promoted = pieces[:i] + [(color, promotion, 0)] + pieces[i + 1:]
+                variants.append(promoted)
+                # Phong cấp kèm bắt một quân đối phương
+                variants.extend(promoted[:j] + promoted[j + 1:] for j, (owner, other, _) in enumerate(promoted)
+                                if owner != color and other != 'king')
+        result.update(position_index(variant, 'white')[0] for variant in variants)
+    result.discard('KvK')
+    return sorted(result)
+
+
+class TablebaseBuilder:
+    """
+    Dựng bảng của một chữ ký khi đã có các bảng con.
+    """
+    def __init__(self, signature, subtables):
+        """
+        :param signature: Chữ ký, ví dụ 'KQvKR'.
+        :param subtables: Từ điển {chữ ký: bytes/mmap} của các bảng con (xem dependencies).
+        """
+        first, second = signature.split('v')
+        if 'P' in first and 'P' in second:
+            raise ValueError(f"{signature}: pawns on both sides need en passant, which tablebases do not model.")
+        self.signature = signature
+        self.subtables = subtables
+        self.pieces = [(0, NAMES[letter]) for letter in first] + [(1, NAMES[letter]) for letter in second]
+        self.count = len(self.pieces)
+        self.size = table_size(signature)
+        self.kings = (0, len(first))  # Chỉ số quân Vua của mỗi bên
+
+    def decode(self, index):
+        """:return: (bên đi, danh sách ô của từng quân)."""
+        squares = [0] * self.count
+        for i in range(self.count - 1, -1, -1):
+            squares[i] = index & 63
+            index >>= 6
+        return index, squares
+
+    def encode(self, stm, squares):
+        index = stm
+        for sq in squares:
+            index = index * 64 + sq
+        return index
+
+    def attacked(self, target, side, squares, occupied, skip=-1):
+        """Ô target có bị quân của bên `side` tấn công không (bỏ qua quân thứ `skip`, ví dụ quân vừa bị bắt)."""
+        for i, (owner, name) in enumerate(self.pieces):
+            if owner != side or i == skip:
+                continue
+            sq = squares[i]
+            if name == 'king':
+                if KING_MASKS[sq] >> target & 1:
+                    return True
+            elif name == 'knight':
+                if KNIGHT_MASKS[sq] >> target & 1:
+                    return True
+            elif name == 'pawn':
+                if target in PAWN_ATTACKS[side][sq]:
+                    return True
+            else:
+                for line in ('rook', 'bishop'):
+                    if name in (line, 'queen'):
+                        between = BETWEEN[line].get((sq, target))
+                        if between is not None and not between & occupied:
+                            return True
+        return False
+
+    def is_legal(self, stm, squares):
+        """Vị trí hợp lệ: các ô khác nhau, Tốt không ở hàng đầu/cuối, bên không đi không bị chiếu."""
+        if len(set(squares)) != self.count:
+            return False
+        for (owner, name), sq in zip(self.pieces, squares):
+            if name == 'pawn' and sq >> 3 in (0, 7):
+                return False
+        occupied = 0
+        for sq in squares:
+            occupied |= 1 << sq
+        return not self.attacked(squares[self.kings[1 - stm]], stm, squares, occupied)
+
+    def _targets(self, i, sq, occupied):
+        """Các ô mà quân thứ i ở sq đi tới được (không kể Tốt), dừng ở quân chắn đầu tiên (gồm ô đó)."""
+        name = self.pieces[i][1]
+        if name == 'king':
+            return KING_TARGETS[sq]
+        if name == 'knight':
+            return KNIGHT_TARGETS[sq]
+        targets = []
+        for direction in SLIDER_DIRECTIONS[name]:
+            for target in RAYS[direction][sq]:
+                targets.append(target)
+                if occupied >> target & 1:
+                    break
+        return targets
+
+    def _lookup(self, stm, squares, captured, promoted_piece=None, promoted=None):
+        """Giá trị (byte, góc nhìn bên đi của vị trí con) của một vị trí thuộc bảng con."""
+        pieces = []
+        for i, ((owner, name), sq) in enumerate(zip(self.pieces, squares)):
+            if i == captured:
+                continue
+            pieces.append((SIDE_COLORS[owner], promoted if i == promoted_piece else name, sq))
+        signature, index = position_index(pieces, SIDE_COLORS[stm])
+        if signature == 'KvK':
+            return DRAW
+        return self.subtables[signature][index]
+
+    def children(self, stm, squares):
+        """
+        Các nước đi hợp lệ của bên `stm`.
+        :return: (danh sách chỉ số vị trí con trong bảng, danh sách byte giá trị của vị trí con ở bảng con).
+        """
+        occupied = 0
+        owner_at = {}
+        for i, sq in enumerate(squares):
+            occupied |= 1 << sq
+            owner_at[sq] = i
+        enemy = 1 - stm
+        king = self.kings[stm]
+        inside, outside = [], []
+
+        for i, (owner, name) in enumerate(self.pieces):
+            if owner != stm:
+                continue
+            sq = squares[i]
+            if name == 'pawn':
+                step = -8 if stm == 0 else 8
+                moves = []
+                ahead = sq + step
+                if not occupied >> ahead & 1:
+                    moves.append((ahead, -1))
+                    start_row = 6 if stm == 0 else 1
+                    if sq >> 3 == start_row and not occupied >> (ahead + step) & 1:
+                        moves.append((ahead + step, -1))
+                for target in PAWN_ATTACKS[stm][sq]:
+                    j = owner_at.get(target)
+                    if j is not None and self.pieces[j][0] == enemy:
+                        moves.append((target, j))
+            else:
+                moves = []
+                for target in self._targets(i, sq, occupied):
+                    j = owner_at.get(target)
+                    if j is None:
+                        moves.append((target, -1))
+                    elif self.pieces[j][0] == enemy:
+                        moves.append((target, j))
+
+            for target, captured in moves:
+                new = list(squares)
+                new[i] = target
+                new_occupied = (occupied & ~(1 << sq)) | (1 << target)
+                if self.attacked(new[king], enemy, new, new_occupied, captured):
+                    continue
+                if name == 'pawn' and target >> 3 in (0, 7):
+                    for promotion in PROMOTIONS:
+                        outside.append(self._lookup(enemy, new, captured, i, promotion))
+                elif captured >= 0:
+                    outside.append(self._lookup(enemy, new, captured))
+                else:
+                    inside.append(self.encode(enemy, new))
+        return inside, outside
+
+    def parents(self, stm, squares):
+        """Chỉ số các vị trí (bên đi 1 - stm) có một nước đi trong bảng dẫn tới vị trí này."""
+        occupied = 0
+        for sq in squares:
+            occupied |= 1 << sq
+        mover = 1 - stm
+        result = []
+        for i, (owner, name) in enumerate(self.pieces):
+            if owner != mover:
+                continue
+            sq = squares[i]
+            if name == 'pawn':
+                back = 8 if mover == 0 else -8
+                origins = []
+                origin = sq + back
+                if not occupied >> origin & 1 and origin >> 3 not in (0, 7):
+                    origins.append(origin)
+                    double_row = 4 if mover == 0 else 3
+                    if sq >> 3 == double_row and not occupied >> (origin + back) & 1:
+                        origins.append(origin + back)
+            else:
+                origins = [target for target in self._targets(i, sq, occupied) if not occupied >> target & 1]
+            for origin in origins:
+                new = list(squares)
+                new[i] = origin
+                result.append(self.encode(mover, new))
+        return result
+
+    def build(self, progress=None):
+        """
+        :param progress: Hàm gọi với (giai đoạn, số đã xử lý) để báo tiến độ, có thể bỏ qua.
+        :return: bytearray của bảng.
+        """
+        values = bytearray([ILLEGAL]) * self.size
+        remaining = bytearray(self.size)  # Số nước trong bảng chưa biết kết quả (DONE: đã xử lý ngược)
+        escape = bytearray(self.size)  # 1 nếu có nước sang bảng con giữ hòa hoặc thắng
+        conversion_loss = bytearray(self.size)  # Khoảng cách thua xa nhất qua bảng con (+1), 0 nếu không có
+        buckets = {}  # Khoảng cách -> array chỉ số vị trí cần xử lý ngược
+
+        def push(distance, index):
+            if distance > MAX_PLIES:
+                raise OverflowError(f"{self.signature}: mate distance {distance} does not fit in a byte.")
+            buckets.setdefault(distance, array('L')).append(index)
+
+        for index in range(self.size):
+            if progress is not None and index & 0xFFFF == 0:
+                progress('scan', index)
+            stm, squares = self.decode(index)
+            if not self.is_legal(stm, squares):
+                continue
+            inside, outside = self.children(stm, squares)
+            best_win = worst_loss = None
+            draw = False
+            for value in outside:
+                if value == DRAW:
+                    draw = True
+                elif (value - 1) % 2 == 0:  # Bên đi ở vị trí con thua: thắng
+                    best_win = value if best_win is None else min(best_win, value)
+                else:
+                    worst_loss = value if worst_loss is None else max(worst_loss, value)
+
+            values[index] = UNKNOWN
+            remaining[index] = len(inside)
+            if best_win is not None:
+                escape[index] = 1
+                push(best_win, index)  # Thắng sau best_win ply, trừ khi tìm được đường ngắn hơn trong bảng
+            elif draw:
+                escape[index] = 1
+                if not inside:
+                    values[index] = DRAW
+            elif worst_loss is not None:
+                conversion_loss[index] = worst_loss
+                if not inside:
+                    values[index] = worst_loss + 1
+                    push(worst_loss, index)
+            elif not inside:
+                king = squares[self.kings[stm]]
+                occupied = sum(1 << sq for sq in squares)
+                if self.attacked(king, 1 - stm, squares, occupied):
+                    values[index] = 1  # Bị chiếu hết
+                    push(0, index)
+                else:
+                    values[index] = DRAW  # Hết nước
+
+        distance = 0
+        processed = 0
+        while buckets:
+            for index in buckets.pop(distance, ()):
+                if remaining[index] == DONE:
+                    continue
+                if values[index] == UNKNOWN:
+                    values[index] = distance + 1  # Thắng qua bảng con
+                elif values[index] != distance + 1:
+                    continue
+                remaining[index] = DONE
+                processed += 1
+                if progress is not None and processed & 0xFFFF == 0:
+                    progress('retro', processed)
+
+                stm, squares = self.decode(index)
+                for parent in self.parents(stm, squares):
+                    if values[parent] != UNKNOWN:
+                        continue
+                    if distance % 2 == 0:
+                        # Vị trí con thua: vị trí cha thắng với khoảng cách ngắn nhất
+                        values[parent] = distance + 2
+                        push(distance + 1, parent)
+                    else:
+                        remaining[parent] -= 1
+                        if remaining[parent] == 0 and not escape[parent]:
+                            loss = max(distance + 1, conversion_loss[parent])
+                            values[parent] = loss + 1
+                            push(loss, parent)
+            distance += 1
+
+        return values.translate(_FINAL)
+
+
+def generate(signature, directory, progress=None, log=print):
+    """
+    Dựng bảng `signature` (và các bảng con còn thiếu) rồi ghi vào thư mục.
+    :param progress: Hàm báo tiến độ (xem TablebaseBuilder.build).
+    :param log: Hàm in thông báo khi dựng xong mỗi bảng.
+    :return: Đường dẫn tệp bảng.
+    """
+    path = os.path.join(directory, f'{signature}.tbl')
+    if os.path.exists(path):
+        return path
+    subtables = {}
+    for dependency in dependencies(signature):
+        with open(generate(dependency, directory, progress, log), 'rb') as file:
+            subtables[dependency] = file.read()
+
+    table = TablebaseBuilder(signature, subtables).build(progress)
+    os.makedirs(directory, exist_ok=True)
+    with open(path + '.tmp', 'wb') as file:
+        file.write(table)
+    os.replace(path + '.tmp', path)
+    legal = len(table) - table.count(ILLEGAL)
+    draws = table.count(DRAW)
+    longest = max(table.translate(_DECISIVE)) - 1
+    log(f"{signature}: {legal:,} legal positions, {legal - draws:,} decisive"
+        + (f", longest mate {longest} plies" if longest > 0 else "") + f" -> {path}")
+    return path
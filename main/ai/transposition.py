@@ -0,0 +1,147 @@
+"""
+Bảng chuyển vị (transposition table) kích thước cố định, đánh chỉ số bằng khóa Zobrist.
+
+Mỗi mục gồm 3 từ 64 bit trong một vùng nhớ liền:
+    - khóa kiểm tra = khóa Zobrist ^ từ dữ liệu ^ bit của điểm,
+    - từ dữ liệu: nước đi tốt nhất (16 bit), độ sâu (8 bit), loại cận (8 bit), thế hệ (8 bit),
+    - điểm (số thực 64 bit).
+Khóa được XOR với dữ liệu nên một mục bị ghi dở (khi nhiều tiến trình dùng chung bảng
+qua multiprocessing.shared_memory) sẽ không khớp khóa và bị bỏ qua thay vì trả về dữ liệu sai.
+
+Bảng chia thành các nhóm 2 ô:
+    - ô 0 ưu tiên độ sâu: chỉ bị ghi đè bởi kết quả sâu hơn hoặc bằng, hoặc khi mục cũ
+      thuộc lần tìm kiếm trước;
+    - ô 1 luôn bị ghi đè.
+"""
+from core.move_encoding import NULL_MOVE
+
+EMPTY, EXACT, LOWER, UPPER = 0, 1, 2, 3  # Loại cận của điểm
+
+ENTRY_BYTES = 24  # Khóa kiểm tra, từ dữ liệu, điểm
+
+MATE_THRESHOLD = 9000  # Điểm có trị tuyệt đối lớn hơn ngưỡng này là điểm chiếu hết
+
+
+def score_to_tt(score, ply):
+    """Đổi điểm chiếu hết từ "tính từ gốc" sang "tính từ nút hiện tại" trước khi lưu."""
+    if score > MATE_THRESHOLD:
+        return score + ply
+    if score < -MATE_THRESHOLD:
+        return score - ply
+    return score
+
+
+def score_from_tt(score, ply):
+    """Đổi điểm chiếu hết đọc từ bảng về "tính từ gốc" theo ply hiện tại."""
+    if score > MATE_THRESHOLD:
+        return score - ply
+    if score < -MATE_THRESHOLD:
+        return score + ply
+    return score
+
+
+def table_bytes(size_mb):
+    """Số byte thực sự dùng cho ngân sách `size_mb` (số mục làm tròn xuống lũy thừa của 2)."""
+    entries = max(2, int(size_mb * 1024 * 1024) // ENTRY_BYTES)
+    return (1 << (entries.bit_length() - 1)) * ENTRY_BYTES
+
+
+class TranspositionTable:
+    def __init__(self, size_mb=16, buffer=None):
+        """
+        :param size_mb: Ngân sách bộ nhớ (MB); số mục được làm tròn xuống lũy thừa của 2.
+        :param buffer: Vùng nhớ có sẵn (ví dụ SharedMemory.buf) dài ít nhất table_bytes(size_mb)
+                       để nhiều tiến trình dùng chung bảng; None để tự cấp phát.
+        """
+        nbytes = table_bytes(size_mb)
+        entries = nbytes // ENTRY_BYTES
+        self.size = entries
+        self.mask = (entries >> 1) - 1  # Mặt nạ chỉ số nhóm
+
+        self._buffer = memoryview(buffer if buffer is not None else bytearray(nbytes))[:nbytes]
+        words = self._buffer.cast('Q')
+        self.keys = words[:entries]
+        self.data = words[entries:2 * entries]
+        self.score_bits = words[2 * entries:]
+        self.scores = self._buffer[16 * entries:].cast('d')  # Cùng vùng nhớ với score_bits
+        self.generation = 0
+
+        self.reset_stats()
+
+    def release(self):
+        """Giải phóng các view trên vùng nhớ (bắt buộc trước khi đóng SharedMemory)."""
+        for view in (self.keys, self.data, self.score_bits, self.scores, self._buffer):
+            view.release()
+
+    def reset_stats(self):
+        """Đặt lại bộ đếm thống kê (gọi ở đầu mỗi lần tìm kiếm)."""
+        self.probes = 0
+        self.hits = 0
+        self.cutoffs = 0
+        self.stores = 0
+
+    def new_search(self):
+        """Bắt đầu lần tìm kiếm mới: tăng thế hệ để mục cũ dễ bị thay thế, đặt lại thống kê."""
+        self.generation = (self.generation + 1) & 0xFF
+        self.reset_stats()
+
+    def clear(self):
+        """Xóa toàn bộ bảng."""
+        self._buffer[:] = bytes(len(self._buffer))
+        self.reset_stats()
+
+    def _stored_key(self, index):
+        return self.keys[index] ^ self.data[index] ^ self.score_bits[index]
+
+    def probe(self, key):
+        """
+        Tra cứu vị trí theo khóa Zobrist.
+        :return: (độ sâu, điểm, loại cận, nước đi tốt nhất) hoặc None nếu không có.
+        """
+        self.probes += 1
+        index = (key & self.mask) << 1
+        for slot in (index, index + 1):
+            data = self.data[slot]
+            if (data >> 24) & 0xFF != EMPTY and self.keys[slot] ^ data ^ self.score_bits[slot] == key:
+                self.hits += 1
+                return ((data >> 16) & 0xFF) - 128, self.scores[slot], (data >> 24) & 0xFF, data & 0xFFFF
+        return None
+
+    def store(self, key, depth, score, bound, move=NULL_MOVE):
+        """
+        Lưu kết quả tìm kiếm của một vị trí theo cơ chế ưu tiên độ sâu / luôn thay thế.
+        """
+        self.stores += 1
+        index = (key & self.mask) << 1
+        data = self.data[index]
+        if self._stored_key(index + 1) == key:
+            index += 1  # Cập nhật mục đã có ở ô luôn thay thế
+        elif not (self._stored_key(index) == key or (data >> 24) & 0xFF == EMPTY
+                  or depth >= ((data >> 16) & 0xFF) - 128 or data >> 32 != self.generation):
+            index += 1  # Ô ưu tiên độ sâu đang giữ kết quả sâu hơn của lần tìm kiếm này
+
+        if move == NULL_MOVE and self._stored_key(index) == key:
+            move = self.data[index] & 0xFFFF  # Giữ nước đi tốt nhất cũ nếu lần này không có
+        data = move | (max(-128, min(depth, 127)) + 128) << 16 | bound << 24 | self.generation << 32
+        self.scores[index] = score
+        self.data[index] = data
+        self.keys[index] = key ^ data ^ self.score_bits[index]
+
+    def hashfull(self, sample=1000):
+        """Tỉ lệ phần nghìn số ô đã dùng (ước lượng trên `sample` ô đầu tiên)."""
+        sample = min(sample, self.size)
+        return sum(1 for index in range(sample) if (self.data[index] >> 24) & 0xFF != EMPTY) * 1000 // sample
+
+    def stats(self):
+        """
+        Thống kê của lần tìm kiếm hiện tại.
+        :return: Từ điển gồm probes, hits, cutoffs, stores, hit_rate, cutoff_rate.
+        """
+        return {
+            'probes': self.probes,
+            'hits': self.hits,
+            'cutoffs': self.cutoffs,
+            'stores': self.stores,
+            'hit_rate': self.hits / self.probes if self.probes else 0.0,
+            'cutoff_rate': self.cutoffs / self.probes if self.probes else 0.0,
+        }
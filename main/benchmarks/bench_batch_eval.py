@@ -0,0 +1,117 @@
+"""
+So sánh thông lượng đánh giá theo lô bằng NumPy (ai.batch_eval.BatchEvaluator) với
+Evaluator.evaluate gọi cho từng lá:
+    - trên các vị trí lá của cây perft độ sâu cố định (đánh giá thuần túy),
+    - trong tìm kiếm Negamax không có tìm kiếm tĩnh (nút con của nút biên được sắp xếp theo
+      điểm tính theo lô, giá trị các lá vẫn do Evaluator tính).
+
+Cần NumPy. Chạy từ thư mục main:
+    python -m benchmarks.bench_batch_eval [--depth 2] [--search-depth 3] [--position kiwipete]
+"""
+import argparse
+import sys
+import time
+
+from ai.batch_eval import BatchEvaluator
+from chessBot import Evaluator, NegamaxAlphaBetaStrategy
+from core.board import Board
+from core.game_rule import GameRule
+from core.move import Move
+from core.perft import POSITIONS
+
+
+def for_each_leaf(game_logic, depth, visit):
+    """Gọi visit(board) tại mọi vị trí lá của cây nước đi hợp lệ độ sâu `depth`."""
+    board = game_logic.board
+    if depth == 0:
+        visit(board)
+        return
+    for code in game_logic.generate_moves(board.turn):
+        Move.make(board, code)
+        for_each_leaf(game_logic, depth - 1, visit)
+        Move.unmake(board)
+
+
+def leaf_throughput(fen, depth):
+    """
+    :return: (số lá, vị trí/giây của Evaluator.evaluate, của BatchEvaluator gồm mã hóa,
+             của riêng phần đánh giá vector hóa).
+    """
+    game_logic = GameRule(Board.from_fen(fen))
+    evaluator = Evaluator()
+    leaves = []
+    start = time.perf_counter()
+    for_each_leaf(game_logic, depth, lambda board: leaves.append(evaluator.evaluate(board, game_logic)))
+    scalar_time = time.perf_counter() - start
+
+    batch = BatchEvaluator()
+    encoded = []
+
+    def add(board):
+        batch.add(board)
+        if batch.count == batch.capacity:
+            encoded.append(bytes(batch.buffer))
+            batch.flush()
+
+    start = time.perf_counter()
+    for_each_leaf(game_logic, depth, add)
+    tail = bytes(batch.buffer[:batch.count * 64])
+    batch.flush()
+    batch_time = time.perf_counter() - start
+
+    # Chỉ phần vector hóa, trên các lô đã mã hóa sẵn
+    import numpy as np
+
+    arrays = [np.frombuffer(data, dtype=np.uint8).reshape(-1, 64) for data in encoded + [tail]]
+    start = time.perf_counter()
+    for array in arrays:
+        batch.evaluate_array(array)
+    vector_time = time.perf_counter() - start
+
+    count = len(leaves)
+    return count, count / scalar_time, count / batch_time, count / vector_time
+
+
+def search_throughput(fen, depth, batch):
+    """
+    :return: (nước đi, số nút, thời gian) của tìm kiếm không có tìm kiếm tĩnh.
+    """
+    strategy = NegamaxAlphaBetaStrategy(Evaluator(), quiescence=False, batch_evaluator=batch)
+    game_logic = GameRule(Board.from_fen(fen))
+    start = time.perf_counter()
+    move = strategy.select_move(game_logic, depth)
+    return move, strategy.nodes, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Thông lượng đánh giá theo lô (NumPy) so với từng lá.")
+    parser.add_argument('--depth', type=int, default=2, help="Độ sâu cây perft để lấy các vị trí lá.")
+    parser.add_argument('--search-depth', type=int, default=3, help="Độ sâu tìm kiếm (0 để bỏ qua).")
+    parser.add_argument('--position', action='append', choices=sorted(POSITIONS),
+                        help="Vị trí chuẩn cần chạy (lặp lại được, mặc định tất cả).")
+    args = parser.parse_args()
+
+    try:
+        batch = BatchEvaluator()
+    except ImportError as error:
+        print(error)
+        return 1
+
+    positions = args.position or list(POSITIONS)
+    print(f"{'position':<10} {'leaves':>8} {'per-leaf/s':>11} {'batch/s':>10} {'vector/s':>10} {'speedup':>8}")
+    for position in positions:
+        count, scalar, batched, vector = leaf_throughput(POSITIONS[position][0], args.depth)
+        print(f"{position:<10} {count:>8,} {scalar:>11,.0f} {batched:>10,.0f} {vector:>10,.0f} {batched / scalar:>7.2f}x")
+
+    if args.search_depth:
+        print(f"\n{'position':<10} {'mode':<9} {'nodes':>9} {'time':>8} {'nodes/s':>9}  move")
+        for position in positions:
+            fen = POSITIONS[position][0]
+            for mode, evaluator in (('per-leaf', None), ('batch', batch)):
+                move, nodes, seconds = search_throughput(fen, args.search_depth, evaluator)
+                print(f"{position:<10} {mode:<9} {nodes:>9,} {seconds:>7.2f}s {nodes / seconds:>9,.0f}  {move}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
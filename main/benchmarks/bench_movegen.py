@@ -0,0 +1,54 @@
+"""
+Đo tốc độ sinh nước đi (số nước/giây) trên một số vị trí chuẩn, với và không có bitboard.
+
+Chạy từ thư mục main:
+    python -m benchmarks.bench_movegen [--seconds 1.0]
+"""
+import argparse
+import time
+
+from core.board import Board
+from core.game_rule import GameRule
+
+POSITIONS = {
+    'startpos': 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1',
+    'kiwipete': 'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1',
+    'middlegame': 'r1bq1rk1/pp2bppp/2n1pn2/3p4/2PP4/2N1PN2/PP2BPPP/R2QKB1R w KQ - 0 8',
+    'endgame': '8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1',
+}
+
+
+def moves_per_second(fen, validate, use_bitboards, seconds):
+    """
+    Gọi calculate_all_moves lặp lại trong `seconds` giây.
+    :return: Số nước đi sinh ra mỗi giây.
+    """
+    board = Board.from_fen(fen, use_bitboards=use_bitboards)
+    game_logic = GameRule(board)
+    color = board.turn
+
+    total = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < seconds:
+        total += len(game_logic.calculate_all_moves(color, validate=validate, output='codes'))
+        elapsed = time.perf_counter() - start
+    return total / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark sinh nước đi.")
+    parser.add_argument('--seconds', type=float, default=1.0, help="Thời gian đo cho mỗi ô kết quả.")
+    args = parser.parse_args()
+
+    print(f"{'position':<12} {'backend':<10} {'pseudo moves/s':>15} {'legal moves/s':>15}")
+    for name, fen in POSITIONS.items():
+        for use_bitboards in (False, True):
+            pseudo = moves_per_second(fen, False, use_bitboards, args.seconds)
+            legal = moves_per_second(fen, True, use_bitboards, args.seconds)
+            backend = 'bitboard' if use_bitboards else 'squares'
+            print(f"{name:<12} {backend:<10} {pseudo:>15,.0f} {legal:>15,.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+So sánh số nút tìm kiếm ở độ sâu cố định khi bật/tắt sắp xếp nước đi
+(MVV-LVA, nước sát thủ, bảng lịch sử) cho MinimaxStrategy và NegamaxAlphaBetaStrategy,
+kèm tỉ lệ cắt tỉa xảy ra ngay ở nước đầu tiên (SearchStats.first_move_cutoff_rate).
+
+Dùng đánh giá chỉ tính vật chất để số nút chỉ phản ánh hiệu quả sắp xếp nước đi.
+
+Chạy từ thư mục main:
+    python -m benchmarks.bench_ordering [--depth 3] [--position kiwipete]
+"""
+import argparse
+import time
+
+from chessBot import MinimaxStrategy, NegamaxAlphaBetaStrategy
+from core.board import Board
+from core.game_rule import GameRule
+from core.perft import POSITIONS
+
+STRATEGIES = {'minimax': MinimaxStrategy, 'negamax': NegamaxAlphaBetaStrategy}
+
+
+class MaterialEvaluator:
+    """Đánh giá chỉ tính tổng giá trị quân (Piece.value đã mang dấu theo màu)."""
+
+    def evaluate(self, board, game_logic):
+        cells = board.cells
+        return sum(
+            cells[sq].piece.value
+            for color in ('white', 'black')
+            for sq in board.piece_squares[color]
+            if cells[sq].piece.name != 'king'
+        )
+
+
+def search_nodes(strategy_cls, fen, depth, move_ordering):
+    """
+    Tìm kiếm một vị trí ở độ sâu cố định.
+    :return: (số nút, thời gian tính bằng giây, tỉ lệ cắt tỉa ở nước đầu tiên).
+    """
+    strategy = strategy_cls(MaterialEvaluator(), move_ordering=move_ordering)
+    game_logic = GameRule(Board.from_fen(fen))
+    start = time.perf_counter()
+    strategy.select_move(game_logic, depth)
+    return strategy.nodes, time.perf_counter() - start, strategy.stats.first_move_cutoff_rate()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hiệu quả sắp xếp nước đi ở độ sâu cố định.")
+    parser.add_argument('--depth', type=int, default=3, help="Độ sâu tìm kiếm.")
+    parser.add_argument('--position', action='append', choices=sorted(POSITIONS),
+                        help="Vị trí chuẩn cần chạy (lặp lại được, mặc định tất cả).")
+    parser.add_argument('--strategy', choices=('minimax', 'negamax', 'both'), default='both')
+    args = parser.parse_args()
+
+    names = list(STRATEGIES) if args.strategy == 'both' else [args.strategy]
+    print(f"{'position':<10} {'strategy':<8} {'unordered':>12} {'ordered':>12} {'reduction':>10} {'time':>14} {'1st-cut':>15}")
+    for position in args.position or POSITIONS:
+        fen = POSITIONS[position][0]
+        for name in names:
+            plain_nodes, plain_time, plain_first = search_nodes(STRATEGIES[name], fen, args.depth, False)
+            ordered_nodes, ordered_time, ordered_first = search_nodes(STRATEGIES[name], fen, args.depth, True)
+            reduction = 1 - ordered_nodes / plain_nodes if plain_nodes else 0.0
+            print(f"{position:<10} {name:<8} {plain_nodes:>12,} {ordered_nodes:>12,} {reduction:>9.1%} "
+                  f"{plain_time:>6.2f}s/{ordered_time:>5.2f}s {plain_first:>6.1%}/{ordered_first:>6.1%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Đo khả năng mở rộng của LazySMPStrategy theo số tiến trình: thời gian để hoàn thành
+một độ sâu cố định và tổng số nút/giây của tất cả tiến trình.
+
+Chạy từ thư mục main:
+    python -m benchmarks.bench_parallel [--depth 4] [--workers 1 2 4 8 16] [--position kiwipete]
+"""
+import argparse
+import os
+import time
+
+from benchmarks.bench_ordering import MaterialEvaluator
+from chessBot import LazySMPStrategy
+from core.board import Board
+from core.game_rule import GameRule
+from core.perft import POSITIONS
+
+
+def time_to_depth(fen, depth, workers, tt_size_mb):
+    """
+    Tìm kiếm một vị trí đến độ sâu cố định với bảng chuyển vị mới.
+    :return: (thời gian tính bằng giây, tổng số nút, độ sâu hoàn thành).
+    """
+    strategy = LazySMPStrategy(MaterialEvaluator(), workers=workers, tt_size_mb=tt_size_mb)
+    try:
+        game_logic = GameRule(Board.from_fen(fen))
+        start = time.perf_counter()
+        strategy.select_move(game_logic, depth)
+        return time.perf_counter() - start, strategy.nodes, strategy.completed_depth
+    finally:
+        strategy.close()
+
+
+def main():
+    cpus = os.cpu_count() or 1
+    default_workers = [n for n in (1, 2, 4, 8, 16) if n <= cpus] or [1]
+    parser = argparse.ArgumentParser(description="Khả năng mở rộng của tìm kiếm song song Lazy SMP.")
+    parser.add_argument('--depth', type=int, default=4, help="Độ sâu tìm kiếm.")
+    parser.add_argument('--workers', type=int, nargs='+', default=default_workers, help="Các số tiến trình cần đo.")
+    parser.add_argument('--position', action='append', choices=sorted(POSITIONS),
+                        help="Vị trí chuẩn cần chạy (lặp lại được, mặc định kiwipete và position6).")
+    parser.add_argument('--tt-size-mb', type=float, default=64, help="Kích thước bảng chuyển vị dùng chung.")
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPU, depth {args.depth}")
+    print(f"{'position':<10} {'workers':>7} {'time':>8} {'speedup':>8} {'nodes':>10} {'nodes/s':>10} {'nps x':>6}")
+    for position in args.position or ['kiwipete', 'position6']:
+        fen = POSITIONS[position][0]
+        base = None
+        for workers in args.workers:
+            seconds, nodes, _ = time_to_depth(fen, args.depth, workers, args.tt_size_mb)
+            nps = nodes / seconds
+            if base is None:
+                base = (seconds, nps)
+            print(f"{position:<10} {workers:>7} {seconds:>7.2f}s {base[0] / seconds:>7.2f}x "
+                  f"{nodes:>10,} {nps:>10,.0f} {nps / base[1]:>5.2f}x")
+
+
+if __name__ == '__main__':
+    main()
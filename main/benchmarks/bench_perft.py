@@ -0,0 +1,72 @@
+"""
+Chạy perft trên các vị trí chuẩn: kiểm tra số nút và đo số nút/giây.
+
+Chạy từ thư mục main:
+    python -m benchmarks.bench_perft [--depth 3] [--position kiwipete] [--json]
+    python -m benchmarks.bench_perft --fen "<FEN>" --depth 4 --divide
+
+Trả về mã thoát 1 nếu có vị trí cho số nút sai.
+"""
+import argparse
+import json
+import sys
+
+from core.board import Board
+from core.game_rule import GameRule
+from core.perft import POSITIONS, divide, run_position
+
+BACKENDS = {'squares': False, 'bitboard': True}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Perft: kiểm tra và đo tốc độ sinh nước đi.")
+    parser.add_argument('--depth', type=int, default=3, help="Độ sâu perft.")
+    parser.add_argument('--position', action='append', choices=sorted(POSITIONS),
+                        help="Vị trí chuẩn cần chạy (lặp lại được, mặc định tất cả).")
+    parser.add_argument('--fen', help="Chạy trên một FEN tùy ý thay cho các vị trí chuẩn.")
+    parser.add_argument('--backend', choices=('squares', 'bitboard', 'both'), default='both')
+    parser.add_argument('--divide', action='store_true', help="In số nút theo từng nước đi ở gốc.")
+    parser.add_argument('--json', action='store_true', help="In kết quả dạng JSON.")
+    args = parser.parse_args()
+
+    backends = list(BACKENDS) if args.backend == 'both' else [args.backend]
+
+    if args.divide:
+        fen = args.fen or POSITIONS[(args.position or ['startpos'])[0]][0]
+        board = Board.from_fen(fen, use_bitboards=BACKENDS[backends[0]])
+        result = divide(GameRule(board), args.depth)
+        if args.json:
+            print(json.dumps({'fen': fen, 'depth': args.depth, 'moves': result, 'nodes': sum(result.values())}))
+        else:
+            for uci, nodes in sorted(result.items()):
+                print(f"{uci}: {nodes}")
+            print(f"\nNodes searched: {sum(result.values())}")
+        return 0
+
+    if args.fen:
+        cases = [('custom', args.fen, None)]
+    else:
+        cases = []
+        for name in args.position or POSITIONS:
+            fen, counts = POSITIONS[name]
+            expected = counts[args.depth - 1] if args.depth <= len(counts) else None
+            cases.append((name, fen, expected))
+
+    results = []
+    for name, fen, expected in cases:
+        for backend in backends:
+            result = run_position(fen, args.depth, BACKENDS[backend], expected)
+            result.update(position=name, backend=backend)
+            results.append(result)
+            if not args.json:
+                status = 'ok' if result['passed'] else f"FAIL (expected {expected})"
+                print(f"{name:<10} {backend:<9} depth {args.depth}: {result['nodes']:>10,} nodes "
+                      f"{result['seconds']:>8.2f}s {result['nps']:>12,.0f} nps  {status}")
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    return 0 if all(result['passed'] for result in results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
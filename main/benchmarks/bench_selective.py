@@ -0,0 +1,59 @@
+"""
+So sánh số nút, thời gian và nước đi chọn được của NegamaxAlphaBetaStrategy ở độ sâu cố định
+khi bật/tắt từng kỹ thuật tìm kiếm chọn lọc: cắt tỉa nước đi rỗng và late move reductions.
+
+Chạy từ thư mục main:
+    python -m benchmarks.bench_selective [--depth 5] [--position position3]
+"""
+import argparse
+import time
+
+from benchmarks.bench_ordering import MaterialEvaluator
+from chessBot import NegamaxAlphaBetaStrategy
+from core.board import Board
+from core.game_rule import GameRule
+from core.perft import POSITIONS
+
+CONFIGS = {
+    'baseline': {'null_move': False, 'lmr': False},
+    'null-move': {'null_move': True, 'lmr': False},
+    'lmr': {'null_move': False, 'lmr': True},
+    'both': {'null_move': True, 'lmr': True},
+}
+
+
+def search(fen, depth, config):
+    """
+    Tìm kiếm một vị trí ở độ sâu cố định với cấu hình cho trước.
+    :return: (nước đi, điểm, số nút, thời gian tính bằng giây, thống kê).
+    """
+    strategy = NegamaxAlphaBetaStrategy(MaterialEvaluator(), **config)
+    game_logic = GameRule(Board.from_fen(fen))
+    start = time.perf_counter()
+    move = strategy.select_move(game_logic, depth)
+    return move, strategy.best_score, strategy.nodes, time.perf_counter() - start, strategy.last_stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hiệu quả của cắt tỉa nước đi rỗng và LMR ở độ sâu cố định.")
+    parser.add_argument('--depth', type=int, default=4, help="Độ sâu tìm kiếm.")
+    parser.add_argument('--position', action='append', choices=sorted(POSITIONS),
+                        help="Vị trí chuẩn cần chạy (lặp lại được, mặc định tất cả).")
+    args = parser.parse_args()
+
+    print(f"{'position':<10} {'config':<10} {'nodes':>10} {'vs base':>8} {'time':>8} "
+          f"{'null cut':>9} {'lmr':>6} {'re-srch':>8}  move / score")
+    for position in args.position or POSITIONS:
+        fen = POSITIONS[position][0]
+        base = None
+        for name, config in CONFIGS.items():
+            move, score, nodes, seconds, stats = search(fen, args.depth, config)
+            if base is None:
+                base = nodes
+            print(f"{position:<10} {name:<10} {nodes:>10,} {nodes / base:>7.2f}x {seconds:>7.2f}s "
+                  f"{stats['null_move_cutoffs']:>4}/{stats['null_move_tries']:<4} {stats['lmr_reductions']:>6} "
+                  f"{stats['lmr_researches']:>8}  {move} {score:+.2f}")
+
+
+if __name__ == '__main__':
+    main()
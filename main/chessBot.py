@@ -1,67 +1,336 @@
+import os
+import queue
+import multiprocessing
 from abc import ABC, abstractmethod
+from multiprocessing import shared_memory
+from core.move import Move
+from core.move_encoding import CAPTURE, PROMOTION_BIT
+from core.game_rule import CAPTURES, QUIETS
+from core.attack_tables import KING_TARGETS, KING_MASKS
+from core.bitboard import COLOR_INDEX
+from core.psqt import PSQT, PHASE, MAX_PHASE, taper
+from ai.move_picker import staged_moves
+from ai.move_ordering import MoveOrdering, mvv_lva, victim_value
+from ai.search_limits import SearchLimits, SearchAborted
+from ai.search_stats import SearchStats
+from ai.tablebase import Tablebases
+from ai.pawn_hash import PawnHashTable, evaluate_pawns, pawn_masks, pawn_shield
+from ai.transposition import (
+    TranspositionTable, EXACT, LOWER, UPPER, MATE_THRESHOLD, score_to_tt, score_from_tt, table_bytes
+)
+from const import TT_SIZE_MB, DEBUG_EVAL, PAWN_HASH_ENTRIES
+
+MATE_SCORE = 10000  # Điểm chiếu hết (lớn hơn mọi điểm đánh giá tĩnh)
+# Độ rộng cửa sổ rỗng của PVS, nước đi rỗng và LMR. Điểm đánh giá là bội của 1/2400 Tốt (centipawn
+# chia 100, nhân tỉ lệ giai đoạn phase/24 của taper và an toàn Vua) nên hai điểm khác nhau cách nhau
+# ít nhất 1/2400; 1e-6 nhỏ hơn nhiều mức đó nhưng vẫn lớn hơn nhiều sai số làm tròn ở thang MATE_SCORE.
+PVS_EPSILON = 1e-6
+ASPIRATION_WINDOW = 0.5  # Nửa độ rộng ban đầu của cửa sổ khát vọng quanh điểm vòng trước (đơn vị Tốt)
+ASPIRATION_GROWTH = 4  # Hệ số nới rộng cửa sổ khát vọng mỗi lần thất bại
+ASPIRATION_MAX_WINDOW = 8  # Nửa độ rộng tối đa; vượt quá thì tìm lại với cửa sổ đầy đủ
+NULL_MOVE_REDUCTION = 2  # Độ sâu giảm thêm khi tìm sau nước đi rỗng (R)
+NULL_MOVE_MIN_DEPTH = 3  # Chỉ thử nước đi rỗng khi độ sâu còn lại từ mức này
+LMR_MIN_DEPTH = 3  # Chỉ giảm độ sâu nước muộn khi độ sâu còn lại từ mức này
+LMR_FULL_MOVES = 3  # Số nước đầu tiên luôn được tìm đủ độ sâu
+LMR_DEEP_MOVES = 8  # Từ nước thứ này trở đi giảm 2 ply thay vì 1
+KING_SAFETY_WEIGHT = 0.1  # Điểm (đơn vị Tốt) cho mỗi quân che chắn cạnh Vua ở trung cuộc
+DELTA_MARGIN = 2  # Biên an toàn (đơn vị Tốt) cho delta pruning trong quiescence search
+MAX_SEARCH_DEPTH = 64  # Độ sâu tối đa của iterative deepening khi tìm kiếm theo ngân sách
+DEFAULT_DEPTH = 3  # Độ sâu mặc định khi không đặt ngân sách thời gian/số nút
+
+
+def tablebase_score(result, ply):
+    """
+    Đổi kết quả tra bảng tàn cuộc thành điểm tìm kiếm (cùng thang với điểm chiếu hết).
+    :param result: ('win' | 'loss' | 'draw', số ply đến chiếu hết) theo góc nhìn bên đi.
+    :param ply: Khoảng cách từ gốc tìm kiếm tới vị trí được tra.
+    """
+    outcome, plies = result
+    if outcome == 'draw':
+        return 0
+    score = MATE_SCORE - (ply + plies)
+    return score if outcome == 'win' else -score
 
 
 class AIStrategy(ABC):
+    nodes = 0  # Số nút đã duyệt trong lần tìm kiếm gần nhất
+    qnodes = 0  # Số nút của tìm kiếm tĩnh (đã tính trong nodes)
+    beta_cutoffs = 0  # Số lần cắt tỉa beta
+    first_move_cutoffs = 0  # Số lần cắt tỉa ngay ở nước đầu tiên được thử
+    completed_depth = 0  # Độ sâu của vòng lặp cuối cùng đã hoàn thành
+    best_code = None  # Mã nước đi tốt nhất của vòng cuối cùng đã hoàn thành
+    best_score = 0  # Điểm (góc nhìn bên đi) của vòng cuối cùng đã hoàn thành
+    stats = None  # SearchStats của lần tìm kiếm gần nhất (None khi tắt thu thập thống kê)
+    collect_stats = True  # False: bỏ qua bộ đếm cắt tỉa/nút tĩnh, SearchStats và on_iteration
+    on_iteration = None  # Hàm gọi với IterationStats sau mỗi vòng iterative deepening, None nếu không dùng
+
     @abstractmethod
-    def select_move(self, game_logic, depth):
-        """Chọn nước đi tốt nhất dựa trên chiến lược AI"""
+    def select_move(self, game_logic, depth, time_limit=None, node_limit=None, stop_event=None):
+        """Chọn nước đi tốt nhất dựa trên chiến lược AI (stop_event: sự kiện để hủy từ bên ngoài)."""
         pass
 
+    def table_hit_rates(self):
+        """Tỉ lệ trúng của các bảng băm mà chiến lược dùng (tên bảng -> tỉ lệ)."""
+        return {}
+
+
+class IterativeDeepeningStrategy(AIStrategy):
+    """
+    Chiến lược tìm kiếm trong tiến trình hiện tại theo iterative deepening: lớp con cài đặt
+    search_root cho một vòng ở độ sâu cố định và gọi count_node ở mỗi nút.
+    """
+    limits = SearchLimits()
+
+    @abstractmethod
+    def search_root(self, game_logic, depth, first_move):
+        """
+        Tìm kiếm một vòng ở độ sâu cố định cho bên đang tới lượt (lớp con phải cài đặt).
+        :param first_move: Nước đi tốt nhất của vòng trước, được thử đầu tiên (hoặc None).
+        :return: (mã nước đi tốt nhất hoặc None, điểm theo góc nhìn bên đang tới lượt).
+        """
+        pass
+
+    def iterative_deepening(self, game_logic, max_depth, time_limit=None, node_limit=None,
+                            start_depth=1, stop_event=None):
+        """
+        Tìm kiếm lần lượt ở độ sâu start_depth, start_depth + 1, ... đến max_depth hoặc đến khi hết ngân sách.
+        Vòng bị ngắt giữa chừng bị bỏ; kết quả là nước đi tốt nhất của vòng cuối cùng đã hoàn thành.
+        :param time_limit: Ngân sách thời gian (giây) cho nước đi, None nếu không giới hạn.
+        :param node_limit: Ngân sách số nút, None nếu không giới hạn.
+        :param start_depth: Độ sâu của vòng đầu tiên.
+        :param stop_event: Sự kiện để dừng tìm kiếm từ bên ngoài (tìm kiếm song song, suy nghĩ nền).
+        :return: Nước đi tốt nhất (đối tượng Move) hoặc None nếu không còn nước đi.
+        """
+        board = game_logic.board
+        history_length = len(board.history)
+        self.limits = SearchLimits(time_limit, node_limit, stop_event)
+        self.stats = SearchStats(self.on_iteration) if self.collect_stats else None
+        self.nodes = self.qnodes = 0
+        self.beta_cutoffs = self.first_move_cutoffs = 0
+        self.completed_depth = 0
+        self.best_code, self.best_score = None, 0
+
+        best_move = None
+        for depth in range(max(1, min(start_depth, max_depth)), max_depth + 1):
+            try:
+                move, score = self.search_root(game_logic, depth, best_move)
+            except SearchAborted:
+                # Hoàn tác các nước đang dở trên ngăn xếp make/unmake
+                while len(board.history) > history_length:
+                    Move.unmake(board)
+                break
+            best_move = move
+            self.completed_depth = depth
+            self.best_code, self.best_score = move, score
+            if self.stats is not None:
+                self.stats.record_iteration(depth, move, score, self.nodes, self.qnodes)
+            if move is None or abs(score) > MATE_THRESHOLD or self.limits.should_stop_deepening(self.nodes):
+                break
+
+        if best_move is None and self.completed_depth == 0:
+            # Ngân sách quá nhỏ để xong cả vòng đầu tiên: đi nước hợp lệ bất kỳ
+            moves = game_logic.generate_moves(board.turn)
+            best_move = moves[0] if moves else None
+        if self.stats is not None:
+            self.stats.finish(self)
+        return Move.from_code(best_move, board) if best_move is not None else None
 
-class MinimaxStrategy(AIStrategy):
-    def __init__(self, evaluator):
+    def count_node(self):
+        """Đếm một nút và kiểm tra ngân sách định kỳ (ném SearchAborted khi hết)."""
+        self.nodes += 1
+        if self.nodes >= self.limits.next_check:
+            self.limits.check(self.nodes)
+
+
+class MinimaxStrategy(IterativeDeepeningStrategy):
+    def __init__(self, evaluator, move_ordering=True, on_iteration=None, collect_stats=True):
         self.evaluator = evaluator  # Hàm đánh giá trạng thái bàn cờ
+        self.ordering = MoveOrdering() if move_ordering else None  # Sắp xếp nước đi (None: thứ tự sinh)
+        self.on_iteration = on_iteration  # Hàm gọi với IterationStats sau mỗi vòng
+        self.collect_stats = collect_stats  # Thu thập thống kê tìm kiếm (SearchStats)
+
+    def _ordered_moves(self, game_logic, color, ply, first_move=0):
+        moves = game_logic.generate_moves(color)
+        if self.ordering is not None:
+            return self.ordering.order_moves(game_logic.board, moves, color, ply, first_move)
+        return moves
 
-    def minimax(self, game_logic, depth, maximizing):
+    def minimax(self, game_logic, depth, maximizing, alpha=float('-inf'), beta=float('inf'), ply=1):
         """
-        Hàm Minimax để tính nước đi tốt nhất.
+        Hàm Minimax để tính nước đi tốt nhất (cắt tỉa bằng cửa sổ alpha/beta, kết quả không đổi).
         :param game_logic: Lớp logic quản lý trò chơi.
         :param depth: Độ sâu tìm kiếm.
         :param maximizing: True nếu đang tìm nước đi tốt nhất cho người chơi chính.
+        :param alpha: Điểm tối thiểu Trắng đã đảm bảo.
+        :param beta: Điểm tối đa Đen đã đảm bảo.
+        :param ply: Khoảng cách (số nước) từ gốc tìm kiếm.
         :return: Giá trị đánh giá trạng thái tốt nhất.
         """
+        self.count_node()
         if depth == 0 or game_logic.is_checkmate('white') or game_logic.is_checkmate('black'):
             return self.evaluator.evaluate(game_logic.board, game_logic)
 
-        if maximizing:
-            max_eval = float('-inf')
-            for move in game_logic.generate_moves('white'):
-                with game_logic.simulate_move_in_place(game_logic.board, move):
-                    eval = self.minimax(game_logic, depth - 1, False)
-                max_eval = max(max_eval, eval)
-            return max_eval
-        else:
-            min_eval = float('inf')
-            for move in game_logic.generate_moves('black'):
-                with game_logic.simulate_move_in_place(game_logic.board, move):
-                    eval = self.minimax(game_logic, depth - 1, True)
-                min_eval = min(min_eval, eval)
-            return min_eval
+        color = 'white' if maximizing else 'black'
+        best_eval = float('-inf') if maximizing else float('inf')
+        for index, move in enumerate(self._ordered_moves(game_logic, color, ply)):
+            with game_logic.simulate_move_in_place(move):
+                eval = self.minimax(game_logic, depth - 1, not maximizing, alpha, beta, ply + 1)
+            if maximizing:
+                best_eval = max(best_eval, eval)
+                alpha = max(alpha, eval)
+            else:
+                best_eval = min(best_eval, eval)
+                beta = min(beta, eval)
+            if alpha >= beta:
+                if self.collect_stats:
+                    self.beta_cutoffs += 1
+                    self.first_move_cutoffs += index == 0
+                if self.ordering is not None and move >> 12 < CAPTURE:
+                    self.ordering.add_killer(ply, move)
+                    self.ordering.add_history(move, depth, color)
+                break  # Cắt tỉa
+        return best_eval
 
-    def select_move(self, game_logic, depth):
+    def search_root(self, game_logic, depth, first_move):
         """
-        Chọn nước đi tốt nhất dựa trên thuật toán Minimax.
-        :param game_logic: Lớp logic quản lý trò chơi.
-        :param depth: Độ sâu tìm kiếm.
-        :return: Nước đi tốt nhất.
+        Một vòng Minimax ở gốc; Trắng cực đại hóa, Đen cực tiểu hóa điểm đánh giá.
         """
-        best_move = None
-        max_eval = float('-inf')
+        color = game_logic.board.turn
+        maximizing = color == 'white'
+        sign = 1 if maximizing else -1
+        moves = self._ordered_moves(game_logic, color, 0, first_move or 0)
+        if first_move in moves:
+            moves.remove(first_move)
+            moves.insert(0, first_move)
 
-        for move in game_logic.generate_moves('white'):
-            with game_logic.simulate_move_in_place(game_logic.board, move):
-                eval = self.minimax(game_logic, depth - 1, False)
-            if eval > max_eval:
-                max_eval = eval
+        best_move = None
+        best_score = float('-inf')
+        for move in moves:
+            # Cửa sổ theo điểm tốt nhất hiện có ở gốc (góc nhìn của Trắng)
+            alpha, beta = (best_score, float('inf')) if maximizing else (float('-inf'), -best_score)
+            with game_logic.simulate_move_in_place(move):
+                score = sign * self.minimax(game_logic, depth - 1, not maximizing, alpha, beta)
+            if score > best_score:
+                best_score = score
                 best_move = move
-        return best_move
+        return best_move, best_score
+
+    def select_move(self, game_logic, depth, time_limit=None, node_limit=None, stop_event=None):
+        """
+        Chọn nước đi tốt nhất dựa trên thuật toán Minimax (iterative deepening đến `depth`).
+        :param game_logic: Lớp logic quản lý trò chơi.
+        :param depth: Độ sâu tìm kiếm tối đa.
+        :param time_limit: Ngân sách thời gian (giây), None nếu không giới hạn.
+        :param node_limit: Ngân sách số nút, None nếu không giới hạn.
+        :param stop_event: Sự kiện để hủy tìm kiếm từ bên ngoài (tìm kiếm nền); trả về nước của vòng cuối đã xong.
+        :return: Nước đi tốt nhất (đối tượng Move; tìm kiếm bên trong dùng mã số nguyên).
+        """
+        if self.ordering is not None:
+            self.ordering.new_search()
+        return self.iterative_deepening(game_logic, depth, time_limit, node_limit, stop_event=stop_event)
 
 
-class NegamaxAlphaBetaStrategy(AIStrategy):
-    def __init__(self, evaluator):
+class NegamaxAlphaBetaStrategy(IterativeDeepeningStrategy):
+    def __init__(self, evaluator, tt_size_mb=TT_SIZE_MB, move_ordering=True, quiescence=True,
+                 quiescence_checks=False, tt=None, pvs=True, aspiration=True, null_move=True, lmr=True,
+                 batch_evaluator=None, tablebases=None, on_iteration=None, collect_stats=True):
+        """
+        :param tt: Bảng chuyển vị có sẵn (ví dụ bảng dùng chung giữa các tiến trình); None để tự tạo.
+        :param quiescence: Tìm kiếm tĩnh (chỉ nước bắt quân) tại nút lá thay vì đánh giá ngay.
+        :param quiescence_checks: Trong tìm kiếm tĩnh, thoát chiếu bằng mọi nước và thử thêm
+                                  nước yên lặng chiếu tướng ở ply tĩnh đầu tiên.
+        :param pvs: Principal Variation Search: chỉ nước đầu tiên được tìm với cửa sổ đầy đủ.
+        :param aspiration: Tìm ở gốc với cửa sổ hẹp quanh điểm của vòng lặp trước.
+        :param null_move: Cắt tỉa nước đi rỗng (tắt khi bị chiếu hoặc bên đi chỉ còn Vua và Tốt).
+        :param lmr: Giảm độ sâu các nước yên lặng xếp muộn (late move reductions), tìm lại nếu vượt alpha.
+        :param batch_evaluator: ai.batch_eval.BatchEvaluator (cần NumPy) để chấm điểm mọi nút con của nút
+                                biên (độ sâu 1) trong một lần gọi và sắp xếp chúng theo điểm đó; giá trị
+                                các lá vẫn do evaluator tính. None để dùng thứ tự sắp xếp thông thường.
+        :param tablebases: ai.tablebase.Tablebases tra ở gốc và ở mọi nút thay cho tìm kiếm khi vị trí
+                           đủ ít quân; None để không dùng.
+        :param on_iteration: Hàm gọi với ai.search_stats.IterationStats sau mỗi vòng iterative deepening.
+        :param collect_stats: False để bỏ qua SearchStats, on_iteration, last_stats và các bộ đếm cắt tỉa/nút
+                              tĩnh (stats là None); số nút vẫn được đếm cho ngân sách tìm kiếm.
+        """
         self.evaluator = evaluator  # Hàm đánh giá trạng thái bàn cờ
+        self.tt = tt if tt is not None else TranspositionTable(tt_size_mb)  # Dùng chung giữa các lần tìm kiếm
+        self.ordering = MoveOrdering() if move_ordering else None  # Sắp xếp nước đi (None: thứ tự sinh)
+        self.quiescence_enabled = quiescence
+        self.quiescence_checks = quiescence_checks
+        self.pvs = pvs
+        self.aspiration = aspiration
+        self.null_move = null_move
+        self.lmr = lmr
+        self.batch_evaluator = batch_evaluator
+        self.tablebases = tablebases
+        self.on_iteration = on_iteration
+        self.collect_stats = collect_stats
+        self.last_stats = {}  # Thống kê (bảng chuyển vị, PVS, cửa sổ khát vọng) của lần tìm kiếm gần nhất
+        self.begin_search()
+
+    def begin_search(self):
+        """Đặt lại thông tin theo lần tìm kiếm: nước sát thủ/lịch sử và các bộ đếm."""
+        if self.ordering is not None:
+            self.ordering.new_search()
+        self.null_window_searches = 0  # Số lần tìm với cửa sổ rỗng (PVS)
+        self.pvs_researches = 0  # Số lần cửa sổ rỗng thất bại cao phải tìm lại
+        self.aspiration_fail_low = 0
+        self.aspiration_fail_high = 0
+        self.null_move_tries = 0
+        self.null_move_cutoffs = 0
+        self.lmr_reductions = 0  # Số nước được tìm với độ sâu giảm
+        self.lmr_researches = 0  # Số nước giảm độ sâu vượt alpha phải tìm lại đủ độ sâu
+        self.tablebase_hits = 0  # Số nút có kết quả lấy từ bảng tàn cuộc
+        pawn_table = getattr(self.evaluator, 'pawn_table', None)
+        if pawn_table is not None:
+            pawn_table.reset_stats()
+        if self.tablebases is not None:
+            self.tablebases.reset_stats()
 
-    def negamax(self, game_logic, depth, alpha, beta, color):
+    def table_hit_rates(self):
+        """Tỉ lệ trúng của bảng chuyển vị, bảng băm Tốt và bảng tàn cuộc (nếu có)."""
+        rates = {'tt': self.tt.stats()['hit_rate']}
+        pawn_table = getattr(self.evaluator, 'pawn_table', None)
+        if pawn_table is not None:
+            rates['pawn_hash'] = pawn_table.stats()['hit_rate']
+        if self.tablebases is not None:
+            rates['tablebase'] = self.tablebases.hit_rate()
+        return rates
+
+    def search_stats(self):
+        """
+        Thống kê của lần tìm kiếm gần nhất: bảng chuyển vị, tỉ lệ tìm lại của PVS và cửa sổ khát vọng,
+        bảng băm Tốt của hàm đánh giá (nếu có, với tiền tố pawn_hash_).
+        """
+        stats = self.tt.stats()
+        pawn_table = getattr(self.evaluator, 'pawn_table', None)
+        if pawn_table is not None:
+            stats.update({f'pawn_hash_{name}': value for name, value in pawn_table.stats().items()})
+        stats.update(
+            qnodes=self.qnodes,
+            null_window_searches=self.null_window_searches,
+            pvs_researches=self.pvs_researches,
+            pvs_research_rate=self.pvs_researches / self.null_window_searches if self.null_window_searches else 0.0,
+            aspiration_fail_low=self.aspiration_fail_low,
+            aspiration_fail_high=self.aspiration_fail_high,
+            null_move_tries=self.null_move_tries,
+            null_move_cutoffs=self.null_move_cutoffs,
+            lmr_reductions=self.lmr_reductions,
+            lmr_researches=self.lmr_researches,
+            tablebase_hits=self.tablebase_hits,
+        )
+        return stats
+
+    def _moves(self, game_logic, color, hash_move, ply):
+        """
+        Nước đi của một nút: theo giai đoạn (khi cắt tỉa, các giai đoạn sau không bao giờ được sinh)
+        hoặc theo thứ tự sinh nếu tắt sắp xếp nước đi.
+        """
+        if self.ordering is None:
+            return game_logic.generate_moves(color)
+        return staged_moves(game_logic, color, hash_move, self.ordering, ply)
+
+    def negamax(self, game_logic, depth, alpha, beta, color, ply=1, allow_null=True):
         """
         Thuật toán NegaMax với cắt tỉa Alpha-Beta.
         :param game_logic: Lớp logic quản lý trò chơi.
@@ -69,117 +338,597 @@ class NegamaxAlphaBetaStrategy(AIStrategy):
         :param alpha: Giá trị alpha (cắt tỉa).
         :param beta: Giá trị beta (cắt tỉa).
         :param color: 1 nếu là người chơi chính, -1 nếu là đối thủ.
+        :param ply: Khoảng cách (số nước) từ gốc tìm kiếm.
+        :param allow_null: False ngay sau một nước đi rỗng (không nhường lượt hai lần liên tiếp).
         :return: Giá trị đánh giá tốt nhất.
         """
-        if depth == 0 or game_logic.is_checkmate('white') or game_logic.is_checkmate('black'):
+        if self.tablebases is not None:
+            # Vị trí ít quân: kết quả chính xác từ bảng tàn cuộc thay cho cả cây con
+            result = self.tablebases.probe(game_logic.board)
+            if result is not None:
+                self.count_node()
+                self.tablebase_hits += 1
+                return tablebase_score(result, ply)
+
+        if depth == 0:
+            if self.quiescence_enabled:
+                return self.quiescence(game_logic, alpha, beta, color, ply)
+            self.count_node()
             return color * self.evaluator.evaluate(game_logic.board, game_logic)
 
+        self.count_node()
+        board = game_logic.board
+        key = board.zobrist_key
+        alpha_original = alpha
+
+        # Tra bảng chuyển vị: kết quả đủ sâu thu hẹp cửa sổ hoặc trả về ngay
+        hash_move = 0
+        entry = self.tt.probe(key)
+        if entry is not None:
+            entry_depth, entry_score, bound, hash_move = entry
+            if entry_depth >= depth:
+                score = score_from_tt(entry_score, ply)
+                if bound == EXACT:
+                    self.tt.cutoffs += 1
+                    return score
+                if bound == LOWER:
+                    alpha = max(alpha, score)
+                elif bound == UPPER:
+                    beta = min(beta, score)
+                if alpha >= beta:
+                    self.tt.cutoffs += 1
+                    return score
+
+        side = 'white' if color == 1 else 'black'
+        in_check = game_logic.in_check(side)
+
+        # Cắt tỉa nước đi rỗng: nếu nhường lượt mà đối thủ vẫn không kéo được điểm xuống dưới beta
+        # (với độ sâu giảm R) thì nước đi thật gần như chắc chắn cũng vượt beta. Sai khi zugzwang,
+        # nên bỏ qua khi bị chiếu và khi bên đi chỉ còn Vua và Tốt; chỉ thử khi đánh giá tĩnh đã vượt beta.
+        if (self.null_move and allow_null and depth >= NULL_MOVE_MIN_DEPTH and not in_check
+                and abs(beta) < MATE_THRESHOLD and self._has_non_pawn_material(board, side)
+                and color * self.evaluator.evaluate(board, game_logic) >= beta):
+            self.null_move_tries += 1
+            Move.make_null(board)
+            eval = -self.negamax(game_logic, max(0, depth - 1 - NULL_MOVE_REDUCTION), -beta, -beta + PVS_EPSILON,
+                                 -color, ply + 1, allow_null=False)
+            Move.unmake(board)
+            if eval >= beta:
+                self.null_move_cutoffs += 1
+                self.tt.store(key, depth, score_to_tt(beta, ply), LOWER)
+                return beta  # Không trả về điểm chiếu hết chưa được chứng minh
+
+        if depth == 1 and self.batch_evaluator is not None:
+            return self._batched_frontier(game_logic, alpha, beta, color, ply, hash_move, in_check)
+
+        reduce = self.lmr and depth >= LMR_MIN_DEPTH and not in_check
+        opponent = 'black' if side == 'white' else 'white'
+        killers = self.ordering.killers[ply] if self.ordering is not None else ()
         max_eval = float('-inf')
-        for move in game_logic.generate_moves('white' if color == 1 else 'black'):
-            with game_logic.simulate_move_in_place(game_logic.board, move):
-                eval = -self.negamax(game_logic, depth - 1, -beta, -alpha, -color)
-            max_eval = max(max_eval, eval)
+        best_move = 0
+        for index, move in enumerate(self._moves(game_logic, side, hash_move, ply)):
+            Move.make(board, move)
+            # LMR: nước yên lặng xếp muộn (không phải nước băm/sát thủ, không chiếu) ít khi tốt nhất
+            reduction = 0
+            if (reduce and index >= LMR_FULL_MOVES and move >> 12 < CAPTURE and move != hash_move
+                    and move not in killers and not game_logic.in_check(opponent)):
+                reduction = min(2 if index >= LMR_DEEP_MOVES else 1, depth - 2)
+            eval = self._search_child(game_logic, depth - 1, alpha, beta, color, ply, best_move != 0, reduction)
+            Move.unmake(board)
+            if eval > max_eval:
+                max_eval = eval
+                best_move = move
             alpha = max(alpha, eval)
             if alpha >= beta:
+                if self.collect_stats:
+                    self.beta_cutoffs += 1
+                    self.first_move_cutoffs += index == 0
+                if self.ordering is not None and move >> 12 < CAPTURE:
+                    self.ordering.add_killer(ply, move)
+                    self.ordering.add_history(move, depth, side)
                 break  # Cắt tỉa
+
+        if max_eval == float('-inf'):
+            # Không có nước đi hợp lệ: bị chiếu hết (chiếu hết càng sớm càng tệ) hoặc hòa do hết nước
+            max_eval = -(MATE_SCORE - ply) if in_check else 0
+
+        self._store(key, depth, max_eval, alpha_original, beta, best_move, ply)
         return max_eval
 
-    def select_move(self, game_logic, depth):
+    def _store(self, key, depth, score, alpha, beta, move, ply):
+        """Lưu kết quả của một nút vào bảng chuyển vị với loại cận suy ra từ cửa sổ ban đầu."""
+        if score <= alpha:
+            bound = UPPER
+        elif score >= beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        self.tt.store(key, depth, score_to_tt(score, ply), bound, move)
+
+    def _batched_frontier(self, game_logic, alpha, beta, color, ply, hash_move, in_check):
         """
-        Chọn nước đi tốt nhất dựa trên thuật toán Negamax Alpha-Beta.
-        :param game_logic: Lớp logic quản lý trò chơi.
-        :param depth: Độ sâu tìm kiếm.
-        :return: Nước đi tốt nhất.
+        Nút biên (độ sâu 1) ở chế độ đánh giá theo lô: mọi nút con được gom vào bộ đệm của
+        batch_evaluator và chấm điểm trong một lần gọi vector hóa. Điểm theo lô chỉ dùng để sắp xếp
+        nước đi (hàm đánh giá vector hóa không có các thành phần an toàn Vua của Evaluator); giá trị
+        các lá vẫn do negamax ở độ sâu 0 tính (tìm kiếm tĩnh hoặc evaluator) với cắt tỉa Alpha-Beta.
         """
+        board = game_logic.board
+        key = board.zobrist_key
+        side = 'white' if color == 1 else 'black'
+        moves = game_logic.generate_moves(side)
+        if not moves:
+            score = -(MATE_SCORE - ply) if in_check else 0
+            self.tt.store(key, 1, score_to_tt(score, ply), EXACT)
+            return score
+
+        batch = self.batch_evaluator
+        for move in moves:
+            Move.make(board, move)
+            batch.add(board)
+            Move.unmake(board)
+        scores = (color * batch.flush()).tolist()
+
+        alpha_original = alpha
+        max_eval = float('-inf')
+        best_move = 0
+        order = sorted(range(len(moves)), key=lambda i: (moves[i] == hash_move, scores[i]), reverse=True)
+        for tried, i in enumerate(order):
+            move = moves[i]
+            Move.make(board, move)
+            eval = -self.negamax(game_logic, 0, -beta, -alpha, -color, ply + 1)
+            Move.unmake(board)
+            if eval > max_eval:
+                max_eval, best_move = eval, move
+            alpha = max(alpha, eval)
+            if alpha >= beta:
+                if self.collect_stats:
+                    self.beta_cutoffs += 1
+                    self.first_move_cutoffs += tried == 0
+                if self.ordering is not None and move >> 12 < CAPTURE:
+                    self.ordering.add_killer(ply, move)
+                    self.ordering.add_history(move, 1, side)
+                break
+
+        self._store(key, 1, max_eval, alpha_original, beta, best_move, ply)
+        return max_eval
+
+    @staticmethod
+    def _has_non_pawn_material(board, side):
+        """Bên `side` còn quân khác Vua và Tốt (điều kiện tránh zugzwang cho nước đi rỗng)."""
+        cells = board.cells
+        return any(cells[sq].piece.name not in ('king', 'pawn') for sq in board.piece_squares[side])
+
+    def _search_child(self, game_logic, depth, alpha, beta, color, ply, null_window, reduction=0):
+        """
+        Tìm kiếm nút con (đã thực hiện nước đi) và trả về điểm theo góc nhìn của nút cha.
+        PVS: sau nước đầu tiên, giả định các nước còn lại không tốt hơn và chứng minh bằng cửa sổ
+        rỗng (alpha, alpha + PVS_EPSILON); chỉ khi thất bại cao mới tìm lại với cửa sổ đầy đủ.
+        :param reduction: Số ply giảm (LMR); nước giảm độ sâu vượt alpha được tìm lại đủ độ sâu.
+        """
+        if reduction > 0:
+            self.lmr_reductions += 1
+            eval = -self.negamax(game_logic, depth - reduction, -alpha - PVS_EPSILON, -alpha, -color, ply + 1)
+            if eval <= alpha:
+                return eval
+            self.lmr_researches += 1
+
+        if not (null_window and self.pvs):
+            return -self.negamax(game_logic, depth, -beta, -alpha, -color, ply + 1)
+
+        self.null_window_searches += 1
+        eval = -self.negamax(game_logic, depth, -alpha - PVS_EPSILON, -alpha, -color, ply + 1)
+        if alpha < eval < beta:
+            self.pvs_researches += 1
+            eval = -self.negamax(game_logic, depth, -beta, -alpha, -color, ply + 1)
+        return eval
+
+    def quiescence(self, game_logic, alpha, beta, color, ply, qply=0):
+        """
+        Tìm kiếm tĩnh: chỉ xét nước bắt quân/phong cấp cho đến khi vị trí "yên lặng",
+        tránh đánh giá tĩnh giữa một chuỗi trao đổi quân.
+        :param qply: Số ply đã đi trong tìm kiếm tĩnh.
+        :return: Giá trị đánh giá theo góc nhìn bên đang tới lượt.
+        """
+        self.count_node()
+        if self.collect_stats:
+            self.qnodes += 1
+        board = game_logic.board
+        side = 'white' if color == 1 else 'black'
+
+        if self.quiescence_checks and game_logic.in_check(side):
+            # Bị chiếu: không được "đứng yên", phải xét mọi nước thoát chiếu
+            moves = game_logic.generate_moves(side)
+            if not moves:
+                return -(MATE_SCORE - ply)
+            stand_pat = None
+        else:
+            # Stand-pat: bên đi có thể không bắt quân nên điểm tĩnh là cận dưới
+            stand_pat = color * self.evaluator.evaluate(board, game_logic)
+            if stand_pat >= beta:
+                return stand_pat
+            alpha = max(alpha, stand_pat)
+            moves = game_logic.generate_moves(side, CAPTURES)
+            moves.sort(key=lambda code: mvv_lva(board, code), reverse=True)
+            if self.quiescence_checks and qply == 0:
+                moves.extend(self._quiet_checks(game_logic, side))
+
+        best = alpha
+        for move in moves:
+            # Delta pruning: kể cả khi ăn được quân và cộng thêm biên an toàn vẫn không vượt alpha
+            if (stand_pat is not None and move >> 12 >= CAPTURE and not (move >> 12) & PROMOTION_BIT
+                    and stand_pat + victim_value(board, move) + DELTA_MARGIN <= alpha):
+                continue
+            Move.make(board, move)
+            score = -self.quiescence(game_logic, -beta, -alpha, -color, ply + 1, qply + 1)
+            Move.unmake(board)
+            if score > best:
+                best = score
+            if score >= beta:
+                return score
+            alpha = max(alpha, score)
+        return best
+
+    def _quiet_checks(self, game_logic, side):
+        """Các nước yên lặng chiếu Vua đối phương (dùng ở ply tĩnh đầu tiên)."""
+        enemy = 'black' if side == 'white' else 'white'
+        board = game_logic.board
+        checks = []
+        for move in game_logic.generate_moves(side, QUIETS):
+            Move.make(board, move)
+            if game_logic.in_check(enemy):
+                checks.append(move)
+            Move.unmake(board)
+        return checks
+
+    def search_root(self, game_logic, depth, first_move):
+        """
+        Một vòng Negamax Alpha-Beta ở gốc. Nước tốt nhất của vòng trước được thử đầu tiên
+        (qua vai trò nước đi từ bảng băm), nên các vòng sau cắt tỉa nhiều hơn.
+        Từ vòng thứ hai, tìm với cửa sổ khát vọng quanh điểm vòng trước; khi điểm rơi ra ngoài
+        cửa sổ, nới rộng về phía thất bại (nhân ASPIRATION_GROWTH) rồi tìm lại.
+        """
+        board = game_logic.board
+        if first_move is None:
+            entry = self.tt.probe(board.zobrist_key)
+            first_move = entry[3] if entry is not None else 0
+
+        if not self.aspiration or self.completed_depth == 0 or abs(self.best_score) > MATE_THRESHOLD:
+            best_move, score = self._search_root_window(game_logic, depth, first_move, float('-inf'), float('inf'))
+        else:
+            delta = ASPIRATION_WINDOW
+            alpha, beta = self.best_score - delta, self.best_score + delta
+            while True:
+                best_move, score = self._search_root_window(game_logic, depth, first_move, alpha, beta)
+                if score <= alpha:
+                    self.aspiration_fail_low += 1
+                    alpha = score - delta * ASPIRATION_GROWTH
+                elif score >= beta:
+                    self.aspiration_fail_high += 1
+                    first_move = best_move  # Nước gây thất bại cao là ứng viên tốt nhất
+                    beta = score + delta * ASPIRATION_GROWTH
+                else:
+                    break
+                delta *= ASPIRATION_GROWTH
+                if delta > ASPIRATION_MAX_WINDOW:
+                    alpha, beta = float('-inf'), float('inf')
+
+        if best_move is not None:
+            self.tt.store(board.zobrist_key, depth, score_to_tt(score, 0), EXACT, best_move)
+        return best_move, score
+
+    def _search_root_window(self, game_logic, depth, first_move, alpha, beta):
+        """
+        Tìm kiếm các nước ở gốc trong cửa sổ (alpha, beta).
+        :return: (nước đi tốt nhất, điểm); điểm <= alpha nghĩa là thất bại thấp, >= beta là thất bại cao.
+        """
+        board = game_logic.board
+        color = 1 if board.turn == 'white' else -1
         best_move = None
         max_eval = float('-inf')
-        alpha, beta = float('-inf'), float('inf')
 
-        for move in game_logic.generate_moves('white'):
-            with game_logic.simulate_move_in_place(game_logic.board, move):
-                eval = -self.negamax(game_logic, depth - 1, -beta, -alpha, -1)
+        for move in self._moves(game_logic, board.turn, first_move, 0):
+            Move.make(board, move)
+            eval = self._search_child(game_logic, depth - 1, alpha, beta, color, 0, best_move is not None)
+            Move.unmake(board)
             if eval > max_eval:
                 max_eval = eval
                 best_move = move
             alpha = max(alpha, eval)
-        return best_move
+            if alpha >= beta:
+                break  # Thất bại cao: cần nới cửa sổ
+        return best_move, max_eval
+
+    def select_move(self, game_logic, depth, time_limit=None, node_limit=None, stop_event=None):
+        """
+        Chọn nước đi tốt nhất dựa trên thuật toán Negamax Alpha-Beta cho bên đang tới lượt (board.turn),
+        tìm kiếm iterative deepening đến `depth` hoặc đến khi hết ngân sách.
+        :param game_logic: Lớp logic quản lý trò chơi.
+        :param depth: Độ sâu tìm kiếm tối đa.
+        :param time_limit: Ngân sách thời gian (giây), None nếu không giới hạn.
+        :param node_limit: Ngân sách số nút, None nếu không giới hạn.
+        :param stop_event: Sự kiện để hủy tìm kiếm từ bên ngoài (tìm kiếm nền); trả về nước của vòng cuối đã xong.
+        :return: Nước đi tốt nhất (đối tượng Move; tìm kiếm bên trong dùng mã số nguyên).
+        """
+        self.tt.new_search()
+        self.begin_search()
+        root = self._tablebase_root(game_logic)
+        if root is not None:
+            self.stats = SearchStats(self.on_iteration) if self.collect_stats else None
+            self.nodes = self.qnodes = self.beta_cutoffs = self.first_move_cutoffs = self.completed_depth = 0
+            self.best_code, self.best_score = root
+            if self.stats is not None:
+                self.stats.finish(self)
+            move = Move.from_code(root[0], game_logic.board)
+        else:
+            move = self.iterative_deepening(game_logic, depth, time_limit, node_limit, stop_event=stop_event)
+        self.last_stats = self.search_stats() if self.collect_stats else {}
+        return move
+
+    def _tablebase_root(self, game_logic):
+        """
+        Chọn nước ở gốc chỉ bằng bảng tàn cuộc: thắng nhanh nhất, hoặc thua chậm nhất.
+        :return: (mã nước đi, điểm), hoặc None nếu gốc hay một vị trí con nằm ngoài các bảng.
+        """
+        board = game_logic.board
+        if self.tablebases is None or self.tablebases.probe(board) is None:
+            return None
+        best = None
+        for move in game_logic.generate_moves(board.turn):
+            Move.make(board, move)
+            result = self.tablebases.probe(board)
+            Move.unmake(board)
+            if result is None:
+                return None
+            self.tablebase_hits += 1
+            score = -tablebase_score(result, 1)
+            if best is None or score > best[1]:
+                best = (move, score)
+        return best
+
+
+def _lazy_smp_worker(worker_id, shm_name, tt_size_mb, generation, fen, depth, time_limit, node_limit,
+                     evaluator, tablebases, stop_event, results):
+    """
+    Tiến trình phụ của LazySMPStrategy: tìm kiếm cùng vị trí gốc với bảng chuyển vị dùng chung,
+    bắt đầu ở độ sâu so le để các tiến trình không đi cùng một cây.
+    """
+    from core.board import Board  # Import muộn: chỉ tiến trình phụ cần dựng lại bàn cờ từ FEN
+    from core.game_rule import GameRule
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    tt = TranspositionTable(tt_size_mb, shm.buf)
+    tt.generation = generation
+    try:
+        # Thống kê của tiến trình phụ không được gửi về nên không thu thập
+        strategy = NegamaxAlphaBetaStrategy(evaluator, tt=tt, tablebases=tablebases, collect_stats=False)
+        game_logic = GameRule(Board.from_fen(fen))
+        strategy.iterative_deepening(game_logic, depth, time_limit, node_limit,
+                                     start_depth=1 + worker_id % 2, stop_event=stop_event)
+        results.put((worker_id, strategy.completed_depth, strategy.best_code, strategy.best_score, strategy.nodes))
+    finally:
+        tt.release()
+        shm.close()
+
+
+class LazySMPStrategy(AIStrategy):
+    """
+    Tìm kiếm song song kiểu Lazy SMP: tiến trình chính và (workers - 1) tiến trình phụ cùng tìm
+    kiếm vị trí gốc, chia sẻ một bảng chuyển vị trong multiprocessing.shared_memory. Kết quả của
+    tiến trình này giúp các tiến trình khác cắt tỉa sớm hơn.
+    """
+    def __init__(self, evaluator, workers=None, tt_size_mb=TT_SIZE_MB, tablebases=None, on_iteration=None,
+                 collect_stats=True):
+        """
+        :param workers: Tổng số tiến trình tìm kiếm (mặc định bằng số nhân CPU).
+        :param tt_size_mb: Ngân sách bộ nhớ của bảng chuyển vị dùng chung (MB).
+        :param tablebases: ai.tablebase.Tablebases (mỗi tiến trình tự mở lại các tệp bảng), None để không dùng.
+        :param on_iteration: Hàm gọi với IterationStats sau mỗi vòng của tiến trình chính.
+        :param collect_stats: Thu thập thống kê tìm kiếm của tiến trình chính (SearchStats).
+        """
+        self._shm = None  # Cấp phát ở lần tìm kiếm đầu tiên (close() an toàn cả khi constructor lỗi)
+        self.tt = None
+        self.main_search = None  # Tìm kiếm trong tiến trình chính
+        self.evaluator = evaluator
+        self.tablebases = tablebases
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.tt_size_mb = tt_size_mb
+        self.on_iteration = on_iteration
+        self.collect_stats = collect_stats
+        self.worker_results = []  # (worker_id, độ sâu hoàn thành, nước đi, điểm, số nút) của lần gần nhất
+
+    def _open_table(self):
+        """Cấp phát bảng chuyển vị dùng chung và tìm kiếm của tiến trình chính nếu chưa có."""
+        if self._shm is not None:
+            return
+        shm = shared_memory.SharedMemory(create=True, size=table_bytes(self.tt_size_mb))
+        try:
+            self.tt = TranspositionTable(self.tt_size_mb, shm.buf)
+        except BaseException:
+            shm.close()
+            shm.unlink()
+            raise
+        self._shm = shm
+        self.main_search = NegamaxAlphaBetaStrategy(self.evaluator, tt=self.tt, tablebases=self.tablebases,
+                                                    on_iteration=self.on_iteration, collect_stats=self.collect_stats)
+
+    def close(self):
+        """Giải phóng vùng nhớ dùng chung của bảng chuyển vị."""
+        shm = getattr(self, '_shm', None)
+        if shm is not None:
+            self._shm = None
+            self.tt.release()
+            shm.close()
+            shm.unlink()
+
+    def __del__(self):
+        self.close()
+
+    def select_move(self, game_logic, depth, time_limit=None, node_limit=None, stop_event=None):
+        """
+        Chọn nước đi tốt nhất bằng tìm kiếm song song.
+        :param node_limit: Ngân sách số nút cho tất cả tiến trình (chia đều).
+        :param stop_event: Sự kiện để hủy tìm kiếm từ bên ngoài (dừng tiến trình chính, kéo theo các tiến trình phụ).
+        :return: Nước đi của tiến trình hoàn thành vòng sâu nhất (ưu tiên tiến trình chính khi bằng nhau).
+        """
+        board = game_logic.board
+        self._open_table()
+        self.tt.new_search()
+        root = self.main_search._tablebase_root(game_logic)
+        if root is not None:
+            # Kết quả chính xác từ bảng tàn cuộc: không cần khởi động các tiến trình phụ
+            self.nodes, self.completed_depth, self.worker_results = 0, 0, []
+            self.stats = SearchStats() if self.collect_stats else None
+            if self.stats is not None:
+                self.stats.finish(self)
+            return Move.from_code(root[0], board)
+        worker_nodes = max(1, node_limit // self.workers) if node_limit else None
+
+        # 'spawn' như ai.background: tiến trình phụ không kế thừa trạng thái của tiến trình chính
+        context = multiprocessing.get_context('spawn')
+        helpers_stop = context.Event()  # Dừng các tiến trình phụ khi tiến trình chính xong
+        results = context.Queue()
+        helpers = [
+            context.Process(
+                target=_lazy_smp_worker,
+                args=(worker_id, self._shm.name, self.tt_size_mb, self.tt.generation, board.to_fen(), depth,
+                      time_limit, worker_nodes, self.evaluator, self.tablebases, helpers_stop, results),
+                daemon=True,
+            )
+            for worker_id in range(1, self.workers)
+        ]
+        for helper in helpers:
+            helper.start()
+
+        main = self.main_search
+        try:
+            main.begin_search()
+            main.iterative_deepening(game_logic, depth, time_limit, worker_nodes, stop_event=stop_event)
+        finally:
+            helpers_stop.set()
+            self.worker_results = []
+            for _ in helpers:
+                try:
+                    self.worker_results.append(results.get(timeout=5))
+                except queue.Empty:
+                    break  # Tiến trình phụ lỗi: bỏ qua kết quả của nó
+            for helper in helpers:
+                helper.join(timeout=5)
+                if helper.is_alive():
+                    helper.terminate()  # Tiến trình phụ treo: không để nó giữ vùng nhớ dùng chung
+                    helper.join()
+
+        best_depth, best_code = main.completed_depth, main.best_code
+        for _, completed_depth, code, _, _ in self.worker_results:
+            if completed_depth > best_depth and code is not None:
+                best_depth, best_code = completed_depth, code
+        self.nodes = main.nodes + sum(result[4] for result in self.worker_results)
+        self.completed_depth = best_depth
+        self.stats = main.stats  # Thống kê của tiến trình chính (self.nodes gồm cả các tiến trình phụ)
+        self.last_stats = main.search_stats() if self.collect_stats else {}
+        return Move.from_code(best_code, board) if best_code is not None else None
 
 
 class AIPlayer:
-    def __init__(self, strategy):
+    def __init__(self, strategy, time_limit=None, node_limit=None, opening_book=None):
         self.strategy = strategy  # Chiến lược AI
+        self.time_limit = time_limit  # Ngân sách thời gian mỗi nước (giây), None nếu không giới hạn
+        self.node_limit = node_limit  # Ngân sách số nút mỗi nước, None nếu không giới hạn
+        self.opening_book = opening_book  # Sách khai cuộc (ai.opening_book.OpeningBook), None nếu không dùng
 
     def set_strategy(self, strategy):
         """Thay đổi chiến lược AI."""
         self.strategy = strategy
 
-    def select_move(self, game_logic, depth=3):
-        """Chọn nước đi tốt nhất dựa trên chiến lược."""
-        return self.strategy.select_move(game_logic, depth)
+    def select_move(self, game_logic, depth=None):
+        """
+        Chọn nước đi tốt nhất dựa trên chiến lược; vị trí có trong sách khai cuộc thì lấy nước
+        trong sách mà không tìm kiếm.
+        :param depth: Độ sâu tối đa; mặc định DEFAULT_DEPTH, hoặc MAX_SEARCH_DEPTH khi có ngân sách.
+        """
+        if self.opening_book is not None:
+            code = self.opening_book.choose(game_logic)
+            if code is not None:
+                return Move.from_code(code, game_logic.board)
+        if depth is None:
+            depth = MAX_SEARCH_DEPTH if self.time_limit or self.node_limit else DEFAULT_DEPTH
+        return self.strategy.select_move(game_logic, depth, self.time_limit, self.node_limit)
 
 
 class Evaluator:
-    def __init__(self):
-        # Bảng giá trị quân cờ
-        self.piece_values = {
-            'king': 0,  # Vua không có giá trị cụ thể, được tính qua điểm an toàn
-            'queen': 9,
-            'rook': 5,
-            'bishop': 3,
-            'knight': 3,
-            'pawn': 1
-        }
-
-        # Bảng điểm vị trí cho từng loại quân (tạm thời chỉ có cho một số quân cờ)
-        self.position_tables = {
-            'pawn': [ ... ],  # Như đã mô tả ở trên
-            'knight': [ ... ],
-            'bishop': [ ... ],
-            'rook': [ ... ],
-            'queen': [ ... ]
-        }
+    def __init__(self, debug=DEBUG_EVAL, pawn_hash_entries=PAWN_HASH_ENTRIES):
+        """
+        :param debug: Kiểm tra tổng điểm tăng dần của Board và điểm của evaluate với full_evaluate
+                      (quét toàn bộ bàn cờ) ở mỗi lần đánh giá (chậm, dùng để gỡ lỗi).
+        :param pawn_hash_entries: Số cấu trúc Tốt tối đa giữ trong bảng băm Tốt.
+        """
+        self.debug = debug
+        self.pawn_table = PawnHashTable(pawn_hash_entries)  # Cấu trúc Tốt theo board.pawn_key
 
     def evaluate(self, board, Game_Logic):
-        """Đánh giá trạng thái bàn cờ."""
-        score = 0
-
-        for row in board.squares:
-            for square in row:
-                if square.has_piece():
-                    piece = square.piece
-                    piece_value = self.piece_values.get(piece.name, 0)
-                    pos_table = self.position_tables.get(piece.name, [[0] * 8 for _ in range(8)])
-
-                    # Giá trị quân cờ
-                    base_score = piece_value if piece.color == 'white' else -piece_value
-
-                    # Điểm vị trí
-                    row_idx = piece.row if piece.color == 'white' else 7 - piece.row
-                    col_idx = piece.col
-                    position_score = pos_table[row_idx][col_idx] if piece.color == 'white' else -pos_table[row_idx][col_idx]
+        """
+        Đánh giá trạng thái bàn cờ (đơn vị Tốt, dương có lợi cho Trắng).
+        Giá trị quân và điểm vị trí (trung cuộc/tàn cuộc, nội suy theo giai đoạn) lấy từ tổng mà
+        Board cập nhật tăng dần trong Move.make/unmake; cấu trúc Tốt lấy từ bảng băm Tốt; chỉ các
+        thành phần còn lại mới tính tại nút lá.
+        """
+        pawns = self.pawn_table.probe(board)
+        if self.debug:
+            board.verify_evaluation()
+            if pawns != evaluate_pawns(board):
+                raise ValueError(f"Pawn hash entry mismatch for pawn key {board.pawn_key:#018x}.")
+        score = taper(board.psqt['white'] - board.psqt['black'], board.phase) / 100
+        score += self.leaf_terms(board, board.phase, pawns)
+        if self.debug:
+            expected = self.full_evaluate(board, Game_Logic)
+            if score != expected:
+                raise ValueError(f"Incremental evaluation {score} does not match full evaluation {expected}.")
+        return score
 
-                    # Điểm kiểm soát
-                    control_score = len(piece.moves) * 0.1 if piece.color == 'white' else -len(piece.moves) * 0.1
+    def full_evaluate(self, board, Game_Logic):
+        """Đánh giá như evaluate nhưng quét lại toàn bộ bàn cờ (evaluate so sánh với nó ở chế độ debug)."""
+        cells = board.cells
+        score = phase = 0
+        for color, sign in (('white', 1), ('black', -1)):
+            for sq in board.piece_squares[color]:
+                index = cells[sq].piece.psqt_index
+                score += sign * PSQT[index + sq]
+                phase += PHASE[index >> 6]
+        return taper(score, phase) / 100 + self.leaf_terms(board, phase, evaluate_pawns(board))
 
-                    # Cộng dồn
-                    score += base_score + position_score + control_score
+    def leaf_terms(self, board, phase, pawns):
+        """
+        Các thành phần không cập nhật tăng dần: cấu trúc Tốt và độ an toàn của Vua
+        (chỉ có ý nghĩa ở trung cuộc).
+        :param pawns: Mục bảng băm Tốt (điểm cấu trúc Tốt, mặt nạ Tốt trắng, mặt nạ Tốt đen).
+        """
+        structure, white_pawns, black_pawns = pawns
+        safety = self.king_safety(board, 'white', white_pawns) - self.king_safety(board, 'black', black_pawns)
+        return structure / 100 + safety * min(phase, MAX_PHASE) / MAX_PHASE
 
-        # Điểm an toàn của vua
-        score += self.king_safety(board, 'white') - self.king_safety(board, 'black')
+    def king_safety(self, board, color, pawns=None):
+        """
+        Tính toán điểm an toàn của vua (đơn vị Tốt): quân cùng màu đứng cạnh Vua và lá chắn Tốt
+        phía trước Vua.
+        :param pawns: Mặt nạ bit các ô có Tốt của bên `color` (None để tính lại từ bàn cờ).
+        """
+        king_sq = board.king_squares[color]
+        if king_sq is None:
+            return -float('inf') if color == 'white' else float('inf')  # Không có vua là trạng thái lỗi
 
-        return score
+        if pawns is None:
+            pawns = pawn_masks(board)[color]
+        if board.bitboards is not None:
+            neighbours = (KING_MASKS[king_sq] & board.bitboards.colors[COLOR_INDEX[color]]).bit_count()
+        else:
+            cells = board.cells
+            neighbours = sum(1 for target in KING_TARGETS[king_sq] if cells[target].has_team_piece(color))
+        return neighbours * KING_SAFETY_WEIGHT + pawn_shield(pawns, color, king_sq) / 100
 
-    def king_safety(self, board, color):
-        """Tính toán điểm an toàn của vua."""
-        king_square = board.get_king(color)
-        if not king_square:
-            return -float('inf') if color == 'white' else float('inf')  # Không có vua là trạng thái lỗi
 
-        king_safety_score = 0
-        for dx, dy in [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]:
-            neighbor_row, neighbor_col = king_square.row + dx, king_square.col + dy
-            if board.is_valid(neighbor_row, neighbor_col):
-                square = board.squares[neighbor_row][neighbor_col]
-                if square.has_team_piece(color):
-                    king_safety_score += 1
-        return king_safety_score
+def default_strategy():
+    """
+    Chiến lược AI mặc định của trò chơi: Negamax Alpha-Beta, kèm bảng tàn cuộc nếu đã dựng
+    (TABLEBASE_DIR). Là hàm cấp module nên dùng được làm strategy_factory của ai.background.
+    """
+    tablebases = Tablebases()
+    return NegamaxAlphaBetaStrategy(Evaluator(), tablebases=tablebases if tablebases.available() else None)
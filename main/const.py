@@ -3,4 +3,18 @@ HEIGHT = 800  # Chiều cao của bàn cờ (đơn vị pixel)
 
 COLS = 8  # Số cột của bàn cờ
 ROWS = 8  # Số hàng của bàn cờ
-SQ_SIZE = WIDTH // COLS  # Kích thước mỗi ô vuông (pixel) trên bàn cờ
\ No newline at end of file
+SQ_SIZE = WIDTH // COLS  # Kích thước mỗi ô vuông (pixel) trên bàn cờ
+FPS = 60  # Số khung hình mỗi giây của vòng lặp giao diện
+
+USE_BITBOARDS = True  # Bật bitboard song song với mảng ô vuông (tắt để so sánh hiệu năng)
+DEBUG_ZOBRIST = False  # Tính lại khóa Zobrist từ đầu sau mỗi nước đi để kiểm tra cập nhật tăng dần (chậm)
+DEBUG_EVAL = False  # So sánh đánh giá tăng dần (tổng của Board và điểm cuối cùng) với bản quét toàn bộ bàn cờ ở mỗi nút lá (chậm)
+
+TT_SIZE_MB = 16  # Ngân sách bộ nhớ của bảng chuyển vị cho AI (MB)
+PAWN_HASH_ENTRIES = 16384  # Số cấu trúc Tốt tối đa trong bảng băm Tốt của hàm đánh giá
+OPENING_BOOK_PATH = 'assets/book.bin'  # Sách khai cuộc nhị phân (dựng bằng tools.build_book)
+TABLEBASE_DIR = 'assets/tablebases'  # Bảng tàn cuộc (dựng bằng tools.build_tablebases)
+
+AI_COLOR = 'black'  # Màu quân của AI trong trò chơi (None: hai người chơi)
+AI_TIME_LIMIT = 3  # Ngân sách thời gian mỗi nước của AI trong trò chơi (giây)
+AI_PONDER = True  # AI suy nghĩ trước trong lượt của người chơi
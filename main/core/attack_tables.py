@@ -0,0 +1,124 @@
+"""
+Bảng tấn công và tia trượt được tính sẵn một lần khi import.
+
+Mọi bảng đều đánh chỉ số theo ô sq = row * 8 + col (xem core.bitboard) nên các quân cờ
+không cần dựng lại danh sách hướng và kiểm tra biên bằng Square.in_range mỗi lần sinh nước.
+"""
+from .bitboard import WHITE, BLACK
+
+KNIGHT_OFFSETS = ((-2, 1), (-2, -1), (2, 1), (2, -1), (1, 2), (1, -2), (-1, 2), (-1, -2))
+KING_OFFSETS = ((-1, 1), (-1, -1), (1, 1), (1, -1), (0, 1), (0, -1), (-1, 0), (1, 0))
+
+# Tám hướng trượt; 4 hướng đầu là hướng thẳng (Xe), 4 hướng sau là hướng chéo (Tượng)
+DIRECTIONS = ((1, 0), (-1, 0), (0, 1), (0, -1), (-1, 1), (-1, -1), (1, 1), (1, -1))
+STRAIGHT = (0, 1, 2, 3)
+DIAGONAL = (4, 5, 6, 7)
+ALL_DIRECTIONS = STRAIGHT + DIAGONAL
+
+# Hướng làm tăng chỉ số ô: quân chắn gần nhất trên tia là bit thấp nhất, ngược lại là bit cao nhất
+POSITIVE_DIRECTION = tuple(row_dir * 8 + col_dir > 0 for row_dir, col_dir in DIRECTIONS)
+
+
+def _targets(sq, offsets):
+    row, col = divmod(sq, 8)
+    return tuple(
+        (row + row_dir) * 8 + col + col_dir
+        for row_dir, col_dir in offsets
+        if 0 <= row + row_dir < 8 and 0 <= col + col_dir < 8
+    )
+
+
+def _ray(sq, row_dir, col_dir):
+    row, col = divmod(sq, 8)
+    ray = []
+    row, col = row + row_dir, col + col_dir
+    while 0 <= row < 8 and 0 <= col < 8:
+        ray.append(row * 8 + col)
+        row, col = row + row_dir, col + col_dir
+    return tuple(ray)
+
+
+def _mask(squares):
+    mask = 0
+    for sq in squares:
+        mask |= 1 << sq
+    return mask
+
+
+SQUARE_COORDS = tuple(divmod(sq, 8) for sq in range(64))  # sq -> (row, col)
+
+KNIGHT_TARGETS = tuple(_targets(sq, KNIGHT_OFFSETS) for sq in range(64))
+KING_TARGETS = tuple(_targets(sq, KING_OFFSETS) for sq in range(64))
+
+# PAWN_ATTACKS[màu][sq]: các ô mà Tốt của màu đó đứng ở sq tấn công (Trắng đi lên, Đen đi xuống)
+PAWN_ATTACKS = (
+    tuple(_targets(sq, ((-1, -1), (-1, 1))) for sq in range(64)),
+    tuple(_targets(sq, ((1, -1), (1, 1))) for sq in range(64)),
+)
+
+# RAYS[hướng][sq]: các ô trên tia từ sq theo hướng, ô gần nhất đứng trước
+RAYS = tuple(tuple(_ray(sq, row_dir, col_dir) for sq in range(64)) for row_dir, col_dir in DIRECTIONS)
+
+# Phiên bản bitboard của các bảng trên
+KNIGHT_MASKS = tuple(_mask(targets) for targets in KNIGHT_TARGETS)
+KING_MASKS = tuple(_mask(targets) for targets in KING_TARGETS)
+PAWN_ATTACK_MASKS = (
+    tuple(_mask(targets) for targets in PAWN_ATTACKS[WHITE]),
+    tuple(_mask(targets) for targets in PAWN_ATTACKS[BLACK]),
+)
+RAY_MASKS = tuple(tuple(_mask(ray) for ray in rays) for rays in RAYS)
+
+# Mọi ô trên các tia thẳng/chéo từ sq (bỏ qua quân chắn): lọc nhanh quân trượt không thể tấn công sq
+STRAIGHT_MASKS = tuple(RAY_MASKS[0][sq] | RAY_MASKS[1][sq] | RAY_MASKS[2][sq] | RAY_MASKS[3][sq] for sq in range(64))
+DIAGONAL_MASKS = tuple(RAY_MASKS[4][sq] | RAY_MASKS[5][sq] | RAY_MASKS[6][sq] | RAY_MASKS[7][sq] for sq in range(64))
+
+
+# Tia theo cặp hướng ngược nhau: cột (0, 1), hàng (2, 3) và hai đường chéo (4, 7), (5, 6)
+LINES = ((0, 1), (2, 3), (4, 7), (5, 6))
+
+
+def _line_attacks(sq, occupied, line):
+    attacks = 0
+    for direction in line:
+        for target in RAYS[direction][sq]:
+            attacks |= 1 << target
+            if occupied >> target & 1:
+                break
+    return attacks
+
+
+def _line_table(sq, line):
+    # Ô cuối của mỗi tia không ảnh hưởng đến ô bị tấn công nên bị loại khỏi mặt nạ
+    mask = 0
+    for direction in line:
+        mask |= _mask(RAYS[direction][sq][:-1])
+    table = {}
+    subset = 0
+    while True:  # Duyệt mọi tập con của mask (carry-rippler)
+        table[subset] = _line_attacks(sq, subset, line)
+        subset = (subset - mask) & mask
+        if not subset:
+            break
+    return mask, table
+
+
+# LINE_ATTACKS[line][sq] = (mặt nạ quân chắn, {occupied & mặt nạ: bitboard ô bị tấn công trên đường})
+LINE_ATTACKS = tuple(tuple(_line_table(sq, line) for sq in range(64)) for line in LINES)
+
+# Các đường của từng loại quân trượt theo ô, dùng cho sliding_attacks
+ROOK_LINES = tuple((LINE_ATTACKS[0][sq], LINE_ATTACKS[1][sq]) for sq in range(64))
+BISHOP_LINES = tuple((LINE_ATTACKS[2][sq], LINE_ATTACKS[3][sq]) for sq in range(64))
+QUEEN_LINES = tuple(ROOK_LINES[sq] + BISHOP_LINES[sq] for sq in range(64))
+
+
+def sliding_attacks(sq, occupied, lines):
+    """
+    Bitboard các ô mà một quân trượt đứng ở sq tấn công: mỗi tia dừng ở quân chắn gần nhất
+    (kể cả ô của quân chắn). Mỗi đường chỉ cần một lần tra bảng theo các quân chắn trên nó.
+    :param occupied: Bitboard các ô có quân.
+    :param lines: ROOK_LINES, BISHOP_LINES hoặc QUEEN_LINES.
+    """
+    attacks = 0
+    for mask, table in lines[sq]:
+        attacks |= table[occupied & mask]
+    return attacks
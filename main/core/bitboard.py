@@ -0,0 +1,144 @@
+"""
+Biểu diễn vị trí bằng bitboard (số nguyên 64 bit).
+
+Ô (row, col) tương ứng với bit thứ row * 8 + col, tức a8 là bit 0 và h1 là bit 63
+(cùng cách đánh số hàng với Board.squares: hàng 0 là hàng quân Đen).
+"""
+
+WHITE, BLACK = 0, 1  # Chỉ số màu
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)  # Chỉ số loại quân
+
+COLOR_INDEX = {'white': WHITE, 'black': BLACK}
+PIECE_INDEX = {
+    'pawn': PAWN,
+    'knight': KNIGHT,
+    'bishop': BISHOP,
+    'rook': ROOK,
+    'queen': QUEEN,
+    'king': KING
+}
+
+FULL_BOARD = (1 << 64) - 1
+
+
+def square_index(row, col):
+    """Chuyển tọa độ (row, col) thành chỉ số ô 0..63."""
+    return row * 8 + col
+
+
+def square_coords(sq):
+    """Chuyển chỉ số ô 0..63 thành tọa độ (row, col)."""
+    return sq >> 3, sq & 7
+
+
+def squares_mask(squares):
+    """Bitboard có bit 1 ở các ô trong `squares` (chỉ số 0..63)."""
+    mask = 0
+    for sq in squares:
+        mask |= 1 << sq
+    return mask
+
+
+def popcount(bb):
+    """Đếm số bit 1 trong bitboard."""
+    return bb.bit_count()
+
+
+def lsb(bb):
+    """Chỉ số của bit 1 thấp nhất (bb phải khác 0)."""
+    return (bb & -bb).bit_length() - 1
+
+
+def msb(bb):
+    """Chỉ số của bit 1 cao nhất (bb phải khác 0)."""
+    return bb.bit_length() - 1
+
+
+def iter_bits(bb):
+    """Duyệt chỉ số các bit 1 từ thấp đến cao."""
+    while bb:
+        low = bb & -bb
+        yield low.bit_length() - 1
+        bb ^= low
+
+
+BIT_SQUARES_CACHE_SIZE = 1 << 14  # Số bitboard tối đa trong bộ nhớ đệm của bit_squares
+_bit_squares = {}
+
+
+def bit_squares(bb):
+    """
+    Bộ chỉ số các bit 1 của bb (tăng dần). Cùng một bitboard đích lặp lại rất nhiều trong cây
+    tìm kiếm nên kết quả được nhớ đệm (xóa toàn bộ khi đầy); nhanh hơn tách từng bit mỗi lần.
+    """
+    squares = _bit_squares.get(bb)
+    if squares is None:
+        if len(_bit_squares) >= BIT_SQUARES_CACHE_SIZE:
+            _bit_squares.clear()
+        squares = _bit_squares[bb] = tuple(iter_bits(bb))
+    return squares
+
+
+class Bitboards:
+    """
+    Bitboard cho từng loại quân theo từng màu, kèm bitboard chiếm chỗ.
+    """
+    __slots__ = ('pieces', 'colors', 'occupied')
+
+    def __init__(self):
+        self.pieces = [[0] * 6, [0] * 6]  # pieces[màu][loại quân]
+        self.colors = [0, 0]  # Các ô có quân theo màu
+        self.occupied = 0  # Các ô có quân (cả hai màu)
+
+    @classmethod
+    def from_squares(cls, squares):
+        """
+        Xây dựng bitboard từ mảng ô vuông 8x8.
+        """
+        bitboards = cls()
+        for row in squares:
+            for square in row:
+                if square.piece:
+                    bitboards.add(square_index(square.row, square.col), square.piece)
+        return bitboards
+
+    def add(self, sq, piece):
+        """
+        Đặt quân cờ vào ô sq.
+        """
+        mask = 1 << sq
+        color = COLOR_INDEX[piece.color]
+        self.pieces[color][PIECE_INDEX[piece.name]] |= mask
+        self.colors[color] |= mask
+        self.occupied |= mask
+
+    def remove(self, sq, piece):
+        """
+        Xóa quân cờ khỏi ô sq.
+        """
+        mask = ~(1 << sq)
+        color = COLOR_INDEX[piece.color]
+        self.pieces[color][PIECE_INDEX[piece.name]] &= mask
+        self.colors[color] &= mask
+        self.occupied &= mask
+
+    def piece_mask(self, color, name):
+        """
+        Bitboard của một loại quân theo màu ('white'/'black', tên quân).
+        """
+        return self.pieces[COLOR_INDEX[color]][PIECE_INDEX[name]]
+
+    def copy(self):
+        new_bitboards = Bitboards()
+        new_bitboards.pieces = [list(self.pieces[WHITE]), list(self.pieces[BLACK])]
+        new_bitboards.colors = list(self.colors)
+        new_bitboards.occupied = self.occupied
+        return new_bitboards
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, Bitboards)
+            and self.pieces == other.pieces
+            and self.colors == other.colors
+            and self.occupied == other.occupied
+        )
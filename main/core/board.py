@@ -1,41 +1,203 @@
 import pygame
 import copy
+import functools
 from const import *
 from core.pieces import King, Queen, Bishop, Rook, Knight, Pawn
 from .move import Move
 from .square import Square
+from .bitboard import Bitboards
+from .zobrist import piece_key, castling_rights, compute_key, compute_pawn_key
+from .psqt import PSQT, PHASE, compute_totals
+
+
+@functools.lru_cache(maxsize=None)
+def load_image(path):
+    """Ảnh quân cờ, chỉ đọc từ đĩa một lần cho mỗi tệp (vòng lặp giao diện vẽ lại ở mỗi khung hình)."""
+    return pygame.image.load(path)
+
 
 class Board:
     """
     Quản lý trạng thái bàn cờ và các thao tác liên quan.
     """
-    def __init__(self):
+    def __init__(self, use_bitboards=USE_BITBOARDS, setup=True, debug_zobrist=DEBUG_ZOBRIST):
         self.squares = []  # Mảng 2D đại diện cho các ô vuông
+        self.cells = []  # Danh sách phẳng 64 ô (chỉ số row * 8 + col), dùng chung đối tượng với squares
+        self.bitboards = Bitboards() if use_bitboards else None  # Bitboard đồng bộ với squares (None nếu tắt)
+        self.piece_squares = {'white': set(), 'black': set()}  # Chỉ số các ô đang có quân theo màu
+        self.king_squares = {'white': None, 'black': None}  # Chỉ số ô của Vua theo màu
         self.selected_square = None  # Ô được chọn
         self.hovered_sqr = None  # Ô đang được di chuột qua
-        self.last_move = None  # Lưu nước đi cuối cùng
         self.highlighted_moves = []  # Lưu các ô được tô sáng (nước đi hợp lệ)
+        self.history = []  # Ngăn xếp bản ghi hoàn tác của các nước đã đi (xem Move.make)
+        self.en_passant = None  # Chỉ số ô (row * 8 + col) có thể bắt tốt qua đường ở nước tiếp theo
+        self.turn = 'white'  # Bên đi nước tiếp theo
+        self.castling = 0  # Quyền nhập thành dạng bit (xem core.zobrist), suy ra từ cờ moved của Vua và Xe
+        self.zobrist_key = 0  # Khóa Zobrist của vị trí, cập nhật tăng dần
+        self.pawn_key = 0  # Khóa Zobrist chỉ gồm các quân Tốt (cho bảng băm cấu trúc Tốt)
+        self.psqt = {'white': 0, 'black': 0}  # Tổng điểm quân + vị trí theo màu (đóng gói trung/tàn cuộc, xem core.psqt)
+        self.phase = 0  # Giai đoạn ván cờ: tổng trọng số giai đoạn của các quân trên bàn
+        self.codes = bytearray(64)  # Mã quân theo ô (0: trống, 1 + psqt_index // 64), dùng cho đánh giá theo lô
+        self.debug_zobrist = debug_zobrist  # Tính lại khóa từ đầu sau mỗi nước đi để kiểm tra
         self._create_squares()  # Tạo các ô vuông
-        self._add_pieces('white')  # Thêm quân trắng
-        self._add_pieces('black')  # Thêm quân đen
+        if setup:
+            self._add_pieces('white')  # Thêm quân trắng
+            self._add_pieces('black')  # Thêm quân đen
+            self.reset_hash()
 
     def _create_squares(self):
         """
         Tạo mảng 2D 8x8 đại diện cho các ô vuông.
         """
         self.squares = [[Square(row, col) for col in range(COLS)] for row in range(ROWS)]
+        self.cells = [square for row in self.squares for square in row]
+
+    def place_piece(self, row, col, piece):
+        """
+        Đặt quân cờ vào ô (row, col), thay thế quân đang đứng ở đó (nếu có).
+        """
+        square = self.squares[row][col]
+        if square.piece:
+            self.remove_piece_at(row * 8 + col)
+        self.place_piece_at(row * 8 + col, piece)
+
+    def remove_piece(self, row, col):
+        """
+        Xóa quân cờ khỏi ô (row, col).
+        :return: Quân cờ bị xóa (hoặc None nếu ô trống).
+        """
+        return self.remove_piece_at(row * 8 + col)
+
+    def place_piece_at(self, sq, piece):
+        """
+        Đặt quân cờ vào ô trống có chỉ số sq.
+        Mọi thay đổi vị trí quân phải đi qua đây hoặc remove_piece_at để giữ bitboard,
+        danh sách quân, ô của Vua, khóa Zobrist và tổng điểm quân + vị trí đồng bộ.
+        """
+        if self.bitboards is not None:
+            self.bitboards.add(sq, piece)
+        self.piece_squares[piece.color].add(sq)
+        if piece.name == 'king':
+            self.king_squares[piece.color] = sq
+        key = piece_key(piece, sq)
+        self.zobrist_key ^= key
+        if piece.name == 'pawn':
+            self.pawn_key ^= key
+        index = piece.psqt_index
+        self.psqt[piece.color] += PSQT[index + sq]
+        self.phase += PHASE[index >> 6]
+        self.codes[sq] = (index >> 6) + 1
+        self.cells[sq].piece = piece
+
+    def remove_piece_at(self, sq):
+        """
+        Xóa quân cờ khỏi ô có chỉ số sq.
+        :return: Quân cờ bị xóa (hoặc None nếu ô trống).
+        """
+        square = self.cells[sq]
+        piece = square.piece
+        if piece is not None:
+            if self.bitboards is not None:
+                self.bitboards.remove(sq, piece)
+            self.piece_squares[piece.color].discard(sq)
+            if piece.name == 'king':
+                self.king_squares[piece.color] = None
+            key = piece_key(piece, sq)
+            self.zobrist_key ^= key
+            if piece.name == 'pawn':
+                self.pawn_key ^= key
+            index = piece.psqt_index
+            self.psqt[piece.color] -= PSQT[index + sq]
+            self.phase -= PHASE[index >> 6]
+            self.codes[sq] = 0
+            square.piece = None
+        return piece
+
+    def reset_hash(self):
+        """
+        Tính lại quyền nhập thành và khóa Zobrist từ đầu.
+        Gọi sau khi sửa trực tiếp vị trí, lượt đi hoặc cờ moved (ví dụ khi dựng bàn cờ).
+        """
+        self.castling = castling_rights(self)
+        self.zobrist_key = compute_key(self)
+
+    def verify_zobrist(self):
+        """
+        Kiểm tra khóa Zobrist tăng dần so với khóa tính lại từ đầu (chế độ debug_zobrist).
+        """
+        expected = compute_key(self)
+        if self.zobrist_key != expected or self.castling != castling_rights(self):
+            raise ValueError(
+                f"Zobrist key mismatch: incremental {self.zobrist_key:#018x}, recomputed {expected:#018x}."
+            )
+        if self.pawn_key != compute_pawn_key(self):
+            raise ValueError(
+                f"Pawn key mismatch: incremental {self.pawn_key:#018x}, recomputed {compute_pawn_key(self):#018x}."
+            )
+
+    def verify_evaluation(self):
+        """
+        Kiểm tra điểm quân + vị trí, giai đoạn và mảng mã quân tăng dần so với giá trị tính lại
+        từ đầu.
+        """
+        psqt, phase = compute_totals(self)
+        if self.psqt != psqt or self.phase != phase:
+            raise ValueError(
+                f"Incremental evaluation mismatch: psqt {self.psqt} / phase {self.phase}, "
+                f"recomputed {psqt} / {phase}."
+            )
+        codes = bytearray(64)
+        for square in self.cells:
+            if square.piece:
+                codes[square.row * 8 + square.col] = (square.piece.psqt_index >> 6) + 1
+        if self.codes != codes:
+            raise ValueError("Incremental piece code array does not match the board.")
+
+    @property
+    def last_move(self):
+        """
+        Nước đi cuối cùng (đối tượng Move tạo từ bản ghi hoàn tác trên cùng), hoặc None.
+        """
+        if not self.history:
+            return None
+        return Move.from_code(self.history[-1][0])
+
+    def get_piece_at(self, position):
+        """
+        Lấy quân cờ tại vị trí (row, col).
+        """
+        row, col = position
+        return self.squares[row][col].piece
+
+    def get_king(self, color):
+        """
+        Tìm ô chứa quân Vua của một màu.
+        :return: Đối tượng Square hoặc None nếu không tìm thấy.
+        """
+        king_sq = self.king_squares[color]
+        return self.cells[king_sq] if king_sq is not None else None
+
+    @staticmethod
+    def is_valid(row, col):
+        """
+        Kiểm tra tọa độ có nằm trong bàn cờ không.
+        """
+        return 0 <= row < ROWS and 0 <= col < COLS
 
     def move_piece(self, move):
         """
         Di chuyển quân cờ từ ô bắt đầu đến ô kết thúc.
         """
-        initial_square = self.squares[move.initial.row][move.initial.col]
-        final_square = self.squares[move.final.row][move.final.col]
-
-        piece = initial_square.piece
+        piece = self.squares[move.initial.row][move.initial.col].piece
         if piece:
-            move.apply(self)  # Gọi phương thức apply của Move
-            self.last_move = move  # Lưu nước đi cuối cùng
+            move.apply(self)  # Gọi phương thức apply của Move (đồng thời lưu nước đi cuối cùng)
+
+    def undo_move(self):
+        """
+        Hoàn tác nước đi cuối cùng.
+        """
+        if self.history:
+            Move.unmake(self)
 
     def highlight_selected_square(self, row, col):
         """
@@ -85,7 +247,7 @@ class Board:
 
                     # Hiển thị quân cờ
                     piece.set_texture(size=80)
-                    img = pygame.image.load(piece.texture)
+                    img = load_image(piece.texture)
                     img_center = (col * SQ_SIZE + SQ_SIZE // 2, row * SQ_SIZE + SQ_SIZE // 2)
                     piece.texture_rect = img.get_rect(center=img_center)
                     surface.blit(img, piece.texture_rect)
@@ -125,18 +287,87 @@ class Board:
 
         # Thêm quân Tốt
         for col in range(COLS):
-            self.squares[row_pawn][col].piece = Pawn(color)
+            self.place_piece(row_pawn, col, Pawn(color))
 
         # Thêm các quân chính
         piece_order = [Rook, Knight, Bishop, Queen, King, Bishop, Knight, Rook]
         for col, piece_cls in enumerate(piece_order):
-            self.squares[row_other][col].piece = piece_cls(color)
+            self.place_piece(row_other, col, piece_cls(color))
 
     def copy(self):
         """
-        Tạo bản sao bàn cờ.
+        Tạo bản sao bàn cờ (chỉ sao chép vị trí, không sao chép lịch sử hoàn tác).
+        Tìm kiếm nên dùng Move.apply/Move.undo thay vì sao chép bàn cờ.
         """
-        new_board = Board()
-        new_board.squares = copy.deepcopy(self.squares)
-        new_board.last_move = copy.deepcopy(self.last_move)
+        new_board = Board(use_bitboards=self.bitboards is not None, setup=False)
+        for square in self.cells:
+            if square.piece:
+                piece = copy.copy(square.piece)
+                piece.moves = []
+                new_board.place_piece(square.row, square.col, piece)
+        new_board.en_passant = self.en_passant
+        new_board.turn = self.turn
+        new_board.debug_zobrist = self.debug_zobrist
+        new_board.reset_hash()
         return new_board
+
+    @classmethod
+    def from_fen(cls, fen, use_bitboards=USE_BITBOARDS):
+        """
+        Tạo bàn cờ từ chuỗi FEN (dùng cho kiểm thử và đo hiệu năng).
+        Quyền nhập thành được biểu diễn qua cờ moved của Vua và Xe.
+        """
+        placement, turn, castling, en_passant = fen.split()[:4]
+        piece_classes = {'p': Pawn, 'n': Knight, 'b': Bishop, 'r': Rook, 'q': Queen, 'k': King}
+
+        board = cls(use_bitboards=use_bitboards, setup=False)
+        for row, rank in enumerate(placement.split('/')):
+            col = 0
+            for char in rank:
+                if char.isdigit():
+                    col += int(char)
+                    continue
+                color = 'white' if char.isupper() else 'black'
+                piece = piece_classes[char.lower()](color)
+                # Tốt rời hàng xuất phát thì mất quyền đi 2 ô; Vua/Xe mặc định mất quyền nhập thành
+                piece.moved = piece.name != 'pawn' or row != (6 if color == 'white' else 1)
+                board.place_piece(row, col, piece)
+                col += 1
+
+        for char, (row, rook_col) in {'K': (7, 7), 'Q': (7, 0), 'k': (0, 7), 'q': (0, 0)}.items():
+            king, rook = board.squares[row][4].piece, board.squares[row][rook_col].piece
+            if char in castling and isinstance(king, King) and isinstance(rook, Rook):
+                king.moved = False
+                rook.moved = False
+
+        board.turn = 'white' if turn == 'w' else 'black'
+        if en_passant != '-':
+            board.en_passant = (8 - int(en_passant[1])) * 8 + ord(en_passant[0]) - ord('a')
+        board.reset_hash()
+        return board
+
+    def to_fen(self):
+        """
+        Xuất vị trí hiện tại thành chuỗi FEN (số nước đi không được theo dõi nên luôn là "0 1").
+        """
+        letters = {'pawn': 'p', 'knight': 'n', 'bishop': 'b', 'rook': 'r', 'queen': 'q', 'king': 'k'}
+        ranks = []
+        for row in self.squares:
+            rank, empty = '', 0
+            for square in row:
+                if square.piece is None:
+                    empty += 1
+                    continue
+                if empty:
+                    rank += str(empty)
+                    empty = 0
+                letter = letters[square.piece.name]
+                rank += letter.upper() if square.piece.color == 'white' else letter
+            ranks.append(rank + (str(empty) if empty else ''))
+
+        castling = ''.join(char for bit, char in zip((1, 2, 4, 8), 'KQkq') if self.castling & bit) or '-'
+        if self.en_passant is None:
+            en_passant = '-'
+        else:
+            en_passant = 'abcdefgh'[self.en_passant & 7] + str(8 - (self.en_passant >> 3))
+        return f"{'/'.join(ranks)} {'w' if self.turn == 'white' else 'b'} {castling} {en_passant} 0 1"
@@ -1,11 +1,23 @@
 import copy
-from const import ROWS, COLS
-from core.pieces.pawn import Pawn
+from core.pieces.pawn import Pawn, add_pawn_codes
 from core.pieces.king import King
 from core.pieces.rook import Rook
 from .square import Square
+from .attack_tables import (
+    SQUARE_COORDS, KNIGHT_TARGETS, KING_TARGETS, PAWN_ATTACKS, RAYS, STRAIGHT, DIAGONAL,
+    KNIGHT_MASKS, KING_MASKS, PAWN_ATTACK_MASKS, STRAIGHT_MASKS, DIAGONAL_MASKS, ROOK_LINES, BISHOP_LINES,
+    sliding_attacks
+)
+from .bitboard import WHITE, BLACK, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, FULL_BOARD, bit_squares, squares_mask
+from .move import Move
+from .move_encoding import EN_PASSANT, CAPTURE, is_castling
 from contextlib import contextmanager
+from array import array
 
+SLIDERS = ((STRAIGHT, ('rook', 'queen')), (DIAGONAL, ('bishop', 'queen')))
+
+# Loại nước đi cần sinh: tất cả, chỉ nước "ồn" (bắt quân, phong cấp) hoặc chỉ nước yên lặng
+ALL_MOVES, CAPTURES, QUIETS = 'all', 'captures', 'quiets'
 
 class GameRule:
     def __init__(self, board):
@@ -28,18 +40,22 @@ class GameRule:
         return piece.color == current_player_color
     
 
-    def set_en_passant(self, move):
-        """Cập nhật trạng thái en passant cho quân Tốt."""
-        for row in range(ROWS):
-            for col in range(COLS):
-                square = self.board.squares[row][col]
-                if isinstance(square.piece, Pawn):
-                    square.piece.en_passant = False
+    @contextmanager
+    def simulate_move_in_place(self, move):
+        """
+        Thử một nước đi ngay trên bàn cờ hiện tại rồi hoàn tác khi thoát khỏi khối with.
+        Dùng make/unmake (Move.make/Move.unmake) nên không cần sao chép bàn cờ.
+        :param move: Nước đi cần thử (mã số nguyên hoặc đối tượng Move; None thì không làm gì).
+        """
+        if move is None:
+            yield
+            return
 
-        # Nếu quân Tốt đi 2 ô, bật trạng thái en passant
-        piece = self.board.squares[move.initial.row][move.initial.col].piece
-        if isinstance(piece, Pawn) and abs(move.final.row - move.initial.row) == 2:
-            piece.en_passant = True
+        Move.make(self.board, move if isinstance(move, int) else move.to_code(self.board))
+        try:
+            yield
+        finally:
+            Move.unmake(self.board)
 
     def in_check(self, color, move=None):
         """
@@ -49,57 +65,338 @@ class GameRule:
         :return: True nếu bị chiếu, ngược lại False.
         """
         with self.simulate_move_in_place(move):
-            king_position = self.get_king_position(color)
+            king_sq = self.board.king_squares[color]
 
-            if king_position is None:
+            if king_sq is None:
                 raise ValueError(f"King for color '{color}' not found on the board.")
 
-            # Kiểm tra xem có quân nào tấn công vua
-            for row in range(ROWS):
-                for col in range(COLS):
-                    square = self.board.squares[row][col]
-                    if square.has_enemy_piece(color):
-                        piece = square.piece
-                        piece.calc_moves(row, col, self.board, self, validate=False)
-                        if any(
-                            m.final.row == king_position[0] and m.final.col == king_position[1]
-                            for m in piece.moves
-                        ):
+            return self._is_attacked(king_sq, 'black' if color == 'white' else 'white')
+
+    def is_square_attacked(self, square, by_color):
+        """
+        Kiểm tra xem một ô có bị quân của màu `by_color` tấn công không.
+        Dò ngược từ ô cần kiểm tra: các ô Tốt, Mã, Vua có thể tấn công nó và
+        các tia thẳng/chéo tới quân chắn đầu tiên, thay vì sinh nước đi của đối phương.
+        :param square: Vị trí (row, col) cần kiểm tra.
+        :param by_color: Màu của bên tấn công.
+        :return: True nếu ô bị tấn công, ngược lại False.
+        """
+        return self._is_attacked(square[0] * 8 + square[1], by_color)
+
+    def _is_attacked(self, sq, by_color, ignore=None):
+        """
+        Như is_square_attacked nhưng nhận chỉ số ô sq = row * 8 + col.
+        :param ignore: Ô được coi là trống khi dò tia quân trượt (ô cũ của Vua khi kiểm tra
+                       nước đi của Vua), không cần nhấc quân khỏi bàn cờ.
+        """
+        if self.board.bitboards is not None:
+            return self._is_attacked_bitboard(sq, by_color, ignore)
+
+        cells = self.board.cells
+
+        # Tốt tấn công ô sq đứng ở các ô mà Tốt bên kia đứng ở sq sẽ tấn công
+        for target in PAWN_ATTACKS[BLACK if by_color == 'white' else WHITE][sq]:
+            piece = cells[target].piece
+            if piece and piece.color == by_color and piece.name == 'pawn':
+                return True
+
+        for targets, name in ((KNIGHT_TARGETS, 'knight'), (KING_TARGETS, 'king')):
+            for target in targets[sq]:
+                piece = cells[target].piece
+                if piece and piece.color == by_color and piece.name == name:
+                    return True
+
+        # Quân trượt: chỉ quân chắn đầu tiên trên mỗi tia mới có thể tấn công
+        for directions, names in SLIDERS:
+            for direction in directions:
+                for target in RAYS[direction][sq]:
+                    piece = cells[target].piece
+                    if piece and target != ignore:
+                        if piece.color == by_color and piece.name in names:
                             return True
+                        break
         return False
 
+    def _is_attacked_bitboard(self, sq, by_color, ignore=None):
+        """
+        Phiên bản bitboard của is_square_attacked (dùng khi bàn cờ bật bitboard).
+        """
+        bitboards = self.board.bitboards
+        attacker = WHITE if by_color == 'white' else BLACK
+        pieces = bitboards.pieces[attacker]
+
+        if PAWN_ATTACK_MASKS[1 - attacker][sq] & pieces[PAWN]:
+            return True
+        if KNIGHT_MASKS[sq] & pieces[KNIGHT] or KING_MASKS[sq] & pieces[KING]:
+            return True
+
+        occupied = bitboards.occupied
+        if ignore is not None:
+            occupied &= ~(1 << ignore)
+        sliders = (pieces[ROOK] | pieces[QUEEN]) & STRAIGHT_MASKS[sq]  # Chỉ quân trượt cùng hàng/cột mới cần tra bảng
+        if sliders and sliding_attacks(sq, occupied, ROOK_LINES) & sliders:
+            return True
+        sliders = (pieces[BISHOP] | pieces[QUEEN]) & DIAGONAL_MASKS[sq]
+        return bool(sliders and sliding_attacks(sq, occupied, BISHOP_LINES) & sliders)
+
     def get_king_position(self, color):
         """Tìm vị trí của quân vua."""
-        for row in range(ROWS):
-            for col in range(COLS):
-                square = self.board.squares[row][col]
-                if square.has_piece() and isinstance(square.piece, King) and square.piece.color == color:
-                    return square.row, square.col
-        return None
+        king_sq = self.board.king_squares[color]
+        if king_sq is None:
+            return None
+        return SQUARE_COORDS[king_sq]
 
-    def calculate_all_moves(self, color, validate=True):
+    def calculate_all_moves(self, color, validate=True, output='moves'):
         """
         Tính toán tất cả các nước đi cho người chơi.
         :param color: Màu sắc của người chơi.
         :param validate: Kiểm tra tính hợp lệ của nước đi.
-        :return: Danh sách các nước đi hợp lệ.
+        :param output: 'moves' trả về danh sách Move (đồng thời cập nhật piece.moves cho giao diện),
+                       'codes' trả về danh sách mã số nguyên, 'array' trả về array('H') các mã.
+        :return: Danh sách các nước đi.
         """
+        codes = self._calculate_legal_codes(color) if validate else self._calculate_pseudo_codes(color)
+
+        if output == 'codes':
+            return codes
+        if output == 'array':
+            return array('H', codes)
+
+        # Ranh giới giao diện: tạo đối tượng Move và gán cho từng quân
+        cells = self.board.cells
+        for sq in self.board.piece_squares[color]:
+            cells[sq].piece.clear_moves()
         moves = []
-        for row in range(ROWS):
-            for col in range(COLS):
-                square = self.board.squares[row][col]
-                if square.has_team_piece(color):
-                    piece = square.piece
-                    piece.clear_moves()
-                    piece.calc_moves(row, col, self.board, self)
-
-                    if validate:
-                        piece.moves = [
-                            move for move in piece.moves if not self.in_check(color, move)
-                        ]
-                    moves.extend(piece.moves)
+        for code in codes:
+            move = Move.from_code(code, self.board)
+            cells[code & 63].piece.add_move(move)
+            moves.append(move)
         return moves
-    
+
+    def _calculate_pseudo_codes(self, color):
+        """
+        Sinh các nước đi giả hợp lệ (chưa kiểm tra Vua bị chiếu) dạng mã số nguyên.
+        """
+        codes = []
+        board = self.board
+        cells = board.cells
+        for sq in tuple(board.piece_squares[color]):
+            cells[sq].piece.gen_codes(sq, board, self, codes)
+        return codes
+
+    def _calculate_legal_codes(self, color, kind=ALL_MOVES):
+        """
+        Sinh trực tiếp các nước đi hợp lệ: tính các quân đang chiếu và các quân bị ghim
+        một lần cho cả vị trí, sau đó lọc nước đi giả hợp lệ của từng quân mà không cần
+        thử từng nước (trừ bắt tốt qua đường, trường hợp hiếm được kiểm tra bằng mô phỏng).
+        :param kind: ALL_MOVES, CAPTURES (bắt quân và phong cấp) hoặc QUIETS (phần còn lại);
+                     nước không thuộc loại được bỏ qua trước khi kiểm tra tính hợp lệ.
+        """
+        board = self.board
+        enemy_color = 'black' if color == 'white' else 'white'
+        king_sq = board.king_squares[color]
+        if king_sq is None:
+            raise ValueError(f"King for color '{color}' not found on the board.")
+
+        checkers, evasion_squares, pins = self._find_checkers_and_pins(king_sq, color)
+        double_check = len(checkers) > 1
+
+        # Cờ nước đi >= CAPTURE là nước "ồn" (bắt quân, bắt tốt qua đường, phong cấp)
+        noisy = None if kind == ALL_MOVES else kind == CAPTURES
+
+        if board.bitboards is not None:
+            return self._calculate_legal_codes_bitboard(color, king_sq, checkers, evasion_squares, pins, noisy)
+
+        legal_codes = []
+        pseudo_codes = []
+        cells = board.cells
+        # Sao chép tập ô vì kiểm tra bắt tốt qua đường (in_check với nước đi) tạm đi nước đó trên bàn cờ
+        for sq in tuple(board.piece_squares[color]):
+            piece = cells[sq].piece
+            if sq == king_sq:
+                pseudo_codes.clear()
+                piece.gen_codes(sq, board, self, pseudo_codes)
+                legal_codes.extend(
+                    code for code in pseudo_codes
+                    if (noisy is None or (code >> 12 >= CAPTURE) == noisy)
+                    and self._is_safe_king_move(code, enemy_color, checkers)
+                )
+                continue
+            if double_check:
+                continue  # Chiếu đôi: chỉ Vua được di chuyển
+
+            pseudo_codes.clear()
+            piece.gen_codes(sq, board, self, pseudo_codes)
+            pin_ray = pins.get(sq)
+            for code in pseudo_codes:
+                if noisy is not None and (code >> 12 >= CAPTURE) != noisy:
+                    continue
+                target = (code >> 6) & 63
+                if code >> 12 == EN_PASSANT:
+                    if not self.in_check(color, code):
+                        legal_codes.append(code)
+                elif (pin_ray is None or target in pin_ray) and (not checkers or target in evasion_squares):
+                    legal_codes.append(code)
+        return legal_codes
+
+    def _calculate_legal_codes_bitboard(self, color, king_sq, checkers, evasion_squares, pins, noisy):
+        """
+        Phiên bản bitboard của _calculate_legal_codes (dùng khi bàn cờ bật bitboard): ghim, chặn
+        chiếu và loại nước được áp dụng như mặt nạ lên bitboard ô bị tấn công của từng quân
+        (attacks) trước khi sinh mã, Tốt không bị ghim được sinh cùng lúc bằng phép dịch.
+        :param noisy: None (mọi nước), True (CAPTURES) hoặc False (QUIETS).
+        """
+        board = self.board
+        bitboards = board.bitboards
+        cells = board.cells
+        enemy_color = 'black' if color == 'white' else 'white'
+        us = WHITE if color == 'white' else BLACK
+
+        pseudo_codes = []
+        cells[king_sq].piece.gen_codes(king_sq, board, self, pseudo_codes)
+        legal_codes = [
+            code for code in pseudo_codes
+            if (noisy is None or (code >> 12 >= CAPTURE) == noisy)
+            and self._is_safe_king_move(code, enemy_color, checkers)
+        ]
+        if len(checkers) > 1:
+            return legal_codes  # Chiếu đôi: chỉ Vua được di chuyển
+
+        occupied = bitboards.occupied
+        allowed = squares_mask(evasion_squares) if checkers else FULL_BOARD
+        piece_allowed = allowed
+        if noisy is not None:
+            piece_allowed &= bitboards.colors[1 - us] if noisy else ~occupied
+        pinned = squares_mask(pins)
+        free_pawns = bitboards.pieces[us][PAWN] & ~pinned
+
+        for sq in bit_squares(bitboards.colors[us] & ~free_pawns & ~(1 << king_sq)):
+            piece = cells[sq].piece
+            pin_ray = pins.get(sq)
+            if piece.name != 'pawn':
+                targets = piece.attacks(sq, occupied) & piece_allowed
+                if pin_ray is not None:
+                    targets &= squares_mask(pin_ray)
+                piece.add_target_codes(sq, targets, bitboards, legal_codes)
+                continue
+
+            # Tốt bị ghim: sinh nước giả hợp lệ rồi lọc như bản không dùng bitboard
+            pseudo_codes.clear()
+            piece.gen_codes(sq, board, self, pseudo_codes)
+            for code in pseudo_codes:
+                if noisy is not None and (code >> 12 >= CAPTURE) != noisy:
+                    continue
+                target = (code >> 6) & 63
+                if code >> 12 == EN_PASSANT:
+                    if not self.in_check(color, code):
+                        legal_codes.append(code)
+                elif target in pin_ray and (not checkers or target in evasion_squares):
+                    legal_codes.append(code)
+
+        if free_pawns:
+            add_pawn_codes(us, free_pawns, bitboards, allowed, noisy, legal_codes)
+            en_passant = board.en_passant
+            if en_passant is not None and noisy is not False:
+                # Hiếm gặp: kiểm tra bằng mô phỏng (bắt tốt qua đường có thể mở đường chiếu ngang)
+                victim = cells[(en_passant & 7) | (24 if us == WHITE else 32)].piece
+                if victim is not None and victim.color == enemy_color:
+                    for sq in bit_squares(PAWN_ATTACK_MASKS[1 - us][en_passant] & free_pawns):
+                        code = sq | en_passant << 6 | EN_PASSANT << 12
+                        if not self.in_check(color, code):
+                            legal_codes.append(code)
+        return legal_codes
+
+    def _find_checkers_and_pins(self, king_sq, color):
+        """
+        Tìm các quân đang chiếu Vua và các quân bị ghim tuyệt đối.
+        :param king_sq: Chỉ số ô của Vua.
+        :param color: Màu của Vua.
+        :return: (danh sách ô của quân chiếu,
+                  tập ô mà quân khác có thể đi tới để chặn/bắt khi bị chiếu đơn,
+                  dict ô quân bị ghim -> tập ô trên tia ghim mà nó được phép đi tới).
+        """
+        cells = self.board.cells
+        checkers = []
+        evasion_squares = set()
+        pins = {}
+
+        # Tốt và Mã chỉ có thể chiếu, không thể ghim
+        for targets, name in ((PAWN_ATTACKS[WHITE if color == 'white' else BLACK], 'pawn'), (KNIGHT_TARGETS, 'knight')):
+            for target in targets[king_sq]:
+                piece = cells[target].piece
+                if piece and piece.color != color and piece.name == name:
+                    checkers.append(target)
+                    evasion_squares.add(target)
+
+        # Quân trượt: dò từng tia từ Vua, ghi nhận quân đồng minh đầu tiên (ứng viên bị ghim)
+        for directions, names in SLIDERS:
+            for direction in directions:
+                ray = RAYS[direction][king_sq]
+                blocker = None
+                for index, target in enumerate(ray):
+                    piece = cells[target].piece
+                    if piece:
+                        if piece.color == color:
+                            if blocker is not None:
+                                break  # Hai quân đồng minh chắn: không có ghim
+                            blocker = target
+                        else:
+                            if piece.name in names:
+                                if blocker is None:
+                                    checkers.append(target)
+                                    evasion_squares.update(ray[:index + 1])
+                                else:
+                                    pins[blocker] = set(ray[:index + 1])
+                            break
+        return checkers, evasion_squares, pins
+
+    def _is_safe_king_move(self, code, enemy_color, checkers):
+        """
+        Kiểm tra nước đi của Vua bằng bản đồ tấn công (ô cũ của Vua được coi là trống để
+        các tia của quân trượt đi xuyên qua nó; bàn cờ không bị thay đổi).
+        """
+        if is_castling(code):
+            return not checkers  # Các ô đi qua đã được kiểm tra khi sinh nước nhập thành
+
+        return not self._is_attacked((code >> 6) & 63, enemy_color, ignore=code & 63)
+
+    def generate_moves(self, color, kind=ALL_MOVES):
+        """
+        Sinh danh sách nước đi hợp lệ dạng mã số nguyên cho một màu (dùng cho AI).
+        Dùng calculate_all_moves(color) khi cần đối tượng Move cho giao diện.
+        :param kind: ALL_MOVES, CAPTURES hoặc QUIETS.
+        """
+        return self._calculate_legal_codes(color, kind)
+
+    def is_legal_move(self, code, color):
+        """
+        Kiểm tra một mã nước đi lấy từ nơi khác (bảng băm, nước sát thủ) có hợp lệ
+        trong vị trí hiện tại không, mà không sinh nước đi của cả bàn cờ.
+        """
+        from_sq = code & 63
+        piece = self.board.cells[from_sq].piece
+        if piece is None or piece.color != color:
+            return False
+        codes = []
+        piece.gen_codes(from_sq, self.board, self, codes)
+        return code in codes and not self.in_check(color, code)
+
+    def is_checkmate(self, color):
+        """
+        Kiểm tra xem người chơi có bị chiếu hết không.
+        """
+        return self.in_check(color) and not self._calculate_legal_codes(color)
+
+    def is_stalemate(self, color):
+        """
+        Kiểm tra xem người chơi có bị hết nước đi (hòa) không.
+        """
+        return not self.in_check(color) and not self._calculate_legal_codes(color)
+
+    def next_turn(self):
+        """Chuyển lượt chơi."""
+        self.next_player = 'black' if self.next_player == 'white' else 'white'
+
     def _is_within_bounds(self, position):
         """
         Kiểm tra xem vị trí có nằm trong bàn cờ không.
@@ -1,110 +1,233 @@
-from core.pieces.queen import Queen
+from .square import Square
+from .zobrist import SIDE_KEY, CASTLING_KEYS, EN_PASSANT_KEYS, castling_rights
+from .move_encoding import (
+    QUIET, DOUBLE_PUSH, KING_CASTLE, QUEEN_CASTLE, CAPTURE, EN_PASSANT, PROMOTION,
+    CAPTURE_BIT, PROMOTION_BIT, PROMOTION_PIECES, PROMOTION_FLAGS, NULL_MOVE, encode
+)
 
+SPECIAL_RULES = {KING_CASTLE: 'castling', QUEEN_CASTLE: 'castling', EN_PASSANT: 'en_passant'}
 
 
 class Move:
     """
     Đại diện cho một nước đi trên bàn cờ, bao gồm xử lý các quy tắc đặc biệt.
+
+    Bên trong, nước đi được mã hóa thành số nguyên (xem core.move_encoding) và
+    Move.make/Move.unmake làm việc trực tiếp trên mã đó. Đối tượng Move chỉ là lớp
+    hiển thị mỏng được tạo ở ranh giới giao diện/Player.
     """
-    def __init__(self, initial, final, captured_piece=None, special_rule=None):
+    def __init__(self, initial, final, captured_piece=None, special_rule=None, promotion=None):
         self.initial = initial
         self.final = final
         self.captured_piece = captured_piece
         self.special_rule = special_rule
+        self.promotion = promotion  # Tên quân phong cấp (mặc định Hậu nếu là nước phong cấp)
 
-    def apply(self, board):
+    def __eq__(self, other):
+        return isinstance(other, Move) and self.initial == other.initial and self.final == other.final
+
+    def __hash__(self):
+        return hash((self.initial.row, self.initial.col, self.final.row, self.final.col))
+
+    def __repr__(self):
+        return f"Move(({self.initial.row}, {self.initial.col}) -> ({self.final.row}, {self.final.col}))"
+
+    @classmethod
+    def from_code(cls, code, board=None):
         """
-        Áp dụng nước đi trên bàn cờ.
+        Tạo đối tượng Move từ mã số nguyên.
+        :param board: Bàn cờ (trước khi đi) để điền quân bị bắt vào ô đích, có thể bỏ qua.
         """
-        piece = board.squares[self.initial.row][self.initial.col].piece
-
-        if self.special_rule == 'castling':
-            self._apply_castling(board)
-        elif self.special_rule == 'en_passant':
-            self._apply_en_passant(board)
-        elif self.special_rule == 'promotion':
-            self._apply_promotion(board, piece)
+        from_sq, to_sq, flag = code & 63, (code >> 6) & 63, code >> 12
+        captured_piece = board.cells[to_sq].piece if board is not None else None
+        if flag & PROMOTION_BIT:
+            special_rule, promotion = 'promotion', PROMOTION_PIECES[flag & 3]
         else:
-            self._apply_normal_move(board, piece)
-
-    def _apply_castling(self, board):
+            special_rule, promotion = SPECIAL_RULES.get(flag), None
+        return cls(
+            Square(from_sq >> 3, from_sq & 7),
+            Square(to_sq >> 3, to_sq & 7, captured_piece),
+            captured_piece,
+            special_rule,
+            promotion
+        )
+
+    def to_code(self, board):
         """
-        Xử lý nước đi nhập thành.
+        Mã hóa nước đi thành số nguyên dựa trên vị trí hiện tại (trước khi đi).
         """
-        king = board.squares[self.initial.row][self.initial.col].piece
-        if self.final.col > self.initial.col:  # Nhập thành cánh vua
-            rook_start = (self.initial.row, 7)
-            rook_end = (self.initial.row, 5)
-        else:  # Nhập thành cánh hậu
-            rook_start = (self.initial.row, 0)
-            rook_end = (self.initial.row, 3)
+        from_sq = self.initial.row * 8 + self.initial.col
+        to_sq = self.final.row * 8 + self.final.col
+        piece = board.cells[from_sq].piece
+        captured = board.cells[to_sq].piece
+        rule = self.special_rule or Move.detect_special_rule(board, piece, self.initial, self.final)
+
+        if rule == 'castling':
+            flag = KING_CASTLE if to_sq > from_sq else QUEEN_CASTLE
+        elif rule == 'en_passant':
+            flag = EN_PASSANT
+        elif rule == 'promotion':
+            flag = PROMOTION | PROMOTION_FLAGS[self.promotion or 'queen'] | (CAPTURE_BIT if captured else 0)
+        elif captured:
+            flag = CAPTURE
+        elif piece.name == 'pawn' and abs(self.final.row - self.initial.row) == 2:
+            flag = DOUBLE_PUSH
+        else:
+            flag = QUIET
+        return encode(from_sq, to_sq, flag)
 
-        rook = board.get_piece_at(rook_start)
-        board.squares[self.final.row][self.final.col].piece = king
-        king.position = (self.final.row, self.final.col)
-        board.squares[self.initial.row][self.initial.col].piece = None
+    @staticmethod
+    def detect_special_rule(board, piece, initial, final):
+        """
+        Suy ra quy tắc đặc biệt ('castling', 'en_passant', 'promotion' hoặc None) từ vị trí,
+        dùng cho nước đi được tạo mà không ghi rõ quy tắc (ví dụ từ giao diện).
+        """
+        if piece.name == 'king' and abs(final.col - initial.col) == 2:
+            return 'castling'
+        if piece.name == 'pawn':
+            if final.row == 0 or final.row == 7:
+                return 'promotion'
+            if final.col != initial.col and board.squares[final.row][final.col].isempty():
+                return 'en_passant'
+        return None
 
-        # Di chuyển Rook
-        board.squares[rook_end[0]][rook_end[1]].piece = rook
-        rook.position = rook_end
-        board.squares[rook_start[0]][rook_start[1]].piece = None
+    def apply(self, board):
+        """
+        Áp dụng nước đi trên bàn cờ (xem Move.make).
+        """
+        Move.make(board, self.to_code(board))
 
-    def _apply_en_passant(self, board):
+    def undo(self, board):
         """
-        Xử lý nước đi bắt chốt qua đường.
+        Hoàn tác nước đi cuối cùng trên bàn cờ (xem Move.unmake).
         """
-        pawn = board.squares[self.initial.row][self.initial.col].piece
-        board.squares[self.final.row][self.final.col].piece = pawn
-        pawn.position = (self.final.row, self.final.col)
-        board.squares[self.initial.row][self.initial.col].piece = None
+        if not board.history or board.history[-1][0] & 0xFFF != self._squares_code():
+            raise ValueError("Chỉ có thể hoàn tác nước đi cuối cùng.")
+        Move.unmake(board)
 
-        # Xóa quân tốt bị bắt
-        capture_row = self.initial.row
-        capture_col = self.final.col
-        board.squares[capture_row][capture_col].piece = None
+    def _squares_code(self):
+        return encode(self.initial.row * 8 + self.initial.col, self.final.row * 8 + self.final.col)
 
-    def _apply_promotion(self, board, piece):
+    @staticmethod
+    def make(board, code):
         """
-        Xử lý phong cấp.
+        Thực hiện nước đi đã mã hóa và lưu bản ghi hoàn tác vào board.history.
+        Bản ghi gồm: (mã nước đi, quân di chuyển, quân bị bắt, cờ moved cũ của quân,
+        cờ moved cũ của Xe nhập thành, ô en passant cũ, quyền nhập thành cũ, khóa Zobrist cũ).
         """
-        board.squares[self.final.row][self.final.col].piece = Queen(piece.color)
-        board.squares[self.initial.row][self.initial.col].piece = None
+        key = board.zobrist_key
+        from_sq, to_sq, flag = code & 63, (code >> 6) & 63, code >> 12
+        piece = board.remove_piece_at(from_sq)
+
+        rook_moved = None
+        if flag == EN_PASSANT:
+            # Tốt bị bắt nằm cùng hàng xuất phát, cùng cột đích
+            captured = board.remove_piece_at((from_sq & ~7) | (to_sq & 7))
+        elif flag == KING_CASTLE or flag == QUEEN_CASTLE:
+            captured = None
+            rook_from, rook_to = (from_sq + 3, from_sq + 1) if flag == KING_CASTLE else (from_sq - 4, from_sq - 1)
+            rook = board.remove_piece_at(rook_from)
+            board.place_piece_at(rook_to, rook)
+            rook_moved = rook.moved
+            rook.moved = True
+        else:
+            captured = board.remove_piece_at(to_sq) if flag & CAPTURE_BIT else None
 
-    def _apply_normal_move(self, board, piece):
+        if flag & PROMOTION_BIT:
+            board.place_piece_at(to_sq, Move._promoted_piece(PROMOTION_PIECES[flag & 3], piece.color))
+        else:
+            board.place_piece_at(to_sq, piece)
+
+        castling = board.castling
+        board.history.append((code, piece, captured, piece.moved, rook_moved, board.en_passant, castling, key))
+
+        # Quyền nhập thành chỉ đổi khi Vua/Xe chưa di chuyển rời ô hoặc Xe bị bắt
+        update_castling = castling and (
+            (not piece.moved and (piece.name == 'king' or piece.name == 'rook'))
+            or (captured is not None and captured.name == 'rook')
+        )
+
+        # Cập nhật trạng thái: quyền nhập thành, ô en passant, lượt đi
+        piece.moved = True
+        if update_castling:
+            board.castling = castling_rights(board)
+        zobrist_key = board.zobrist_key ^ SIDE_KEY ^ CASTLING_KEYS[castling] ^ CASTLING_KEYS[board.castling]
+        if board.en_passant is not None:
+            zobrist_key ^= EN_PASSANT_KEYS[board.en_passant & 7]
+        if flag == DOUBLE_PUSH:
+            board.en_passant = (from_sq + to_sq) >> 1
+            zobrist_key ^= EN_PASSANT_KEYS[to_sq & 7]
+        else:
+            board.en_passant = None
+        board.zobrist_key = zobrist_key
+        board.turn = 'black' if board.turn == 'white' else 'white'
+
+        if board.debug_zobrist:
+            board.verify_zobrist()
+
+    @staticmethod
+    def make_null(board):
         """
-        Áp dụng một nước đi thông thường.
+        Nhường lượt (nước đi rỗng) cho cắt tỉa nước rỗng trong tìm kiếm: chỉ đổi lượt và xóa ô
+        en passant. Bản ghi dùng NULL_MOVE và không có quân nên Move.unmake hoàn tác được như thường.
         """
-        board.squares[self.final.row][self.final.col].piece = piece
-        piece.position = (self.final.row, self.final.col)
-        board.squares[self.initial.row][self.initial.col].piece = None
-
-    def undo(self, board):
+        key = board.zobrist_key
+        board.history.append((NULL_MOVE, None, None, None, None, board.en_passant, board.castling, key))
+        key ^= SIDE_KEY
+        if board.en_passant is not None:
+            key ^= EN_PASSANT_KEYS[board.en_passant & 7]
+            board.en_passant = None
+        board.zobrist_key = key
+        board.turn = 'black' if board.turn == 'white' else 'white'
+
+        if board.debug_zobrist:
+            board.verify_zobrist()
+
+    @staticmethod
+    def unmake(board):
         """
-        Hoàn tác nước đi trên bàn cờ.
+        Hoàn tác nước đi cuối cùng trong board.history, khôi phục chính xác trạng thái trước đó.
         """
-        piece = board.squares[self.final.row][self.final.col].piece
-
-        # Hoàn tác bắt chốt qua đường
-        if self.special_rule == 'en_passant':
-            capture_row = self.initial.row
-            capture_col = self.final.col
-            board.squares[capture_row][capture_col].piece = self.captured_piece
+        code, piece, captured, moved, rook_moved, en_passant, castling, key = board.history.pop()
+        if piece is None:
+            # Nước đi rỗng (Move.make_null): chỉ khôi phục lượt, ô en passant và khóa
+            board.en_passant = en_passant
+            board.zobrist_key = key
+            board.turn = 'black' if board.turn == 'white' else 'white'
+            if board.debug_zobrist:
+                board.verify_zobrist()
+            return
+        from_sq, to_sq, flag = code & 63, (code >> 6) & 63, code >> 12
+
+        # Đưa quân (hoặc Tốt trước khi phong cấp) về ô xuất phát
+        board.remove_piece_at(to_sq)
+        board.place_piece_at(from_sq, piece)
+
+        # Khôi phục quân bị bắt
+        if captured:
+            if flag == EN_PASSANT:
+                board.place_piece_at((from_sq & ~7) | (to_sq & 7), captured)
+            else:
+                board.place_piece_at(to_sq, captured)
 
         # Hoàn tác nhập thành
-        elif self.special_rule == 'castling':
-            if self.final.col > self.initial.col:  # Nhập thành cánh vua
-                rook_start = (self.initial.row, 7)
-                rook_end = (self.initial.row, 5)
-            else:  # Nhập thành cánh hậu
-                rook_start = (self.initial.row, 0)
-                rook_end = (self.initial.row, 3)
-
-            rook = board.get_piece_at(rook_end)
-            board.squares[rook_start[0]][rook_start[1]].piece = rook
-            rook.position = rook_start
-            board.squares[rook_end[0]][rook_end[1]].piece = None
-
-        # Hoàn tác nước đi thông thường
-        board.squares[self.initial.row][self.initial.col].piece = piece
-        board.squares[self.final.row][self.final.col].piece = self.captured_piece
-        piece.position = (self.initial.row, self.initial.col)
+        if flag == KING_CASTLE or flag == QUEEN_CASTLE:
+            rook_from, rook_to = (from_sq + 3, from_sq + 1) if flag == KING_CASTLE else (from_sq - 4, from_sq - 1)
+            rook = board.remove_piece_at(rook_to)
+            board.place_piece_at(rook_from, rook)
+            rook.moved = rook_moved
+
+        piece.moved = moved
+        board.en_passant = en_passant
+        board.castling = castling
+        board.zobrist_key = key  # Khôi phục trực tiếp thay vì XOR ngược từng phần
+        board.turn = 'black' if board.turn == 'white' else 'white'
+
+        if board.debug_zobrist:
+            board.verify_zobrist()
+
+    @staticmethod
+    def _promoted_piece(name, color):
+        from core.pieces import Knight, Bishop, Rook, Queen  # Import muộn để tránh vòng lặp import
+
+        return {'knight': Knight, 'bishop': Bishop, 'rook': Rook, 'queen': Queen}[name](color)
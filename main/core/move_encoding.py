@@ -0,0 +1,80 @@
+"""
+Mã hóa nước đi thành số nguyên 16 bit (vừa với array('H')).
+
+    bit 0-5   : ô xuất phát (sq = row * 8 + col)
+    bit 6-11  : ô đích
+    bit 12-15 : cờ nước đi (xem các hằng số bên dưới)
+
+Cờ có bit 2 là nước bắt quân, bit 3 là phong cấp; với phong cấp, 2 bit thấp chọn quân
+(0 Mã, 1 Tượng, 2 Xe, 3 Hậu).
+"""
+QUIET = 0
+DOUBLE_PUSH = 1
+KING_CASTLE = 2
+QUEEN_CASTLE = 3
+CAPTURE = 4
+EN_PASSANT = 5
+PROMOTION = 8
+PROMOTION_CAPTURE = 12
+
+CAPTURE_BIT = 4
+PROMOTION_BIT = 8
+
+PROMOTION_PIECES = ('knight', 'bishop', 'rook', 'queen')
+PROMOTION_FLAGS = {name: index for index, name in enumerate(PROMOTION_PIECES)}
+
+NULL_MOVE = 0  # a8 -> a8, không bao giờ là nước đi hợp lệ
+
+
+def encode(from_sq, to_sq, flag=QUIET):
+    """Đóng gói nước đi thành số nguyên."""
+    return from_sq | (to_sq << 6) | (flag << 12)
+
+
+def decode(code):
+    """Tách số nguyên thành (ô xuất phát, ô đích, cờ)."""
+    return code & 63, (code >> 6) & 63, code >> 12
+
+
+def from_square(code):
+    return code & 63
+
+
+def to_square(code):
+    return (code >> 6) & 63
+
+
+def move_flag(code):
+    return code >> 12
+
+
+def is_capture(code):
+    return bool((code >> 12) & CAPTURE_BIT)
+
+
+def is_promotion(code):
+    return bool((code >> 12) & PROMOTION_BIT)
+
+
+def is_castling(code):
+    return (code >> 12) in (KING_CASTLE, QUEEN_CASTLE)
+
+
+def promotion_piece(code):
+    """Tên quân được phong cấp, hoặc None nếu không phải nước phong cấp."""
+    flag = code >> 12
+    return PROMOTION_PIECES[flag & 3] if flag & PROMOTION_BIT else None
+
+
+def square_name(sq):
+    """Tên ô theo ký hiệu cờ vua, ví dụ 52 -> 'e2'."""
+    return 'abcdefgh'[sq & 7] + str(8 - (sq >> 3))
+
+
+def to_uci(code):
+    """Chuỗi UCI của nước đi, ví dụ 'e2e4' hoặc 'e7e8q'."""
+    name = square_name(code & 63) + square_name((code >> 6) & 63)
+    promotion = promotion_piece(code)
+    if promotion:
+        name += 'n' if promotion == 'knight' else promotion[0]
+    return name
@@ -0,0 +1,98 @@
+"""
+Perft: đếm số nút của cây nước đi hợp lệ đến một độ sâu cố định.
+
+Dùng để kiểm tra tính đúng đắn của bộ sinh nước đi (so với số nút chuẩn đã biết)
+và đo tốc độ của nó (số nút/giây).
+"""
+import time
+
+from .board import Board
+from .game_rule import GameRule
+from .move import Move
+from .move_encoding import to_uci
+
+# Các vị trí chuẩn (https://www.chessprogramming.org/Perft_Results):
+# tên -> (FEN, số nút kỳ vọng theo độ sâu 1, 2, 3, ...)
+POSITIONS = {
+    'startpos': (
+        'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1',
+        (20, 400, 8902, 197281, 4865609),
+    ),
+    'kiwipete': (
+        'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1',
+        (48, 2039, 97862, 4085603),
+    ),
+    'position3': (
+        '8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1',
+        (14, 191, 2812, 43238, 674624),
+    ),
+    'position4': (
+        'r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1',
+        (6, 264, 9467, 422333),
+    ),
+    'position5': (
+        'rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8',
+        (44, 1486, 62379, 2103487),
+    ),
+    'position6': (
+        'r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10',
+        (46, 2079, 89890, 3894594),
+    ),
+}
+
+
+def perft(game_logic, depth):
+    """
+    Đếm số nút lá ở độ sâu `depth` tính từ vị trí hiện tại (bên đi là board.turn).
+    Ở độ sâu 1 chỉ đếm số nước hợp lệ mà không thực hiện chúng.
+    """
+    board = game_logic.board
+    codes = game_logic.calculate_all_moves(board.turn, output='codes')
+    if depth <= 1:
+        return len(codes) if depth == 1 else 1
+
+    nodes = 0
+    for code in codes:
+        Move.make(board, code)
+        nodes += perft(game_logic, depth - 1)
+        Move.unmake(board)
+    return nodes
+
+
+def divide(game_logic, depth):
+    """
+    Perft tách theo từng nước đi ở gốc, để khoanh vùng nước đi bị đếm sai.
+    :return: Từ điển {nước đi UCI: số nút}.
+    """
+    board = game_logic.board
+    result = {}
+    for code in game_logic.calculate_all_moves(board.turn, output='codes'):
+        Move.make(board, code)
+        result[to_uci(code)] = perft(game_logic, depth - 1)
+        Move.unmake(board)
+    return result
+
+
+def run_position(fen, depth, use_bitboards=None, expected=None):
+    """
+    Chạy perft trên một vị trí FEN và đo thời gian.
+    :param use_bitboards: Bật/tắt bitboard (None: theo const.USE_BITBOARDS).
+    :param expected: Số nút kỳ vọng (nếu có) để đối chiếu.
+    :return: Từ điển kết quả gồm nodes, seconds, nps và passed.
+    """
+    kwargs = {} if use_bitboards is None else {'use_bitboards': use_bitboards}
+    board = Board.from_fen(fen, **kwargs)
+    game_logic = GameRule(board)
+
+    start = time.perf_counter()
+    nodes = perft(game_logic, depth)
+    seconds = time.perf_counter() - start
+    return {
+        'fen': fen,
+        'depth': depth,
+        'nodes': nodes,
+        'expected': expected,
+        'passed': expected is None or nodes == expected,
+        'seconds': seconds,
+        'nps': nodes / seconds if seconds > 0 else 0.0,
+    }
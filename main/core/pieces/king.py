@@ -1,7 +1,7 @@
 from .piece import Piece
-from ..square import Square
-from ..move import Move
 from .rook import Rook
+from ..attack_tables import KING_TARGETS, KING_MASKS
+from ..move_encoding import KING_CASTLE, QUEEN_CASTLE, encode
 
 class King(Piece):  # Kế thừa từ lớp Piece
     def __init__(self, color):
@@ -9,99 +9,59 @@ class King(Piece):  # Kế thừa từ lớp Piece
         self.left_rook = None  # Biến lưu trữ Xe trái
         self.right_rook = None  # Biến lưu trữ Xe phải
 
-    def calc_moves(self, row, col, board, game_logic, validate=True):
+    def attacks(self, sq, occupied):
+        """Bitboard các ô mà quân Vua đứng ở sq tấn công."""
+        return KING_MASKS[sq]
+
+    def gen_codes(self, sq, board, game_logic, codes):
         """
-        Tính toán các nước đi hợp lệ cho quân Vua.
-        :param row: Hàng hiện tại.
-        :param col: Cột hiện tại.
+        Sinh các nước đi giả hợp lệ (dạng mã số nguyên) cho quân Vua.
+        :param sq: Chỉ số ô hiện tại (row * 8 + col).
         :param board: Đối tượng bàn cờ.
         :param game_logic: Đối tượng GameLogic để kiểm tra logic trò chơi.
-        :param validate: Có kiểm tra trạng thái "chiếu" hay không.
+        :param codes: Danh sách nhận các mã nước đi.
         """
-        directions = [
-            (-1, 1), (-1, -1), (1, 1), (1, -1),  # Chéo
-            (0, 1), (0, -1), (-1, 0), (1, 0)    # Thẳng
-        ]
-
-        for row_dir, col_dir in directions:
-            self._add_king_move(row, col, row_dir, col_dir, board, game_logic, validate)
+        # Các ô đích của Vua đã được tính sẵn (kể cả kiểm tra biên)
+        self._add_step_codes(sq, board, codes, KING_TARGETS)
 
         # Xử lý nhập thành nếu Vua chưa di chuyển
         if not self.moved:
-            self._add_castling_moves(row, col, board, game_logic, validate)
-
-    def _add_king_move(self, row, col, row_dir, col_dir, board, game_logic, validate):
-        """
-        Tính toán nước đi cơ bản của quân Vua.
-        """
-        target_row, target_col = row + row_dir, col + col_dir
+            self._add_castling_codes(sq >> 3, sq & 7, board, game_logic, codes)
 
-        if Square.in_range(target_row, target_col):
-            target_square = board.squares[target_row][target_col]
-
-            if target_square.isempty_or_enemy(self.color):
-                initial_square = Square(row, col)
-                final_square = Square(target_row, target_col, target_square.piece)
-                move = Move(initial_square, final_square)
-
-                self._try_add_move(move, game_logic, validate)
-
-    def _add_castling_moves(self, row, col, board, game_logic, validate):
+    def _add_castling_codes(self, row, col, board, game_logic, codes):
         """
         Xử lý nước đi nhập thành cho Vua.
         """
         # Nhập thành trái
-        self._add_castling_move(row, col, board, game_logic, 0, 3, 2, "left", validate)
+        self._add_castling_code(row, col, board, game_logic, 0, 2, QUEEN_CASTLE, "left", codes)
         # Nhập thành phải
-        self._add_castling_move(row, col, board, game_logic, 7, 5, 6, "right", validate)
+        self._add_castling_code(row, col, board, game_logic, 7, 6, KING_CASTLE, "right", codes)
 
-    def _add_castling_move(self, row, col, board, game_logic, rook_col, rook_target_col, king_target_col, side, validate):
+    def _add_castling_code(self, row, col, board, game_logic, rook_col, king_target_col, flag, side, codes):
         """
         Kiểm tra và thêm nước đi nhập thành cho một phía.
+        Vua không được đang bị chiếu, không được đi qua hoặc dừng ở ô bị tấn công
+        (kiểm tra bằng game_logic.is_square_attacked).
         """
         rook = board.squares[row][rook_col].piece
-        if isinstance(rook, Rook) and not rook.moved:
-            if all(board.squares[row][c].isempty() for c in range(min(col, rook_col) + 1, max(col, rook_col))):
-                # Nếu các ô giữa Vua và Xe đều trống
-                initial_square = Square(row, col)
-                final_square = Square(row, king_target_col)
-                king_move = Move(initial_square, final_square)
-
-                if not validate or not game_logic.in_check(self.color, king_move):  # Kiểm tra trạng thái "chiếu"
-                    self.add_move(king_move)
-
-                rook_initial = Square(row, rook_col)
-                rook_final = Square(row, rook_target_col)
-                rook_move = Move(rook_initial, rook_final)
-
-                if not validate or not game_logic.in_check(self.color, rook_move):  # Kiểm tra trạng thái "chiếu"
-                    rook.add_move(rook_move)
-
-                # Gán Xe tương ứng cho nhập thành
-                if side == "left":
-                    self.left_rook = rook
-                elif side == "right":
-                    self.right_rook = rook
-
-    def _try_add_move(self, move, game_logic, validate):
-        """
-        Kiểm tra và thêm nước đi vào danh sách.
-        """
-        if not validate or not game_logic.in_check(self.color, move):
-            self.add_move(move)
-
-    def move_of_piece(self, board, move, testing=False):
-        """
-        Thực hiện nước đi cho quân Vua.
-        """
-        super().move_of_piece(board, move, testing)
-        initial, final = move.initial, move.final
-
-        if self.castling(initial, final) and not testing:  # Nếu thực hiện nhập thành
-            diff = final.col - initial.col
-            rook = self.left_rook if diff < 0 else self.right_rook
-            rook_move = rook.moves[-1]  # Lấy nước đi của Xe trong nhập thành
-            rook.move_of_piece(board, rook_move)  # Di chuyển quân Xe khi nhập thành
+        if not (isinstance(rook, Rook) and rook.color == self.color and not rook.moved):
+            return
+        if not all(board.squares[row][c].isempty() for c in range(min(col, rook_col) + 1, max(col, rook_col))):
+            return  # Các ô giữa Vua và Xe phải trống
+
+        enemy_color = 'black' if self.color == 'white' else 'white'
+        step = 1 if king_target_col > col else -1
+        for c in range(col, king_target_col + step, step):
+            if game_logic.is_square_attacked((row, c), enemy_color):
+                return
+
+        codes.append(encode(row * 8 + col, row * 8 + king_target_col, flag))
+
+        # Gán Xe tương ứng cho nhập thành
+        if side == "left":
+            self.left_rook = rook
+        elif side == "right":
+            self.right_rook = rook
 
     def castling(self, initial, final):
         """
@@ -1,131 +1,159 @@
-from ..square import Square
-from ..move import Move
 from .piece import Piece
-from .queen import Queen
+from ..attack_tables import PAWN_ATTACKS, PAWN_ATTACK_MASKS
+from ..bitboard import WHITE, BLACK, FULL_BOARD, bit_squares
+from ..move_encoding import DOUBLE_PUSH, CAPTURE, EN_PASSANT, PROMOTION, PROMOTION_CAPTURE
+
+FILE_A = 0x0101010101010101  # Cột a (col = 0)
+FILE_H = FILE_A << 7  # Cột h (col = 7)
+ROW_MASKS = tuple(0xFF << (8 * row) for row in range(8))  # ROW_MASKS[row]: các ô của hàng row
 
 
 class Pawn(Piece):  # Kế thừa từ lớp Piece
     def __init__(self, color):
         self.dir = -1 if color == 'white' else 1  # Hướng di chuyển dựa trên màu sắc
-        self.en_passant = False  # Biến theo dõi nước đi "en passant"
+        self.attack_index = WHITE if color == 'white' else BLACK  # Chỉ số trong bảng PAWN_ATTACKS
+        self.start_row = 6 if color == 'white' else 1  # Hàng xuất phát (được đi 2 ô)
+        self.promotion_row = 0 if color == 'white' else 7  # Hàng phong cấp
         super().__init__('pawn', color, 1.0)  # Gọi hàm khởi tạo của lớp cha
 
-    def calc_moves(self, row, col, board, game_logic, validate=True):
+    def attacks(self, sq, occupied):
+        """Bitboard các ô (chéo phía trước) mà quân Tốt đứng ở sq tấn công."""
+        return PAWN_ATTACK_MASKS[self.attack_index][sq]
+
+    def gen_codes(self, sq, board, game_logic, codes):
         """
-        Tính toán các nước đi hợp lệ cho quân tốt.
-        :param row: Hàng hiện tại.
-        :param col: Cột hiện tại.
+        Sinh các nước đi giả hợp lệ (dạng mã số nguyên) cho quân tốt.
+        :param sq: Chỉ số ô hiện tại (row * 8 + col).
         :param board: Bàn cờ hiện tại.
         :param game_logic: Logic trò chơi.
-        :param validate: Có kiểm tra trạng thái "chiếu" hay không.
+        :param codes: Danh sách nhận các mã nước đi.
         """
-        self.moves = []
-        initial_square = Square(row, col)
-
         # 1. Tính nước đi thẳng
-        self._add_pawn_forward_moves(row, col, board, game_logic, initial_square, validate)
+        self._add_pawn_forward_codes(sq, board, codes)
 
         # 2. Tính nước đi chéo (ăn quân)
-        self._add_pawn_diagonal_moves(row, col, board, game_logic, initial_square, validate)
+        self._add_pawn_diagonal_codes(sq, board, codes)
 
         # 3. Xử lý nước đi "en passant"
-        self._add_en_passant_moves(row, col, board, game_logic, initial_square, validate)
+        self._add_en_passant_codes(sq, board, codes)
+
+    def _add_promotion_codes(self, sq, target, flag, codes):
+        """
+        Thêm 4 nước phong cấp (Hậu trước, sau đó Mã, Xe, Tượng).
+        :param flag: PROMOTION hoặc PROMOTION_CAPTURE.
+        """
+        for piece_index in (3, 0, 2, 1):
+            codes.append(sq | target << 6 | (flag | piece_index) << 12)
 
-    def _add_pawn_forward_moves(self, row, col, board, game_logic, initial_square, validate):
+    def _add_pawn_forward_codes(self, sq, board, codes):
         """
         Tính toán các nước đi thẳng cho quân tốt.
-        :param row: Hàng hiện tại.
-        :param col: Cột hiện tại.
+        :param sq: Chỉ số ô hiện tại.
         :param board: Bàn cờ hiện tại.
-        :param game_logic: Logic trò chơi.
-        :param initial_square: Ô hiện tại của quân tốt.
-        :param validate: Có kiểm tra trạng thái "chiếu" hay không.
+        :param codes: Danh sách nhận các mã nước đi.
         """
-        max_steps = 2 if not self.moved else 1
-        for step in range(1, max_steps + 1):
-            target_row = row + step * self.dir
-            if Square.in_range(target_row) and board.squares[target_row][col].isempty():
-                move = Move(initial_square, Square(target_row, col))
-                self._try_add_move(move, game_logic, validate)
-            else:
-                break  # Ngừng kiểm tra nếu gặp vật cản
-
-    def _add_pawn_diagonal_moves(self, row, col, board, game_logic, initial_square, validate):
+        cells = board.cells
+        target = sq + 8 * self.dir
+        if cells[target].piece is not None:
+            return  # Bị chặn
+
+        if target >> 3 == self.promotion_row:
+            self._add_promotion_codes(sq, target, PROMOTION, codes)
+            return
+        codes.append(sq | target << 6)
+
+        double_target = target + 8 * self.dir
+        if sq >> 3 == self.start_row and cells[double_target].piece is None:
+            codes.append(sq | double_target << 6 | DOUBLE_PUSH << 12)
+
+    def _add_pawn_diagonal_codes(self, sq, board, codes):
         """
         Tính toán các nước đi chéo (ăn quân) cho quân tốt.
-        :param row: Hàng hiện tại.
-        :param col: Cột hiện tại.
+        :param sq: Chỉ số ô hiện tại.
         :param board: Bàn cờ hiện tại.
-        :param game_logic: Logic trò chơi.
-        :param initial_square: Ô hiện tại của quân tốt.
-        :param validate: Có kiểm tra trạng thái "chiếu" hay không.
+        :param codes: Danh sách nhận các mã nước đi.
         """
-        for delta_col in [-1, 1]:
-            target_row, target_col = row + self.dir, col + delta_col
-            if Square.in_range(target_row, target_col) and board.squares[target_row][target_col].has_enemy_piece(self.color):
-                target_square = Square(target_row, target_col, board.squares[target_row][target_col].piece)
-                move = Move(initial_square, target_square)
-                self._try_add_move(move, game_logic, validate)
-
-    def _add_en_passant_moves(self, row, col, board, game_logic, initial_square, validate):
+        bitboards = board.bitboards
+        if bitboards is not None:
+            # Các ô Tốt tấn công có quân đối phương
+            captures = PAWN_ATTACK_MASKS[self.attack_index][sq] & bitboards.colors[1 - self.attack_index]
+            for target in bit_squares(captures):
+                self._add_capture_code(sq, target, codes)
+            return
+
+        cells = board.cells
+        for target in PAWN_ATTACKS[self.attack_index][sq]:
+            target_piece = cells[target].piece
+            if target_piece and target_piece.color != self.color:
+                self._add_capture_code(sq, target, codes)
+
+    def _add_capture_code(self, sq, target, codes):
+        """Thêm nước Tốt bắt quân ở ô target (4 nước nếu đến hàng phong cấp)."""
+        if target >> 3 == self.promotion_row:
+            self._add_promotion_codes(sq, target, PROMOTION_CAPTURE, codes)
+        else:
+            codes.append(sq | target << 6 | CAPTURE << 12)
+
+    def _add_en_passant_codes(self, sq, board, codes):
         """
         Tính toán các nước đi "en passant" cho quân tốt.
-        :param row: Hàng hiện tại.
-        :param col: Cột hiện tại.
-        :param board: Bàn cờ hiện tại.
-        :param game_logic: Logic trò chơi.
-        :param initial_square: Ô hiện tại của quân tốt.
-        :param validate: Có kiểm tra trạng thái "chiếu" hay không.
-        """
-        en_passant_row = 3 if self.color == 'white' else 4  # Hàng en passant
-        target_row = 2 if self.color == 'white' else 5  # Hàng kết thúc của en passant
-        if row == en_passant_row:
-            for delta_col in [-1, 1]:
-                adjacent_col = col + delta_col
-                if Square.in_range(adjacent_col):
-                    adjacent_piece = board.squares[row][adjacent_col].piece
-                    if (
-                        board.squares[row][adjacent_col].has_enemy_piece(self.color)
-                        and isinstance(adjacent_piece, Pawn)
-                        and adjacent_piece.en_passant
-                    ):
-                        move = Move(initial_square, Square(target_row, adjacent_col))
-                        self._try_add_move(move, game_logic, validate)
-
-    def _try_add_move(self, move, game_logic, validate):
-        """
-        Kiểm tra và thêm nước đi vào danh sách.
-        :param move: Nước đi cần kiểm tra.
-        :param game_logic: Logic trò chơi.
-        :param validate: Có kiểm tra trạng thái "chiếu" hay không.
-        """
-        if not validate or not game_logic.in_check(self.color, move):
-            self.add_move(move)\
-            
-    def en_passant_check(self, initial, final):
-        """
-        Kiểm tra nếu quân tốt vừa thực hiện nước đi 2 ô.
-        :param initial: Vị trí ban đầu.
-        :param final: Vị trí cuối cùng.
-        :return: True nếu nước đi là 2 ô, False nếu không.
-        """
-        return abs(initial.row - final.row) == 2
-    
-    def move_of_piece(self, board, move, testing=False):
-        """
-        Thực hiện nước đi cho quân tốt.
+        :param sq: Chỉ số ô hiện tại.
         :param board: Bàn cờ hiện tại.
-        :param move: Nước đi cần thực hiện.
-        :param testing: Có phải chế độ thử nghiệm không.
+        :param codes: Danh sách nhận các mã nước đi.
         """
-        super().move_of_piece(board, move)  # Gọi hàm di chuyển từ lớp cha
-        initial, final = move.initial, move.final
+        en_passant = board.en_passant
+        if en_passant is None:
+            return
+        # Ô en passant do Move.make ghi lại khi đối phương vừa đi Tốt 2 ô
+        if en_passant in PAWN_ATTACKS[self.attack_index][sq]:
+            victim = board.cells[(sq & ~7) | (en_passant & 7)].piece
+            if victim is not None and victim.color != self.color:  # Bỏ qua ô en passant do chính bên mình tạo ra
+                codes.append(sq | en_passant << 6 | EN_PASSANT << 12)
 
-        # Nếu quân tốt di chuyển 2 ô, bật trạng thái en passant
-        self.en_passant = self.en_passant_check(initial, final)
 
-        # Nếu quân tốt đến hàng cuối, phong cấp thành Hậu (không phải trong chế độ thử nghiệm)
-        if (final.row == 0 or final.row == 7) and not testing:
-            board.squares[final.row][final.col].piece = Queen(self.color)
+def add_pawn_codes(color_index, pawns, bitboards, allowed, noisy, codes):
+    """
+    Sinh cùng lúc nước đi của nhiều quân Tốt bằng phép dịch bitboard (không gồm bắt tốt qua đường).
+    Mã nước đi = ô đích * 65 + (ô xuất phát - ô đích) + (cờ << 12) vì ô đích nằm ở bit 6..11.
+    :param color_index: WHITE hoặc BLACK.
+    :param pawns: Bitboard các quân Tốt cần sinh (GameRule bỏ các Tốt bị ghim ra ngoài).
+    :param allowed: Bitboard các ô đích được phép (chặn/bắt quân chiếu khi bị chiếu).
+    :param noisy: None (mọi nước), True (bắt quân và phong cấp) hoặc False (nước yên lặng còn lại).
+    :param codes: Danh sách nhận các mã nước đi.
+    """
+    empty = ~bitboards.occupied & FULL_BOARD
+    enemy = bitboards.colors[1 - color_index]
+    if color_index == WHITE:
+        single = pawns >> 8 & empty
+        double = (single & ROW_MASKS[5]) >> 8 & empty
+        west = (pawns & ~FILE_A) >> 9 & enemy
+        east = (pawns & ~FILE_H) >> 7 & enemy
+        forward, promotion_row = -8, ROW_MASKS[0]
+    else:
+        single = pawns << 8 & empty
+        double = (single & ROW_MASKS[2]) << 8 & empty
+        west = (pawns & ~FILE_A) << 7 & enemy
+        east = (pawns & ~FILE_H) << 9 & enemy
+        forward, promotion_row = 8, ROW_MASKS[7]
+    single &= allowed
+    double &= allowed
+    west &= allowed
+    east &= allowed
 
-    
+    if noisy is not False:
+        for targets, offset, flag in ((single, -forward, PROMOTION), (west, -forward + 1, PROMOTION_CAPTURE),
+                                      (east, -forward - 1, PROMOTION_CAPTURE)):
+            for target in bit_squares(targets & promotion_row):
+                base = target * 65 + offset
+                for piece_index in (3, 0, 2, 1):  # Hậu trước, sau đó Mã, Xe, Tượng
+                    codes.append(base | (flag | piece_index) << 12)
+        for targets, offset in ((west, -forward + 1), (east, -forward - 1)):
+            offset += CAPTURE << 12
+            for target in bit_squares(targets & ~promotion_row):
+                codes.append(target * 65 + offset)
+    if noisy is not True:
+        for target in bit_squares(single & ~promotion_row):
+            codes.append(target * 65 - forward)
+        offset = -2 * forward + (DOUBLE_PUSH << 12)
+        for target in bit_squares(double):
+            codes.append(target * 65 + offset)
@@ -1,14 +1,23 @@
 import os
 from typing import Optional
 from abc import ABC, abstractmethod
+from ..move import Move
+from ..move_encoding import CAPTURE
+from ..attack_tables import RAYS
+from ..bitboard import COLOR_INDEX, bit_squares
+from ..psqt import psqt_index
+
+TARGET_CODES_CACHE_SIZE = 1 << 15  # Số bộ mã nước đi tối đa trong bộ nhớ đệm của add_target_codes
+_target_codes = {}
 
 class Piece(ABC):  # Lớp trừu tượng đại diện quân cờ
-    __slots__ = ('name', 'color', 'value', 'moves', 'moved', 'texture', 'texture_rect')
+    __slots__ = ('name', 'color', 'value', 'psqt_index', 'moves', 'moved', 'texture', 'texture_rect')
     
     def __init__(self, name: str, color: str, value: int, texture: Optional[str] = None, texture_rect=None):
         self.name = name  # Tên quân cờ
         self.color = color  # Màu sắc
         self.value = value * (1 if color == 'white' else -1)  # Giá trị
+        self.psqt_index = psqt_index(name, color)  # Vị trí khối 64 ô của quân trong bảng core.psqt.PSQT
         self.moves = []  # Nước đi hợp lệ
         self.moved = False  # Đã di chuyển hay chưa
         self.texture = texture  # Hình ảnh
@@ -16,8 +25,27 @@ class Piece(ABC):  # Lớp trừu tượng đại diện quân cờ
         self.set_texture()  # Thiết lập texture
     
     @abstractmethod
-    def calc_moves(self, row, col, board, bool_check=True):
-        pass  # Phương thức tính nước đi (lớp con phải cài đặt)
+    def gen_codes(self, sq, board, game_logic, codes):
+        pass  # Sinh nước đi giả hợp lệ dạng mã số nguyên vào danh sách codes (lớp con phải cài đặt)
+
+    @abstractmethod
+    def attacks(self, sq, occupied):
+        pass  # Bitboard các ô mà quân đứng ở sq tấn công với bitboard chiếm chỗ occupied (lớp con phải cài đặt)
+
+    def calc_moves(self, row, col, board, game_logic, validate=True):
+        """
+        Tính toán các nước đi của quân cờ dưới dạng đối tượng Move (dùng cho giao diện).
+        :param row: Hàng hiện tại.
+        :param col: Cột hiện tại.
+        :param board: Đối tượng bàn cờ.
+        :param game_logic: Đối tượng GameLogic để kiểm tra logic trò chơi.
+        :param validate: Có kiểm tra trạng thái "chiếu" hay không.
+        """
+        codes = []
+        self.gen_codes(row * 8 + col, board, game_logic, codes)
+        if validate:
+            codes = [code for code in codes if not game_logic.in_check(self.color, code)]
+        self.moves = [Move.from_code(code, board) for code in codes]
 
     def set_texture(self, size=80):
         if not self.texture:  # Thiết lập hình ảnh theo kích thước
@@ -27,19 +55,81 @@ class Piece(ABC):  # Lớp trừu tượng đại diện quân cờ
     
     def add_move(self, move):
         self.moves.append(move)  # Thêm nước đi hợp lệ
-            
-    def move_of_piece(self, board, move, testing=False):
-        initial = move.initial
-        final = move.final
 
-        # Thực hiện di chuyển quân cờ
-        board.squares[initial.row][initial.col].piece = None
-        board.squares[final.row][final.col].piece = self
+    def _add_sliding_codes(self, sq, board, codes, directions):
+        """
+        Sinh nước đi theo các tia trượt (Tượng, Xe, Hậu) dựa trên bảng RAYS tính sẵn
+        (hoặc theo attacks() khi bàn cờ bật bitboard).
+        :param directions: Chỉ số các hướng trong core.attack_tables.DIRECTIONS.
+        """
+        bitboards = board.bitboards
+        if bitboards is not None:
+            self.add_target_codes(sq, self.attacks(sq, bitboards.occupied), bitboards, codes)
+            return
+
+        cells = board.cells
+        color = self.color
+        capture = CAPTURE << 12
+
+        for direction in directions:
+            for target in RAYS[direction][sq]:
+                target_piece = cells[target].piece
+                if target_piece is None:
+                    codes.append(sq | target << 6)
+                    continue
+                if target_piece.color != color:
+                    codes.append(sq | target << 6 | capture)
+                break  # Quân chắn đường: không thể đi xa hơn
+
+    def _add_step_codes(self, sq, board, codes, targets):
+        """
+        Sinh các nước đi một bước (Mã, Vua) tới các ô trong bảng đích tính sẵn
+        (hoặc theo attacks() khi bàn cờ bật bitboard).
+        :param targets: Bảng KNIGHT_TARGETS hoặc KING_TARGETS.
+        """
+        bitboards = board.bitboards
+        if bitboards is not None:
+            self.add_target_codes(sq, self.attacks(sq, bitboards.occupied), bitboards, codes)
+            return
 
+        cells = board.cells
+        color = self.color
+        capture = CAPTURE << 12
+
+        for target in targets[sq]:
+            target_piece = cells[target].piece
+            if target_piece is None:
+                codes.append(sq | target << 6)
+            elif target_piece.color != color:
+                codes.append(sq | target << 6 | capture)
+
+    def add_target_codes(self, sq, attacks, bitboards, codes):
+        """
+        Sinh nước đi tới các ô trong bitboard `attacks` không có quân cùng màu: nước bắt quân
+        trước, sau đó nước yên lặng. GameRule lọc sẵn `attacks` bằng mặt nạ ghim/chặn chiếu
+        để sinh thẳng nước hợp lệ (không dùng cho Tốt).
+        """
+        color = COLOR_INDEX[self.color]
+        targets = attacks & ~bitboards.colors[color]
+        captures = targets & bitboards.colors[1 - color]
+
+        # Cùng quân, cùng ô đích lặp lại rất nhiều giữa các nút anh em: nhớ đệm cả bộ mã
+        key = targets | captures << 64 | sq << 128
+        cached = _target_codes.get(key)
+        if cached is None:
+            if len(_target_codes) >= TARGET_CODES_CACHE_SIZE:
+                _target_codes.clear()
+            cached = _target_codes[key] = (
+                tuple(sq | target << 6 | CAPTURE << 12 for target in bit_squares(captures))
+                + tuple(sq | target << 6 for target in bit_squares(targets ^ captures))
+            )
+        codes.extend(cached)
+
+    def move_of_piece(self, board, move, testing=False):
+        # Thực hiện di chuyển quân cờ (nhập thành, bắt tốt qua đường, phong cấp do Move.make xử lý)
+        board.move_piece(move)
         self.clear_moves()  # Xóa nước đi
-        board.last_move = move  # Lưu nước đi cuối
-        self.moved = True  # Đánh dấu đã di chuyển
-        
+
     def is_valid_move(self, move):
         return move in self.moves  # Kiểm tra nước đi hợp lệ
         
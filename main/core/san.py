@@ -0,0 +1,50 @@
+"""
+Đọc nước đi ở ký hiệu đại số chuẩn (SAN), ví dụ 'e4', 'Nbd7', 'exd5', 'O-O', 'e8=Q+'.
+"""
+import re
+
+from .move_encoding import KING_CASTLE, QUEEN_CASTLE, promotion_piece
+
+PIECE_LETTERS = {'N': 'knight', 'B': 'bishop', 'R': 'rook', 'Q': 'queen', 'K': 'king'}
+
+_SAN = re.compile(r'^([NBRQK])?([a-h])?([1-8])?x?([a-h][1-8])(?:=?([NBRQ]))?$')
+
+
+def _square(name):
+    return (8 - int(name[1])) * 8 + 'abcdefgh'.index(name[0])
+
+
+def parse_san(game_logic, san):
+    """
+    Tìm nước đi hợp lệ của bên đang tới lượt (board.turn) ứng với chuỗi SAN.
+    :return: Mã nước đi.
+    :raises ValueError: Nếu chuỗi không đúng cú pháp, hoặc không khớp đúng một nước hợp lệ.
+    """
+    board = game_logic.board
+    text = san.rstrip('+#!?')
+    codes = game_logic.generate_moves(board.turn)
+
+    if text in ('O-O', '0-0', 'O-O-O', '0-0-0'):
+        flag = KING_CASTLE if len(text) == 3 else QUEEN_CASTLE
+        matches = [code for code in codes if code >> 12 == flag]
+    else:
+        match = _SAN.match(text)
+        if match is None:
+            raise ValueError(f"Invalid SAN move {san!r}.")
+        letter, file, rank, target, promotion = match.groups()
+        name = PIECE_LETTERS[letter] if letter else 'pawn'
+        to_sq = _square(target)
+        promoted = PIECE_LETTERS[promotion] if promotion else None
+        matches = []
+        for code in codes:
+            from_sq = code & 63
+            if ((code >> 6) & 63 != to_sq or board.cells[from_sq].piece.name != name
+                    or (file and 'abcdefgh'[from_sq & 7] != file)
+                    or (rank and str(8 - (from_sq >> 3)) != rank)
+                    or promotion_piece(code) != promoted):
+                continue
+            matches.append(code)
+
+    if len(matches) != 1:
+        raise ValueError(f"SAN move {san!r} matches {len(matches)} legal moves.")
+    return matches[0]
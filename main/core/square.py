@@ -24,6 +24,9 @@ class Square:
     def has_enemy_piece(self, color):
         return self.has_piece() and self.piece.color != color
 
+    def isempty_or_enemy(self, color):
+        return self.isempty() or self.has_enemy_piece(color)
+
     @staticmethod
     def in_range(*args):
         return all(0 <= arg < 8 for arg in args)
@@ -0,0 +1,96 @@
+"""
+Khóa Zobrist 64 bit để nhận diện vị trí trong thời gian hằng số.
+
+Khóa là XOR của:
+    - PIECE_KEYS[màu][loại quân][sq] cho mỗi quân trên bàn cờ,
+    - SIDE_KEY nếu Đen đi nước tiếp theo,
+    - CASTLING_KEYS[quyền nhập thành] (4 bit, xem castling_rights),
+    - EN_PASSANT_KEYS[cột] nếu có ô bắt tốt qua đường.
+
+Khóa Tốt (pawn_key) chỉ là XOR của PIECE_KEYS các quân Tốt, dùng cho bảng băm cấu trúc Tốt.
+
+Board cập nhật phần quân cờ (và khóa Tốt) trong place_piece_at/remove_piece_at, còn Move.make
+cập nhật phần lượt đi, quyền nhập thành và en passant.
+"""
+import random
+
+from .bitboard import WHITE, BLACK, COLOR_INDEX, PIECE_INDEX
+
+# Quyền nhập thành dạng bit
+WHITE_KING_SIDE = 1
+WHITE_QUEEN_SIDE = 2
+BLACK_KING_SIDE = 4
+BLACK_QUEEN_SIDE = 8
+
+# (bit quyền, màu, ô Vua, ô Xe)
+CASTLING_SQUARES = (
+    (WHITE_KING_SIDE, 'white', 60, 63),
+    (WHITE_QUEEN_SIDE, 'white', 60, 56),
+    (BLACK_KING_SIDE, 'black', 4, 7),
+    (BLACK_QUEEN_SIDE, 'black', 4, 0),
+)
+
+_random = random.Random(0x5EED)  # Hạt giống cố định để khóa ổn định giữa các lần chạy
+
+
+def _key():
+    return _random.getrandbits(64)
+
+
+PIECE_KEYS = tuple(tuple(tuple(_key() for _ in range(64)) for _ in range(6)) for _ in (WHITE, BLACK))
+SIDE_KEY = _key()
+CASTLING_KEYS = tuple(_key() for _ in range(16))
+EN_PASSANT_KEYS = tuple(_key() for _ in range(8))
+
+
+def piece_key(piece, sq):
+    """Khóa của quân cờ `piece` đứng ở ô sq."""
+    return PIECE_KEYS[COLOR_INDEX[piece.color]][PIECE_INDEX[piece.name]][sq]
+
+
+def castling_rights(board):
+    """
+    Suy ra quyền nhập thành (4 bit) từ cờ moved của Vua và Xe trên bàn cờ.
+    """
+    rights = 0
+    cells = board.cells
+    for bit, color, king_sq, rook_sq in CASTLING_SQUARES:
+        king, rook = cells[king_sq].piece, cells[rook_sq].piece
+        if (king is not None and king.name == 'king' and king.color == color and not king.moved
+                and rook is not None and rook.name == 'rook' and rook.color == color and not rook.moved):
+            rights |= bit
+    return rights
+
+
+def state_key(board):
+    """Phần khóa không thuộc về vị trí quân: lượt đi, quyền nhập thành và en passant."""
+    key = CASTLING_KEYS[castling_rights(board)]
+    if board.turn == 'black':
+        key ^= SIDE_KEY
+    if board.en_passant is not None:
+        key ^= EN_PASSANT_KEYS[board.en_passant & 7]
+    return key
+
+
+def compute_key(board):
+    """
+    Tính lại khóa Zobrist từ đầu (dùng khi dựng bàn cờ và để kiểm tra bản cập nhật tăng dần).
+    """
+    key = state_key(board)
+    cells = board.cells
+    for color in ('white', 'black'):
+        for sq in board.piece_squares[color]:
+            key ^= piece_key(cells[sq].piece, sq)
+    return key
+
+
+def compute_pawn_key(board):
+    """Tính lại khóa chỉ gồm các quân Tốt từ đầu (để kiểm tra bản cập nhật tăng dần)."""
+    key = 0
+    cells = board.cells
+    for color in ('white', 'black'):
+        for sq in board.piece_squares[color]:
+            piece = cells[sq].piece
+            if piece.name == 'pawn':
+                key ^= piece_key(piece, sq)
+    return key
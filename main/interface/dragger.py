@@ -1,5 +1,6 @@
 import pygame
 from const import *
+from core.board import load_image
 
 class Dragger:
     def __init__(self):
@@ -56,7 +57,7 @@ class Dragger:
     def update_blit(self, surface, size=128):
         if self.piece:
             self.piece.set_texture(size=size)
-            img = pygame.image.load(self.piece.texture)
+            img = load_image(self.piece.texture)
             img_center = self.mouse_pos
             self.piece.texture_rect = img.get_rect(center=img_center)
             surface.blit(img, self.piece.texture_rect)
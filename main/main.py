@@ -1,12 +1,15 @@
 import sys
 import pygame
-from const import WIDTH, HEIGHT, SQ_SIZE  # Import constants
+from const import WIDTH, HEIGHT, SQ_SIZE, FPS, AI_COLOR, AI_TIME_LIMIT, AI_PONDER  # Import constants
 from core.board import Board  # Chessboard management
 from core.game_rule import GameRule  # Game logic
-from player import Player  # Player management
+from player import Player, AIPlayer  # Player management
 from interface.dragger import Dragger
 from core.square import Square
 from core.move import Move
+from ai.background import BackgroundSearch
+from ai.opening_book import load_book
+from chessBot import default_strategy
 
 
 class Main:
@@ -14,15 +17,19 @@ class Main:
         pygame.init()
         self.screen = pygame.display.set_mode((WIDTH, HEIGHT))
         pygame.display.set_caption('Chess')
+        self.clock = pygame.time.Clock()  # Giữ vòng lặp giao diện ở FPS khung hình mỗi giây
 
         # Tạo các thành phần chính
         self.board = Board()
         self.dragger = Dragger()  # Đối tượng Dragger để xử lý kéo quân cờ
         self.game_logic = GameRule(self.board)
 
-        # Khởi tạo người chơi
-        self.white_player = Player("Player 1", "white")
-        self.black_player = Player("Player 2", "black")
+        # Khởi tạo người chơi: AI (nếu có) tìm kiếm trong tiến trình nền, giao diện không bị chặn
+        self.white_player = self._create_player("Player 1", "white")
+        self.black_player = self._create_player("Player 2", "black")
+        self.search = None
+        if AI_COLOR is not None:
+            self.search = BackgroundSearch(default_strategy, ponder=AI_PONDER, on_info=self._show_search_info)
 
         # Lượt chơi ban đầu
         self.current_player = self.white_player
@@ -31,12 +38,22 @@ class Main:
         self.running = True
         self.valid_moves = []  # Danh sách nước đi hợp lệ của quân cờ được nhấn giữ
 
+    @staticmethod
+    def _create_player(username, color):
+        """Tạo người chơi cho một màu quân: AIPlayer nếu là màu của AI (AI_COLOR)."""
+        if color == AI_COLOR:
+            return AIPlayer(None, color, time_limit=AI_TIME_LIMIT, opening_book=load_book())
+        return Player(username, color)
+
     def main_loop(self):
         """Main game loop."""
         while self.running:
             self._handle_events()
+            self._update_ai()
             self._render_screen()
             pygame.display.update()
+            self.clock.tick(FPS)
+        self._close_search()
 
     def _handle_events(self):
         """Xử lý các sự kiện từ người chơi."""
@@ -53,6 +70,8 @@ class Main:
 
     def _on_mouse_down(self, event):
         """Xử lý khi nhấn chuột."""
+        if isinstance(self.current_player, AIPlayer):
+            return  # Đang là lượt của AI
         row, col = self._get_square_from_mouse(event.pos)
         square = self.board.squares[row][col]
 
@@ -63,9 +82,7 @@ class Main:
             # Tính toán các nước đi hợp lệ
             self.game_logic.calculate_all_moves(self.current_player.color)
             self.valid_moves = square.piece.moves  # Lưu trữ các nước đi hợp lệ trong danh sách
-            for a in range(len(self.valid_moves)):
-
-                self.board.highlight_moves(a)  # Hiển thị các nước đi hợp lệ
+            self.board.highlight_selected_square(row, col)  # Tô sáng ô được chọn và các nước đi hợp lệ
 
     def _on_mouse_up(self, event):
         """Xử lý khi thả chuột."""
@@ -83,11 +100,7 @@ class Main:
             # Kiểm tra tính hợp lệ của nước đi
             if move in self.valid_moves:
                 # Thực hiện nước đi
-                self.dragger.piece.move_of_piece(self.board, move)
-                self.game_logic.last_move = move  # Lưu nước đi cuối cùng
-
-                # Kiểm tra trạng thái trò chơi
-                self._check_game_status()
+                self._play_move(move)
 
             # Làm rỗng danh sách nước đi hợp lệ
             self.valid_moves = []
@@ -96,22 +109,56 @@ class Main:
             # Kết thúc kéo
             self.dragger.undrag_piece()
 
-
+    def _update_ai(self):
+        """
+        Cập nhật lượt của AI ở mỗi khung hình mà không chặn: đi nước trong sách khai cuộc, hoặc
+        bắt đầu tìm kiếm nền rồi kiểm tra kết quả ở các khung hình sau.
+        """
+        player = self.current_player
+        if not self.running or not isinstance(player, AIPlayer):
+            return
+        if not self.search.thinking:
+            book_move = player.book_move(self.game_logic)
+            if book_move is not None:
+                self._play_move(book_move)
+            else:
+                self.search.start(self.board, player.search_depth(), player.time_limit, player.node_limit)
+            return
+        result = self.search.poll()
+        if result is None:
+            return
+        code = result[0]
+        if code is None:
+            return  # Không còn nước đi (đã được _check_game_status xử lý)
+        self._play_move(Move.from_code(code, self.board))
+
+    def _play_move(self, move):
+        """Thực hiện nước đi của người chơi hiện tại và chuyển lượt."""
+        piece = self.board.squares[move.initial.row][move.initial.col].piece
+        piece.move_of_piece(self.board, move)
+        self.game_logic.last_move = move  # Lưu nước đi cuối cùng
+
+        # Kiểm tra trạng thái trò chơi
+        self._check_game_status()
+
+    def _show_search_info(self, info):
+        """Hiển thị độ sâu và điểm của vòng tìm kiếm nền vừa hoàn thành trên thanh tiêu đề."""
+        pygame.display.set_caption(f"Chess - AI depth {info['depth']}, score {info['score']:+.2f}")
 
     def _get_square_from_mouse(self, mouse_pos):
         """Chuyển đổi vị trí chuột sang tọa độ bàn cờ."""
         return mouse_pos[1] // SQ_SIZE, mouse_pos[0] // SQ_SIZE
 
     def _check_game_status(self):
-        """Kiểm tra trạng thái trò chơi."""
-        if self.game_logic.is_checkmate(self.current_player.color):
-            print(f"Checkmate! {self.current_player.color} loses!")
+        """Chuyển lượt rồi kiểm tra trạng thái trò chơi của bên vừa đến lượt."""
+        self._switch_turn()
+        color = self.current_player.color
+        if self.game_logic.is_checkmate(color):
+            print(f"Checkmate! {color} loses!")
             self.running = False
-        elif self.game_logic.is_stalemate(self.current_player.color):
+        elif self.game_logic.is_stalemate(color):
             print("Stalemate! It's a draw!")
             self.running = False
-        else:
-            self._switch_turn()
 
     def _switch_turn(self):
         """Chuyển đổi lượt chơi."""
@@ -123,17 +170,24 @@ class Main:
     def _render_screen(self):
         """Hiển thị giao diện trò chơi."""
         self.board.show_background(self.screen)  # Hiển thị nền bàn cờ
-        self.board.show_pieces(self.screen, self.dragger)  # Hiển thị quân cờ
-        if self.valid_moves:
-            self.board.highlight_moves(self.valid_moves)  # Hiển thị các ô hợp lệ
         if self.game_logic.last_move:
             self.board.show_last_move(self.screen)  # Hiển thị nước đi cuối cùng
+        self.board.show_pieces(self.screen, self.dragger)  # Hiển thị quân cờ
+        if self.valid_moves:
+            self.board.show_valid_moves(self.screen)  # Hiển thị các ô hợp lệ
         if self.dragger.dragging:
             self.dragger.update_blit(self.screen)  # Hiển thị quân cờ đang kéo
 
+    def _close_search(self):
+        """Dừng tiến trình tìm kiếm nền (nếu có)."""
+        if self.search is not None:
+            self.search.close()
+            self.search = None
+
     def _quit_game(self):
         """Thoát trò chơi."""
         self.running = False
+        self._close_search()
         pygame.quit()
         sys.exit()
 
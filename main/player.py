@@ -1,5 +1,6 @@
 from core.move import Move
 from core.square import Square
+from chessBot import DEFAULT_DEPTH, MAX_SEARCH_DEPTH
 
 
 class Player:
@@ -20,7 +21,7 @@ class Player:
         Cập nhật danh sách các nước đi hợp lệ.
         :param game_logic: Đối tượng GameLogic quản lý logic trò chơi.
         """
-        self.moves = game_logic.generate_moves(self.color)
+        self.moves = game_logic.calculate_all_moves(self.color)
 
     def make_move(self, move, game_logic):
         """
@@ -36,7 +37,6 @@ class Player:
                 # Thực hiện nước đi
                 piece.move_of_piece(game_logic.board, move)
                 # Cập nhật trạng thái logic
-                game_logic.set_true_en_passant(move)
                 game_logic.last_move = move
                 game_logic.next_turn()
                 return True
@@ -58,30 +58,57 @@ class Player:
 
 
 class AIPlayer(Player):
-    def __init__(self, ai_strategy, color="black", username="AI Bot"):
+    def __init__(self, ai_strategy, color="black", username="AI Bot", time_limit=None, node_limit=None,
+                 opening_book=None):
         """
         Khởi tạo đối tượng AI Player.
         :param ai_strategy: Chiến lược AI được sử dụng (lớp AIStrategy).
         :param color: Màu quân cờ của AI ('white' hoặc 'black').
         :param username: Tên người chơi AI (mặc định là 'AI Bot').
+        :param time_limit: Ngân sách thời gian mỗi nước (giây), None nếu không giới hạn.
+        :param node_limit: Ngân sách số nút mỗi nước, None nếu không giới hạn.
+        :param opening_book: Sách khai cuộc (ai.opening_book.OpeningBook) tra trước khi tìm kiếm, None nếu không dùng.
         """
         super().__init__(username, color)
         self.ai_strategy = ai_strategy
+        self.time_limit = time_limit
+        self.node_limit = node_limit
+        self.opening_book = opening_book
 
-    def select_move(self, game_logic, depth=3):
+    def select_move(self, game_logic, depth=None):
         """
-        Chọn nước đi tối ưu dựa trên chiến lược AI.
+        Chọn nước đi tối ưu: nước trong sách khai cuộc nếu vị trí có trong sách, nếu không thì
+        theo chiến lược AI (iterative deepening trong ngân sách).
         :param game_logic: Đối tượng GameLogic để quản lý logic trò chơi.
-        :param depth: Độ sâu tìm kiếm của thuật toán AI.
+        :param depth: Độ sâu tìm kiếm tối đa; mặc định DEFAULT_DEPTH, hoặc MAX_SEARCH_DEPTH khi có ngân sách.
         :return: Nước đi được chọn hoặc None nếu không có nước đi.
         """
-        return self.ai_strategy.select_move(game_logic, depth)
+        book_move = self.book_move(game_logic)
+        if book_move is not None:
+            return book_move
+        return self.ai_strategy.select_move(game_logic, self.search_depth(depth), self.time_limit, self.node_limit)
 
-    def make_move(self, game_logic, depth=3):
+    def book_move(self, game_logic):
+        """
+        Nước đi trong sách khai cuộc cho vị trí hiện tại.
+        :return: Đối tượng Move, hoặc None nếu không có sách hoặc vị trí không có trong sách.
+        """
+        if self.opening_book is None:
+            return None
+        code = self.opening_book.choose(game_logic)
+        return Move.from_code(code, game_logic.board) if code is not None else None
+
+    def search_depth(self, depth=None):
+        """Độ sâu tìm kiếm tối đa: `depth` nếu có, mặc định DEFAULT_DEPTH, hoặc MAX_SEARCH_DEPTH khi có ngân sách."""
+        if depth is not None:
+            return depth
+        return MAX_SEARCH_DEPTH if self.time_limit or self.node_limit else DEFAULT_DEPTH
+
+    def make_move(self, game_logic, depth=None):
         """
         Thực hiện nước đi bằng AI.
         :param game_logic: Đối tượng GameLogic để quản lý logic trò chơi.
-        :param depth: Độ sâu tìm kiếm của thuật toán AI.
+        :param depth: Độ sâu tìm kiếm tối đa của thuật toán AI.
         :return: Nước đi được thực hiện.
         """
         best_move = self.select_move(game_logic, depth)
@@ -92,7 +119,6 @@ class AIPlayer(Player):
                 piece.move_of_piece(game_logic.board, best_move)
 
                 # Cập nhật logic trò chơi
-                game_logic.set_true_en_passant(best_move)
                 game_logic.last_move = best_move
                 game_logic.next_turn()
         return best_move
@@ -0,0 +1,131 @@
+"""
+Dựng sách khai cuộc nhị phân (ai.opening_book) từ một tệp PGN.
+
+Mỗi ván chỉ đọc các nước đầu (--plies). Mỗi lần một nước được đi từ một vị trí, nước đó
+được cộng điểm theo kết quả ván với bên đi: thắng 2, hòa 1, thua 0 (ván chưa rõ kết quả
+tính như hòa). Nước xuất hiện ít hơn --min-count lần bị bỏ.
+
+Chạy từ thư mục main:
+    python -m tools.build_book games.pgn [games2.pgn ...] [-o assets/book.bin] [--plies 16] [--min-count 2]
+"""
+import argparse
+import re
+import sys
+from collections import defaultdict
+
+from ai.opening_book import write_book
+from const import OPENING_BOOK_PATH
+from core.board import Board
+from core.game_rule import GameRule
+from core.move import Move
+from core.san import parse_san
+
+RESULTS = {'1-0': 'white', '0-1': 'black', '1/2-1/2': None, '*': None}
+RESULT_POINTS = {'win': 2, 'draw': 1, 'loss': 0}
+
+_COMMENT = re.compile(r'\{[^}]*\}|;[^\n]*')
+_MOVE_NUMBER = re.compile(r'^\d+\.+')
+
+
+def _strip_variations(text):
+    """Bỏ các nhánh biến (...) lồng nhau."""
+    depth = 0
+    kept = []
+    for char in text:
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth = max(0, depth - 1)
+        elif not depth:
+            kept.append(char)
+    return ''.join(kept)
+
+
+def read_games(text):
+    """
+    Tách nội dung PGN thành các ván.
+    :return: Danh sách (danh sách nước SAN, màu thắng hoặc None nếu hòa/chưa rõ).
+    """
+    games = []
+    moves, result = [], None
+    for block in re.split(r'\n\s*\n', text.replace('\r\n', '\n')):
+        block = block.strip()
+        if not block:
+            continue
+        if block.startswith('['):
+            # Khối thẻ tiêu đề bắt đầu một ván mới
+            if moves:
+                games.append((moves, result))
+            moves, result = [], None
+            tag = re.search(r'\[Result\s+"([^"]*)"\]', block)
+            if tag:
+                result = RESULTS.get(tag.group(1))
+            continue
+        for token in _strip_variations(_COMMENT.sub(' ', block)).split():
+            token = _MOVE_NUMBER.sub('', token)
+            if not token or token.startswith('$'):
+                continue
+            if token in RESULTS:
+                result = RESULTS[token]
+                continue
+            moves.append(token)
+    if moves:
+        games.append((moves, result))
+    return games
+
+
+def build_entries(games, plies, min_count=1):
+    """
+    Cộng điểm các nước đầu của các ván.
+    :return: (từ điển {khóa vị trí: {mã nước đi: trọng số}}, số ván bị lỗi).
+    """
+    weights = defaultdict(lambda: defaultdict(int))
+    counts = defaultdict(int)
+    errors = 0
+    for moves, winner in games:
+        game_logic = GameRule(Board())
+        board = game_logic.board
+        for san in moves[:plies]:
+            try:
+                code = parse_san(game_logic, san)
+            except ValueError:
+                errors += 1
+                break
+            key = board.zobrist_key
+            if winner is None:
+                points = RESULT_POINTS['draw']
+            else:
+                points = RESULT_POINTS['win' if winner == board.turn else 'loss']
+            weights[key][code] += points
+            counts[key, code] += 1
+            Move.make(board, code)
+
+    entries = {}
+    for key, moves in weights.items():
+        kept = {code: weight for code, weight in moves.items() if counts[key, code] >= min_count and weight}
+        if kept:
+            entries[key] = kept
+    return entries, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dựng sách khai cuộc nhị phân từ tệp PGN.")
+    parser.add_argument('pgn', nargs='+', help="Tệp PGN nguồn.")
+    parser.add_argument('-o', '--output', default=OPENING_BOOK_PATH, help="Tệp sách đầu ra.")
+    parser.add_argument('--plies', type=int, default=16, help="Số nửa nước đầu mỗi ván đưa vào sách.")
+    parser.add_argument('--min-count', type=int, default=1, help="Số lần xuất hiện tối thiểu của một nước.")
+    args = parser.parse_args()
+
+    games = []
+    for path in args.pgn:
+        with open(path, encoding='utf-8', errors='replace') as file:
+            games.extend(read_games(file.read()))
+    entries, errors = build_entries(games, args.plies, args.min_count)
+    count = write_book(args.output, entries)
+    print(f"{len(games)} games ({errors} with unreadable moves), {len(entries)} positions, "
+          f"{count} moves -> {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,41 @@
+"""
+Dựng bảng tàn cuộc (ai.tablebase) cho các tổ hợp quân 3 và 4 quân bằng phân tích ngược.
+
+Các bảng con cần thiết (sau bắt quân/phong cấp) được dựng trước; bảng đã có tệp bị bỏ qua.
+Bảng 3 quân mất vài chục giây, bảng 4 quân (33,5 triệu chỉ số) mất nhiều thời gian hơn đáng kể.
+
+Chạy từ thư mục main:
+    python -m tools.build_tablebases [KQvK KRvK KPvK ...] [--dir assets/tablebases]
+"""
+import argparse
+import sys
+import time
+
+from ai.tablebase_gen import generate
+from const import TABLEBASE_DIR
+
+DEFAULT_SIGNATURES = ('KQvK', 'KRvK', 'KPvK')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dựng bảng tàn cuộc bằng phân tích ngược.")
+    parser.add_argument('signatures', nargs='*', default=DEFAULT_SIGNATURES,
+                        help="Tổ hợp quân, bên mạnh trước (ví dụ KQvK KRvK KPvK KQvKR KBNvK).")
+    parser.add_argument('--dir', default=TABLEBASE_DIR, help="Thư mục chứa các tệp .tbl.")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+
+    def progress(stage, count):
+        print(f"\r  {stage:<5} {count:>12,}  {time.perf_counter() - start:7.1f}s", end='', file=sys.stderr)
+
+    def log(message):
+        print(f"\r{message} ({time.perf_counter() - start:.1f}s)")
+
+    for signature in args.signatures:
+        generate(signature, args.dir, progress, log)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())